@@ -0,0 +1,123 @@
+# agent/batch.py
+import asyncio
+import json
+import os
+import time
+import weakref
+from typing import Optional
+
+from agent.budget import report as budget_report
+from agent.fix_cache import fix_cache_stats
+from agent.rate_limiter import rate_limiter
+from agent.workflow import build_initial_state, get_app, llm_cache_stats
+from config import config
+from tools.sandbox import use_project_root
+from tools.tool_memo import memo_stats
+from utils.logger import logger
+from utils.tracing import Trace, use_trace
+
+DEFAULT_TASK = "Explore the project directory, find the main entry point, run it, and fix any errors you encounter."
+
+# One lock per project root: two jobs editing and running the same tree at once
+# would read each other's half-applied fixes and roll back each other's snapshots.
+_root_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _root_lock(project_root: str) -> asyncio.Lock:
+    root = os.path.abspath(project_root)
+    lock = _root_locks.get(root)
+    if lock is None:
+        lock = _root_locks[root] = asyncio.Lock()
+    return lock
+
+
+def load_jobs(jobs_path: str) -> list:
+    """Read (project_root, task) jobs from a JSONL file, one JSON object per line."""
+    jobs = []
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if "project_root" not in job:
+                raise ValueError(f"{jobs_path}:{line_no}: job is missing 'project_root'")
+            job.setdefault("id", str(line_no))
+            job.setdefault("task", DEFAULT_TASK)
+            jobs.append(job)
+    return jobs
+
+
+async def run_job(job: dict) -> dict:
+    """Heal one project. Never raises: failures are reported in the result record.
+
+    Jobs for the same project root run one after the other.
+    """
+    async with _root_lock(job["project_root"]):
+        return await _run_job(job)
+
+
+async def _run_job(job: dict) -> dict:
+    started = time.perf_counter()
+    result = {"id": job["id"], "project_root": job["project_root"], "task": job["task"]}
+
+    trace = Trace(f"job_{job['id']}_{time.strftime('%Y%m%d_%H%M%S')}") if config.TRACE_ENABLED else None
+
+    with use_project_root(job["project_root"]), use_trace(trace):
+        try:
+            final_state = await get_app().ainvoke(build_initial_state(job["task"]))
+            result.update({
+                "status": "success" if final_state.get("phase") == "done" else "failed",
+                "phase": final_state.get("phase"),
+                "iterations": final_state.get("iteration_count", 0),
+                "final_message": final_state["messages"][-1].content,
+                "tool_memo": memo_stats(final_state["messages"]),
+                "budget": budget_report(final_state.get("budget")),
+            })
+        except Exception as e:
+            result.update({"status": "error", "error": str(e)})
+
+    result["wall_time_s"] = round(time.perf_counter() - started, 3)
+    if trace is not None:
+        result["trace"] = trace.export(config.TRACE_DIR)
+        result["time_ms_by_category"] = {k: v["total_ms"] for k, v in trace.summary()["by_category"].items()}
+    return result
+
+
+async def run_batch(jobs_path: str, output_path: str, concurrency: Optional[int] = None) -> dict:
+    """Run every job in `jobs_path` with at most `concurrency` in flight.
+
+    Each result is appended to `output_path` as soon as its job finishes, so a
+    partially completed batch still leaves usable output behind.
+    """
+    jobs = load_jobs(jobs_path)
+    concurrency = concurrency or config.BATCH_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"success": 0, "failed": 0, "error": 0}
+    started = time.perf_counter()
+
+    logger.log_step(f"Batch: {len(jobs)} jobs, concurrency {concurrency}")
+
+    async def bounded(job):
+        async with semaphore:
+            return await run_job(job)
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        for finished in asyncio.as_completed([bounded(job) for job in jobs]):
+            result = await finished
+            counts[result["status"]] += 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            logger.log_step(f"Job {result['id']} finished: {result['status']} in {result['wall_time_s']}s")
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "jobs": len(jobs),
+        **counts,
+        "wall_time_s": round(elapsed, 3),
+        "jobs_per_min": round(len(jobs) / elapsed * 60, 2) if elapsed else 0.0,
+        "rate_limiter": rate_limiter.metrics(),
+        "llm_cache": llm_cache_stats(),
+        "fix_cache": fix_cache_stats(),
+    }
+    logger.log_success(f"Batch finished: {summary}")
+    return summary
@@ -0,0 +1,121 @@
+# agent/budget.py
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+
+# What a run spends: model tokens, seconds inside graph nodes, and seconds of that running tools.
+METERS = ("prompt_tokens", "completion_tokens", "wall_s", "tool_s")
+
+# Phases a degraded run may skip, and where it goes instead.
+SKIPS = {"analyze_error": "propose_fix", "locate_code": "propose_fix", "propose_fix": "apply_fix"}
+
+
+def _zero() -> Dict[str, float]:
+    return {meter: 0 for meter in METERS}
+
+
+def run_limits() -> Dict[str, float]:
+    return {
+        "prompt_tokens": config.BUDGET_PROMPT_TOKENS,
+        "completion_tokens": config.BUDGET_COMPLETION_TOKENS,
+        "wall_s": config.BUDGET_WALL_SECONDS,
+        "tool_s": config.BUDGET_TOOL_SECONDS,
+    }
+
+
+def new_budget() -> dict:
+    """Budget state of a fresh run. The limits are copied in, so a resumed run keeps its own."""
+    return {
+        "limits": {"run": run_limits(), "phases": {p: dict(l) for p, l in config.BUDGET_PHASES.items()}},
+        "run": _zero(),
+        "phases": {},
+        "compact": False,
+        "actions": [],
+        "stopped": None,
+    }
+
+
+def charge(budget: Optional[dict], phase: str, **amounts) -> dict:
+    """A copy of `budget` with `amounts` added to the run and to `phase`."""
+    budget = budget or new_budget()
+    run = dict(budget["run"])
+    phases = {p: dict(usage) for p, usage in budget["phases"].items()}
+    usage = phases.setdefault(phase, _zero())
+    for meter, amount in amounts.items():
+        amount = round(amount or 0, 4)
+        run[meter] = round(run[meter] + amount, 4)
+        usage[meter] = round(usage[meter] + amount, 4)
+    return {**budget, "run": run, "phases": phases}
+
+
+def _over(usage: Dict[str, float], limits: Dict[str, float], fraction: float = 1.0) -> List[str]:
+    return [f"{meter} {usage.get(meter, 0):g}/{limit:g}"
+            for meter, limit in limits.items() if limit and usage.get(meter, 0) >= limit * fraction]
+
+
+def assess(budget: Optional[dict], phase: str) -> Tuple[Optional[str], List[str]]:
+    """("stop", reasons) once a run limit is reached; ("degrade", reasons) once a run
+    meter passes BUDGET_DEGRADE_AT of its limit or `phase` used up its own budget."""
+    if not budget:
+        return None, []
+    limits = budget["limits"]
+    reasons = _over(budget["run"], limits["run"])
+    if reasons:
+        return "stop", reasons
+    reasons = _over(budget["run"], limits["run"], config.BUDGET_DEGRADE_AT)
+    reasons += [f"{phase} {r}" for r in _over(budget["phases"].get(phase, {}), limits["phases"].get(phase, {}))]
+    return ("degrade", reasons) if reasons else (None, [])
+
+
+def decide(budget: Optional[dict], phase: str) -> Optional[str]:
+    """What route_logic should do: "stop" at a run limit, "skip" when a degraded run can
+    still jump past `phase` (once per phase), or None to carry on."""
+    verdict, _ = assess(budget, phase)
+    if verdict == "stop":
+        return "stop"
+    taken = {(a["action"], a["phase"]) for a in budget["actions"]} if budget else set()
+    if verdict == "degrade" and phase in SKIPS and ("skip", phase) not in taken:
+        return "skip"
+    return None
+
+
+def degrade_compaction(budget: dict, phase: str, iteration: int) -> dict:
+    """Switch to tighter compaction the first time the run is over a degrade threshold."""
+    if budget["compact"] or phase in ("done", "failed"):
+        return budget
+    verdict, reasons = assess(budget, phase)
+    if verdict == "degrade":
+        return record(budget, "compact", phase, iteration, reasons)
+    return budget
+
+
+def record(budget: dict, action: str, phase: str, iteration: int, reasons: List[str]) -> dict:
+    """A copy of `budget` with an enforcement step logged (and applied, for compaction and stops)."""
+    entry = {"action": action, "phase": phase, "iteration": iteration, "reasons": reasons}
+    budget = {**budget, "actions": [*budget["actions"], entry]}
+    if action == "compact":
+        budget["compact"] = True
+    elif action == "stop":
+        budget["stopped"] = entry
+    return budget
+
+
+def compaction_budget(budget: Optional[dict]) -> int:
+    """Token budget for compaction, tighter once a run has been degraded."""
+    if budget and budget["compact"]:
+        return int(config.COMPACTION_TOKEN_BUDGET * config.BUDGET_DEGRADED_COMPACTION)
+    return config.COMPACTION_TOKEN_BUDGET
+
+
+def report(budget: Optional[dict]) -> dict:
+    """Usage against limits for the run, per-phase usage, and what enforcement did."""
+    if not budget:
+        return {}
+    limits = budget["limits"]["run"]
+    return {
+        "usage": budget["run"],
+        "utilization": {m: round(budget["run"][m] / limit, 3) for m, limit in limits.items() if limit},
+        "by_phase": budget["phases"],
+        "actions": [f"{a['action']}@{a['phase']}" for a in budget["actions"]],
+        "stopped": budget["stopped"]["reasons"] if budget["stopped"] else None,
+    }
@@ -0,0 +1,61 @@
+# agent/checkpoints.py
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from typing import Any, Tuple
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from config import config
+
+_COMPRESSED_PREFIX = "z:"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """JsonPlus (msgpack) serialization with zlib on top for anything above a few hundred bytes.
+
+    The message history dominates checkpoint size and is mostly repetitive text
+    (source files, tracebacks, tool output), so it compresses several-fold.
+    """
+
+    def __init__(self, min_size: int = 512, level: int = 3):
+        self._inner = JsonPlusSerializer()
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self._inner.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return _COMPRESSED_PREFIX + type_, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(_COMPRESSED_PREFIX):
+            type_, payload = type_[len(_COMPRESSED_PREFIX):], zlib.decompress(payload)
+        return self._inner.loads_typed((type_, payload))
+
+
+def open_checkpointer(db_path: str = None) -> SqliteSaver:
+    """SQLite-backed checkpointer that stores the state after every node."""
+    db_path = db_path or config.CHECKPOINT_DB
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # WAL + NORMAL: a checkpoint write is an append, not a full fsync of the database.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return SqliteSaver(conn, serde=CompressedSerializer())
+
+
+def new_run_id() -> str:
+    # The suffix keeps runs started in the same second from sharing a checkpoint thread.
+    return f"{time.strftime('run_%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def run_config(run_id: str) -> dict:
+    """Graph config that ties checkpoints to `run_id`."""
+    return {"configurable": {"thread_id": run_id}}
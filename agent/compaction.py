@@ -0,0 +1,170 @@
+# agent/compaction.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from config import config
+from utils.tokens import estimate_message_tokens
+
+# Tools whose output is a view of one file region; only the newest identical view is kept.
+# Every argument that changes the region is part of the key.
+FILE_READ_TOOLS = {
+    "read_header": ("path", "line_count"),
+    "read_range": ("path", "start_line", "end_line"),
+    "read_around": ("path", "line", "context"),
+}
+
+
+def _tool_calls_by_id(messages: Sequence[BaseMessage]) -> Dict[str, dict]:
+    calls = {}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            for call in message.tool_calls or []:
+                calls[call["id"]] = call
+    return calls
+
+
+def _digest(content: str, tool_name: str) -> str:
+    """Short stand-in for a large tool output: its head, plus the tail for script runs."""
+    lines = content.splitlines()
+    keep_head, keep_tail = config.COMPACTION_DIGEST_LINES, 0
+    if tool_name == "run_python_script":
+        # Tracebacks end with the exception, so the tail is the useful part.
+        keep_tail = config.COMPACTION_DIGEST_LINES
+    if len(lines) <= keep_head + keep_tail:
+        return content
+    elided = len(lines) - keep_head - keep_tail
+    parts = lines[:keep_head] + [f"... [{elided} lines elided by compaction]"]
+    if keep_tail:
+        parts += lines[-keep_tail:]
+    return "\n".join(parts)
+
+
+def _memo_reference(message: BaseMessage) -> Optional[str]:
+    """tool_call_id of the earlier result a memoized "unchanged since call #N" answer points at."""
+    artifact = getattr(message, "artifact", None) if isinstance(message, ToolMessage) else None
+    memo = artifact.get("memo") if isinstance(artifact, dict) else None
+    return memo.get("same_as_id") if isinstance(memo, dict) else None
+
+
+def _referenced_results(messages: Sequence[BaseMessage]) -> set:
+    return {ref for ref in map(_memo_reference, messages) if ref}
+
+
+def _restore_references(compacted: List[BaseMessage], original: Sequence[BaseMessage]) -> int:
+    """Put the full output back into references whose target is no longer sent verbatim."""
+    full = {m.tool_call_id: m.content for m in original if isinstance(m, ToolMessage) and not _memo_reference(m)}
+    kept = {m.tool_call_id for m in compacted
+            if isinstance(m, ToolMessage) and m.content == full.get(m.tool_call_id)}
+    restored = 0
+    for i, message in enumerate(compacted):
+        ref = _memo_reference(message)
+        if ref and ref not in kept and ref in full:
+            compacted[i] = message.model_copy(update={"content": full[ref]})
+            kept.add(message.tool_call_id)
+            restored += 1
+    return restored
+
+
+def _drop_stale_reads(messages: List[BaseMessage], calls: Dict[str, dict]) -> int:
+    seen_paths = set()
+    replaced = 0
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        # A memo reference is not a newer copy; the result it points at has to stay.
+        if not isinstance(message, ToolMessage) or _memo_reference(message):
+            continue
+        call = calls.get(message.tool_call_id)
+        if call is None or call["name"] not in FILE_READ_TOOLS:
+            continue
+        key = (call["name"], *(call["args"].get(arg) for arg in FILE_READ_TOOLS[call["name"]]))
+        if key in seen_paths:
+            messages[i] = message.model_copy(update={
+                "content": f"[Superseded: a newer read of {call['args'].get('path')} appears later in the conversation.]"
+            })
+            replaced += 1
+        else:
+            seen_paths.add(key)
+    return replaced
+
+
+def _digest_old_outputs(messages: List[BaseMessage], calls: Dict[str, dict]) -> int:
+    replaced = 0
+    referenced = _referenced_results(messages)
+    for i, message in enumerate(messages[:-config.COMPACTION_KEEP_RECENT or None]):
+        if not isinstance(message, ToolMessage) or len(message.content) <= config.COMPACTION_DIGEST_CHARS:
+            continue
+        if message.tool_call_id in referenced:
+            continue
+        call = calls.get(message.tool_call_id, {})
+        digest = _digest(message.content, call.get("name", ""))
+        if digest != message.content:
+            messages[i] = message.model_copy(update={"content": digest})
+            replaced += 1
+    return replaced
+
+
+def _summarize_segment(phase: str, segment: Sequence[BaseMessage], calls: Dict[str, dict]) -> HumanMessage:
+    lines = [f"[Summary of completed phase '{phase}']"]
+    for message in segment:
+        if isinstance(message, ToolMessage):
+            call = calls.get(message.tool_call_id, {})
+            first_line = message.content.strip().splitlines()[0] if message.content.strip() else ""
+            args = str(call.get("args", {}))[:160]
+            lines.append(f"- {call.get('name', message.name)}({args}) -> {first_line[:160]}")
+        elif isinstance(message, AIMessage) and message.content and not message.tool_calls:
+            lines.append(f"- Conclusion: {str(message.content)[:config.COMPACTION_SUMMARY_CHARS]}")
+    return HumanMessage(content="\n".join(lines))
+
+
+def _summarize_finished_phases(messages: List[BaseMessage], phase_log: List[dict],
+                               calls: Dict[str, dict]) -> Tuple[List[BaseMessage], int]:
+    """Collapse every phase except the current one into a single summary message."""
+    if len(phase_log) < 2:
+        return messages, 0
+    boundaries = [entry["start"] for entry in phase_log] + [len(messages)]
+    current_start = phase_log[-1]["start"]
+    result = list(messages[:boundaries[0]])
+    summarized = 0
+    for entry, end in zip(phase_log[:-1], boundaries[1:-1]):
+        segment = messages[entry["start"]:end]
+        if not segment:
+            continue
+        summary = _summarize_segment(entry["phase"], segment, calls)
+        if estimate_message_tokens([summary]) < estimate_message_tokens(segment):
+            result.append(summary)
+            summarized += 1
+        else:
+            result.extend(segment)
+    result.extend(messages[current_start:])
+    return result, summarized
+
+
+def compact_messages(messages: Sequence[BaseMessage], phase_log: Optional[List[dict]] = None,
+                     budget: Optional[int] = None) -> Tuple[List[BaseMessage], dict]:
+    """Return a smaller copy of the history to send to the model, plus a report.
+
+    The state itself is never modified; compaction only shapes the next request.
+    Stale file reads are always replaced. Larger steps only run while the estimate
+    is over `budget`: first old tool outputs become digests, then finished phases
+    are summarized. Tool calls and their results are always kept in pairs, and a
+    memoized "unchanged since call #N" answer either has its target result in the
+    request or gets that result's full text back.
+    """
+    budget = budget or config.COMPACTION_TOKEN_BUDGET
+    compacted = list(messages)
+    calls = _tool_calls_by_id(compacted)
+    raw_tokens = estimate_message_tokens(compacted)
+
+    report = {"raw_tokens": raw_tokens, "stale_reads": _drop_stale_reads(compacted, calls),
+              "digested": 0, "phases_summarized": 0}
+
+    if estimate_message_tokens(compacted) > budget:
+        report["digested"] = _digest_old_outputs(compacted, calls)
+    if estimate_message_tokens(compacted) > budget and phase_log:
+        compacted, report["phases_summarized"] = _summarize_finished_phases(compacted, phase_log, calls)
+    report["memo_restored"] = _restore_references(compacted, messages)
+
+    report["sent_tokens"] = estimate_message_tokens(compacted)
+    report["messages"] = len(compacted)
+    return compacted, report
@@ -0,0 +1,257 @@
+# agent/daemon.py
+"""Long-lived healing server on a Unix socket, and the thin client that talks to it.
+
+Protocol: one JSON object per line in each direction. Requests are
+    {"op": "submit", "job": {"project_root": ..., "task": ...}, "wait": true}
+    {"op": "status", "job_id": "..."}
+    {"op": "metrics"}
+    {"op": "shutdown"}
+and every response carries "ok". A submit for a project root that already has a
+job queued or running is rejected. A submit with "wait" answers once the job has
+finished, with the same result record batch mode writes; without it the
+response is just the job id, to be polled with "status".
+
+The server keeps the compiled graph, the model client (and its HTTP connection
+pool), the rate limiter, the response cache and the per-sandbox file indexes
+and import graphs alive across jobs, so a job pays only for its own work.
+"""
+import asyncio
+import json
+import os
+import socket
+import time
+from typing import Optional
+
+from config import config
+
+# The agent stack is imported inside the server methods only, so the client side of
+# this module stays as cheap to import as the standard library.
+
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+# ---- server ----------------------------------------------------------
+
+
+class HealingDaemon:
+    """Job queue in front of `run_job`, with at most `concurrency` jobs running at a time."""
+
+    def __init__(self, socket_path: str = None, concurrency: int = None):
+        self.socket_path = os.path.abspath(socket_path or config.DAEMON_SOCKET)
+        self.concurrency = concurrency or config.DAEMON_CONCURRENCY
+        self.jobs = {}
+        self.started = time.time()
+        self._next_id = 0
+        self._counts = {"submitted": 0, "rejected": 0, "success": 0, "failed": 0, "error": 0}
+        self._wall_times = []
+
+    # ---- jobs --------------------------------------------------------
+
+    def _submit(self, job: dict):
+        from agent.batch import DEFAULT_TASK
+
+        if not isinstance(job, dict) or not job.get("project_root"):
+            raise DaemonError("job needs a 'project_root'")
+        if not os.path.isdir(job["project_root"]):
+            raise DaemonError(f"project_root {job['project_root']} is not a directory")
+        if self._queue.qsize() >= config.DAEMON_MAX_QUEUE:
+            self._counts["rejected"] += 1
+            raise DaemonError(f"queue is full ({config.DAEMON_MAX_QUEUE} jobs waiting)")
+
+        self._next_id += 1
+        job = {
+            "id": str(job.get("id") or self._next_id),
+            "project_root": os.path.abspath(job["project_root"]),
+            "task": job.get("task") or DEFAULT_TASK,
+        }
+        if job["id"] in self.jobs and self.jobs[job["id"]]["state"] != "done":
+            raise DaemonError(f"job {job['id']} is already queued or running")
+        # Two jobs on one tree would edit, run and roll back each other's files.
+        busy = next((r for r in self.jobs.values()
+                     if r["project_root"] == job["project_root"] and r["state"] != "done"), None)
+        if busy is not None:
+            self._counts["rejected"] += 1
+            raise DaemonError(f"job {busy['id']} for {job['project_root']} is already queued or running")
+        record = {"id": job["id"], "project_root": job["project_root"], "state": "queued",
+                  "submitted": time.time(), "result": None, "done": asyncio.Event()}
+        self.jobs[job["id"]] = record
+        self._prune()
+        self._counts["submitted"] += 1
+        self._queue.put_nowait(job)
+        return record
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond DAEMON_KEEP_RESULTS."""
+        finished = [job_id for job_id, r in self.jobs.items() if r["state"] == "done"]
+        for job_id in finished[:max(0, len(finished) - config.DAEMON_KEEP_RESULTS)]:
+            del self.jobs[job_id]
+
+    async def _worker(self):
+        from agent.batch import run_job
+        from utils.logger import logger
+
+        while True:
+            job = await self._queue.get()
+            record = self.jobs.get(job["id"])
+            if record is not None:
+                record["state"] = "running"
+                record["started"] = time.time()
+            try:
+                result = await run_job(job)
+            except Exception as e:  # run_job reports failures itself; this is a last resort.
+                result = {"id": job["id"], "status": "error", "error": str(e)}
+            self._counts[result["status"]] += 1
+            if "wall_time_s" in result:
+                self._wall_times = [*self._wall_times[-999:], result["wall_time_s"]]
+            logger.log_step(f"Daemon job {job['id']} finished: {result['status']}")
+            if record is not None:
+                record.update(state="done", result=result, finished=time.time())
+                record["done"].set()
+            self._queue.task_done()
+
+    def metrics(self) -> dict:
+        from agent.rate_limiter import rate_limiter
+        from agent.fix_cache import fix_cache_stats
+        from agent.workflow import llm_cache_stats
+
+        states = [r["state"] for r in self.jobs.values()]
+        walls = sorted(self._wall_times)
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "concurrency": self.concurrency,
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            **self._counts,
+            "wall_time_s_p50": walls[len(walls) // 2] if walls else None,
+            "wall_time_s_max": walls[-1] if walls else None,
+            "rate_limiter": rate_limiter.metrics(),
+            "llm_cache": llm_cache_stats(),
+            "fix_cache": fix_cache_stats(),
+        }
+
+    @staticmethod
+    def _public(record: dict) -> dict:
+        return {k: v for k, v in record.items() if k != "done"}
+
+    # ---- protocol ----------------------------------------------------
+
+    async def _handle(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "submit":
+            record = self._submit(request.get("job"))
+            if request.get("wait", True):
+                await record["done"].wait()
+                return {"ok": True, "job_id": record["id"], "result": record["result"]}
+            return {"ok": True, "job_id": record["id"], "state": record["state"]}
+        if op == "status":
+            record = self.jobs.get(str(request.get("job_id")))
+            if record is None:
+                raise DaemonError(f"unknown job {request.get('job_id')}")
+            return {"ok": True, "job": self._public(record)}
+        if op == "metrics":
+            return {"ok": True, "metrics": self.metrics()}
+        if op == "shutdown":
+            self._stopping.set()
+            return {"ok": True}
+        raise DaemonError(f"unknown op {op!r}")
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise DaemonError("request must be a JSON object")
+                    response = await self._handle(request)
+                except (DaemonError, ValueError) as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        from agent.workflow import get_app, get_llm
+        from utils.logger import logger
+
+        # Pay for the graph and the model client once, before the first job arrives.
+        get_app()
+        get_llm()
+
+        self._queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._serve_connection, path=self.socket_path, limit=_STREAM_LIMIT)
+        os.chmod(self.socket_path, 0o600)
+        logger.log_step(f"Daemon listening on {self.socket_path} (concurrency {self.concurrency})")
+        try:
+            async with server:
+                await self._stopping.wait()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.log_success(f"Daemon stopped: {self.metrics()}")
+
+
+def serve(socket_path: str = None, concurrency: int = None):
+    asyncio.run(HealingDaemon(socket_path, concurrency).serve())
+
+
+# ---- client ----------------------------------------------------------
+
+
+class DaemonClient:
+    """Blocking client for the daemon. Only needs the standard library, so callers
+    (CI hooks, scripts) start instantly."""
+
+    def __init__(self, socket_path: str = None, timeout: Optional[float] = None):
+        self.socket_path = os.path.abspath(socket_path or config.DAEMON_SOCKET)
+        self.timeout = timeout
+
+    def request(self, payload: dict) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                raise DaemonError(f"no daemon listening on {self.socket_path} (start one with: python main.py --serve)")
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+        if not line:
+            raise DaemonError("daemon closed the connection without answering")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "request failed"))
+        return response
+
+    def heal(self, project_root: str, task: str = None, job_id: str = None, wait: bool = True) -> dict:
+        """Heal a project through the daemon. With `wait`, returns the job's result record."""
+        job = {"project_root": project_root, "task": task, "id": job_id}
+        response = self.request({"op": "submit", "job": job, "wait": wait})
+        return response["result"] if wait else {"job_id": response["job_id"], "state": response["state"]}
+
+    def status(self, job_id: str) -> dict:
+        return self.request({"op": "status", "job_id": job_id})["job"]
+
+    def metrics(self) -> dict:
+        return self.request({"op": "metrics"})["metrics"]
+
+    def shutdown(self):
+        self.request({"op": "shutdown"})
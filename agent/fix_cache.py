@@ -0,0 +1,251 @@
+# agent/fix_cache.py
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import config
+from tools import file_index
+from tools.editor_tools import apply_edits, write_file
+from tools.line_index import line_index
+from tools.process_capture import run_captured
+from tools.sandbox import check_path
+from tools.traceback_parser import fault_frame, parse_traceback
+from utils.logger import get_logger
+
+_NUMBER = re.compile(r"(?<![\w.])(0x[0-9a-fA-F]+|\d+(\.\d+)?)(?![\w.])")
+
+
+def _message_template(message: str, base_dir: str) -> str:
+    """Exception message with run-specific parts (sandbox paths, numbers, addresses) masked."""
+    message = message.replace(os.path.abspath(base_dir) + os.sep, "")
+    return _NUMBER.sub("<n>", message.strip())
+
+
+def _code_hash(base_dir: str, frame: dict, radius: int) -> str:
+    """Hash of the code around a frame, ignoring indentation and blank lines."""
+    try:
+        lines = line_index.read_lines(os.path.join(base_dir, frame["path"]),
+                                      frame["line"] - radius, frame["line"] + radius)
+    except OSError:
+        return ""
+    text = "\n".join(line.strip() for line in lines if line.strip())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def error_signature(traceback: dict, base_dir: str) -> Optional[str]:
+    """Normalized identity of a failure: exception type, message template, the sandbox
+    frames (path and function, not line numbers) and a hash of the code at the fault.
+
+    The same bug in another checkout of the same code gets the same signature, even
+    if unrelated lines moved. None when the failure has no sandbox frame.
+    """
+    fault = fault_frame(traceback)
+    if fault is None:
+        return None
+    payload = {
+        "type": traceback.get("exc_type", ""),
+        "message": _message_template(traceback.get("message", ""), base_dir),
+        "frames": [(f["path"], f["function"]) for f in traceback["frames"] if f["in_sandbox"]],
+        "code": _code_hash(base_dir, fault, config.FIX_CACHE_CONTEXT_LINES),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _unique_block(lines: List[str], start: int, end: int):
+    """Grow [start, end) by context lines until its text occurs once in `lines`."""
+    text = "".join(lines)
+    while True:
+        block = "".join(lines[start:end])
+        # Overlapping matches count too, as they do for apply_edits.
+        if block and text.find(block, text.find(block) + 1) == -1:
+            return start, end
+        if start == 0 and end == len(lines):
+            return start, end
+        start, end = max(0, start - 1), min(len(lines), end + 1)
+
+
+def _file_edits(before: str, after: str) -> List[dict]:
+    """`apply_edits` edits that turn `before` into `after`, anchored on unique snippets."""
+    a, b = before.splitlines(keepends=True), after.splitlines(keepends=True)
+    opcodes = difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+    # Widening a hunk may run into the next one; apply_edits needs them disjoint.
+    spans = []
+    for tag, i1, i2, _, _ in opcodes:
+        if tag == "equal":
+            continue
+        s1, s2 = _unique_block(a, i1, i2)
+        if spans and s1 < spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], s2)
+        else:
+            spans.append([s1, s2])
+
+    def to_after(i: int, end: bool) -> int:
+        # Position in `after` of line boundary i of `before`, taking in any insertion there.
+        found = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal" and i1 <= i <= i2:
+                found.append(j1 + i - i1)
+            elif tag != "equal" and i == (i2 if end else i1):
+                found.append(j2 if end else j1)
+        return max(found) if end else min(found)
+
+    return [{"old_text": "".join(a[s1:s2]), "new_text": "".join(b[to_after(s1, False):to_after(s2, True)])}
+            for s1, s2 in spans]
+
+
+def patch_from_snapshot(snapshot, base_dir: str) -> Optional[List[dict]]:
+    """The changes a validated fix attempt made, from its snapshot journal entry."""
+    changes = []
+    for full_path, original in sorted(snapshot.originals.items()):
+        rel = os.path.relpath(full_path, base_dir).replace(os.sep, "/")
+        try:
+            with open(full_path, "r", encoding="utf-8", newline="") as f:
+                current = f.read()
+            before = original.decode("utf-8") if original is not None else None
+        except (OSError, UnicodeDecodeError):
+            # Deleted or binary files are not something a cached patch can replay.
+            return None
+        if before is None:
+            changes.append({"path": rel, "create": current})
+        elif before != current:
+            changes.append({"path": rel, "edits": _file_edits(before, current)})
+    return changes or None
+
+
+def apply_patch(changes: List[dict]) -> Optional[str]:
+    """Apply a cached patch in the current sandbox. Returns an error, or None on success."""
+    for change in changes:
+        if "create" in change:
+            result = write_file(change["path"], change["create"])
+        else:
+            result = apply_edits(change["path"], change["edits"])
+        if not result.startswith("Success"):
+            return result
+    return None
+
+
+def validate_fix(base_dir: str, script: str, script_args: list, timeout: Optional[float] = None) -> Optional[str]:
+    """Run the failing script again. Returns why it still fails, or None if it passes.
+
+    Same bar as a speculative candidate: exits by itself with status 0 and no traceback.
+    """
+    try:
+        run = run_captured([sys.executable, check_path(script), *script_args], base_dir,
+                           timeout or config.FIX_CACHE_TIMEOUT)
+    finally:
+        file_index.mark_stale(base_dir)
+    if run.stopped is None and run.returncode == 0 and parse_traceback(run.stderr, base_dir) is None:
+        return None
+    if run.stopped:
+        return f"stopped ({run.stopped})"
+    return (run.stderr.strip().splitlines() or [f"exit code {run.returncode}"])[-1]
+
+
+class FixCache:
+    """Persistent map from error signature to the patch that passed validation.
+
+    One JSON file per signature; a hit refreshes the file's mtime and the least
+    recently used entries are deleted once the directory grows past `max_bytes`,
+    the same scheme as the model response cache.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "stored": 0, "write_errors": 0, "failed": 0, "evictions": 0}
+
+    def _path(self, signature: str) -> str:
+        return os.path.join(self.cache_dir, signature[:2], f"{signature}.json")
+
+    def get(self, signature: str) -> Optional[dict]:
+        path = self._path(signature)
+        with self._lock:
+            self.stats["lookups"] += 1
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return entry
+
+    def put(self, signature: str, error: str, changes: List[dict]):
+        """Store a validated patch. A failed write is logged and counted, never raised:
+        the heal it comes from has already succeeded."""
+        entry = {"signature": signature, "error": error, "changes": changes, "created": time.time()}
+        path = self._path(signature)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            with self._lock:
+                self.stats["write_errors"] += 1
+            get_logger().log_error(f"Fix cache write failed: {e}")
+            return
+        with self._lock:
+            self.stats["stored"] += 1
+            self._evict()
+
+    def discard(self, signature: str):
+        """Forget a patch that no longer validates."""
+        try:
+            os.remove(self._path(signature))
+        except OSError:
+            pass
+        with self._lock:
+            self.stats["failed"] += 1
+
+    def _evict(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.stats["evictions"] += 1
+
+
+_cache: Optional[FixCache] = None
+
+
+def get_fix_cache() -> Optional[FixCache]:
+    """The process-wide fix cache, or None when it is disabled."""
+    global _cache
+    if _cache is None and config.FIX_CACHE_ENABLED:
+        _cache = FixCache(config.FIX_CACHE_DIR, config.FIX_CACHE_MAX_BYTES)
+    return _cache
+
+
+def fix_cache_stats() -> Dict[str, int]:
+    return dict(_cache.stats) if _cache is not None else {}
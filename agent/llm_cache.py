@@ -0,0 +1,126 @@
+# agent/llm_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional, Sequence
+
+from langchain_core.messages import AIMessage, messages_from_dict, messages_to_dict
+
+from utils.logger import get_logger
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when no recorded response matches the request."""
+
+
+def _canonical_message(message) -> dict:
+    # Message and tool-call ids are random per run, so they are left out of the key.
+    if isinstance(message, dict):
+        return {"role": message.get("role"), "content": message.get("content")}
+    entry = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        entry["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in tool_calls]
+    if message.type == "tool":
+        entry["name"] = message.name
+    return entry
+
+
+def request_key(messages: Sequence, namespace: str) -> str:
+    """Content address of a model request: namespace (model, settings, tool schema) + history."""
+    payload = json.dumps(
+        {"ns": namespace, "messages": [_canonical_message(m) for m in messages]},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk, content-addressed store of model responses with LRU eviction by size.
+
+    Entries are one JSON file each; a hit refreshes the file's mtime, and the least
+    recently used files are deleted once the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, namespace: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "write_errors": 0, "evictions": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, messages: Sequence) -> Optional[AIMessage]:
+        path = self._path(request_key(messages, self.namespace))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                response = messages_from_dict([json.load(f)])[0]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return response
+
+    def put(self, messages: Sequence, response: AIMessage):
+        """Store a response. A failed write (full disk, read-only cache dir) is logged and
+        counted, never raised: the response itself is still good."""
+        path = self._path(request_key(messages, self.namespace))
+        data = json.dumps(messages_to_dict([response])[0], ensure_ascii=False).encode("utf-8")
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            with self._lock:
+                self.stats["write_errors"] += 1
+            get_logger().log_error(f"LLM cache write failed: {e}")
+            return
+        with self._lock:
+            self.stats["writes"] += 1
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _evict(self):
+        # Drop least recently used entries until we are back under 90% of the cap.
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.stats["evictions"] += 1
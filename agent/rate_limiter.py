@@ -0,0 +1,123 @@
+# agent/rate_limiter.py
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+from config import config
+from utils.logger import logger
+
+T = TypeVar("T")
+
+_RETRYABLE_MARKERS = (
+    "429", "resource_exhausted", "resourceexhausted", "rate limit", "ratelimit",
+    "too many requests", "quota", "503", "unavailable", "overloaded",
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Callers reserve capacity and sleep outside the lock."""
+
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens, going into debt if needed. Returns how long to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.per_second
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the real cost is known."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for quota (429) and overload (503) errors from the model client."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in (429, 503):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits shared by every run in the process."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "retries": 0, "wait_s": 0.0, "max_wait_s": 0.0}
+        self._local = threading.local()
+
+    def _record_wait(self, seconds: float, retry: bool = False):
+        self._local.wait_s = self.thread_wait_s() + seconds
+        with self._lock:
+            if retry:
+                self._stats["retries"] += 1
+            elif seconds > 0:
+                self._stats["throttled"] += 1
+            self._stats["wait_s"] += seconds
+            self._stats["max_wait_s"] = max(self._stats["max_wait_s"], seconds)
+
+    def thread_wait_s(self) -> float:
+        """Seconds the calling thread has spent waiting on the limits so far."""
+        return getattr(self._local, "wait_s", 0.0)
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and estimated_tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        self._record_wait(wait)
+        return wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def call(self, fn: Callable[[], T], estimated_tokens: int = 0) -> T:
+        """Run `fn` within the limits, retrying rate-limit errors with jittered exponential backoff."""
+        with self._lock:
+            self._stats["calls"] += 1
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= config.RATE_LIMIT_MAX_RETRIES or not is_rate_limit_error(e):
+                    raise
+                # Full jitter: spreads concurrent runs that hit the limit together.
+                delay = random.uniform(0, min(config.RATE_LIMIT_BACKOFF_MAX, config.RATE_LIMIT_BACKOFF_BASE * 2 ** attempt))
+                logger.log_error(f"Model rate-limited ({type(e).__name__}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                self._record_wait(delay, retry=True)
+                attempt += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_s"] = round(stats["wait_s"], 3)
+        stats["max_wait_s"] = round(stats["max_wait_s"], 3)
+        return stats
+
+
+rate_limiter = RateLimiter(config.RATE_LIMIT_RPM, config.RATE_LIMIT_TPM)
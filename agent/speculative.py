@@ -0,0 +1,197 @@
+# agent/speculative.py
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Iterable, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from config import config
+from tools.editor_tools import apply_edits
+from tools.process_capture import run_captured
+from tools.sandbox import get_base_dir, use_project_root
+from tools.search_engine import IGNORED_DIRS
+from tools.traceback_parser import parse_traceback
+
+_JSON_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def enabled() -> bool:
+    return config.SPECULATIVE_CANDIDATES > 1
+
+
+def parse_candidates(text: str) -> Optional[List[dict]]:
+    """Candidates from the model's propose_fix answer, or None if it is not in the expected shape.
+
+    Expected: {"candidates": [{"description": str, "changes": [{"path": str, "edits": [...]}]}]}
+    where `edits` uses the same format as `apply_edits`.
+    """
+    if not isinstance(text, str):
+        return None
+    match = _JSON_BLOCK.search(text)
+    payload = match.group(1) if match else text[text.find("{"):text.rfind("}") + 1]
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    candidates = data.get("candidates") if isinstance(data, dict) else None
+    if not isinstance(candidates, list):
+        return None
+    valid = []
+    for candidate in candidates[:config.SPECULATIVE_CANDIDATES]:
+        changes = candidate.get("changes") if isinstance(candidate, dict) else None
+        if isinstance(changes, list) and changes and all(
+            isinstance(c, dict) and isinstance(c.get("path"), str) and isinstance(c.get("edits"), list) and c["edits"]
+            for c in changes
+        ):
+            valid.append(candidate)
+    return valid or None
+
+
+def validation_command(messages: Sequence[BaseMessage]) -> tuple:
+    """The script (and args) the model last ran, which is what a candidate has to make pass."""
+    for message in reversed(messages):
+        if isinstance(message, AIMessage):
+            for call in reversed(message.tool_calls or []):
+                if call["name"] == "run_python_script":
+                    return call["args"].get("script_path", "main.py"), list(call["args"].get("script_args") or [])
+    return "main.py", []
+
+
+def clone_tree(src: str, dst: str, copy: Iterable[str] = ()):
+    """Mirror the sandbox into `dst` with hardlinks, leaving out the directories the
+    search engine ignores (VCS data, caches, virtualenvs).
+
+    The editor tools replace files instead of writing them in place, so an edit in
+    the clone never reaches the original. The files in `copy` (sandbox-relative) are
+    copied outright; anything that cannot be linked, e.g. across filesystems, too.
+    """
+    copy = {os.path.normpath(rel) for rel in copy}
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+        rel_dir = os.path.relpath(root, src)
+        target_dir = os.path.join(dst, rel_dir)
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            source, target = os.path.join(root, name), os.path.join(target_dir, name)
+            if os.path.normpath(os.path.join(rel_dir, name)) not in copy:
+                try:
+                    os.link(source, target)
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(source, target)
+
+
+def _apply(candidate: dict) -> Optional[str]:
+    """Apply a candidate inside the current sandbox root. Returns an error, or None on success."""
+    for change in candidate["changes"]:
+        result = apply_edits(change["path"], change["edits"])
+        if not result.startswith("Successfully"):
+            return result
+    return None
+
+
+class _Trial:
+    def __init__(self, index: int, candidate: dict, base_dir: str, script: str, script_args: list,
+                 cancelled: threading.Event):
+        self.index = index
+        self.candidate = candidate
+        self.base_dir = base_dir
+        self.script = script
+        self.script_args = script_args
+        self.cancelled = cancelled
+
+    def run(self) -> dict:
+        result = {"index": self.index, "description": self.candidate.get("description", ""), "passed": False}
+        clone = tempfile.mkdtemp(prefix="spec_")
+        try:
+            clone_tree(self.base_dir, clone, copy=[change["path"] for change in self.candidate["changes"]])
+            with use_project_root(clone):
+                error = _apply(self.candidate)
+            if error:
+                result["error"] = error
+                return result
+            if self.cancelled.is_set():
+                result["error"] = "cancelled: another candidate passed first"
+                return result
+
+            # Killed mid-run once another candidate wins.
+            run = run_captured([sys.executable, self.script, *self.script_args], clone, config.SPECULATIVE_TIMEOUT,
+                               cancel=self.cancelled)
+            if run.stopped == "cancelled":
+                result["error"] = "cancelled: another candidate passed first"
+                return result
+            if run.stopped == "timeout":
+                result["error"] = f"timed out after {config.SPECULATIVE_TIMEOUT}s"
+                return result
+            traceback = parse_traceback(run.stderr, clone) if run.stderr else None
+            result["passed"] = run.stopped is None and run.returncode == 0 and traceback is None
+            if not result["passed"]:
+                if traceback:
+                    result["error"] = f"{traceback['exc_type']}: {traceback['message']}".strip(": ")
+                else:
+                    result["error"] = (run.stderr.strip().splitlines() or [f"exit code {run.returncode}"])[-1]
+            return result
+        finally:
+            shutil.rmtree(clone, ignore_errors=True)
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=config.SPECULATIVE_CANDIDATES, thread_name_prefix="speculate")
+    return _pool
+
+
+def speculate(candidates: List[dict], script: str, script_args: list) -> dict:
+    """Validate every candidate in its own throwaway clone of the sandbox, concurrently.
+
+    The first candidate whose script run passes is applied to the real sandbox and
+    the scripts still running for the others are killed. Returns {"winner": index
+    or None, "results": [...], "applied": apply_edits output for the winner}.
+    """
+    base_dir = get_base_dir()
+    cancelled = threading.Event()
+    trials = [_Trial(i, c, base_dir, script, script_args, cancelled) for i, c in enumerate(candidates, 1)]
+    futures = [_get_pool().submit(copy_context().run, trial.run) for trial in trials]
+
+    results, winner = [], None
+    for future in as_completed(futures):
+        result = future.result()
+        results.append(result)
+        if result["passed"] and winner is None:
+            winner = result["index"]
+            cancelled.set()
+            break
+
+    outcome = {"winner": winner, "results": sorted(results, key=lambda r: r["index"]), "applied": []}
+    if winner is not None:
+        for change in candidates[winner - 1]["changes"]:
+            outcome["applied"].append(apply_edits(change["path"], change["edits"]))
+    return outcome
+
+
+def outcome_note(outcome: dict, total: int) -> str:
+    lines = []
+    for result in outcome["results"]:
+        status = "PASSED" if result["passed"] else f"failed: {result.get('error', '')[:300]}"
+        lines.append(f"- Candidate {result['index']} ({result['description'][:120]}): {status}")
+    if outcome["winner"] is not None:
+        return (
+            f"[Speculative] Candidate {outcome['winner']} of {total} passed in an isolated copy of the project "
+            "and has been applied to the real sandbox.\n" + "\n".join(lines) + "\n\n" + "\n".join(outcome["applied"])
+        )
+    return (
+        f"[Speculative] None of the {total} candidates passed in isolated copies; the real sandbox is unchanged.\n"
+        + "\n".join(lines) + "\nPropose new candidates that address these failures."
+    )
@@ -0,0 +1,175 @@
+# agent/tool_scheduler.py
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, List, NamedTuple, Sequence, Set
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool, tool as as_tool
+
+from agent import budget
+from config import config
+from tools import tool_memo
+from utils.logger import logger
+from utils.tracing import span
+
+# Tools that only observe the sandbox and can run side by side.
+READ_ONLY_TOOLS = {"list_files", "find_file", "grep_text", "read_header", "read_range", "read_around", "static_check"}
+# Tools that write the file named by their `path` argument.
+MUTATING_TOOLS = {"write_file", "patch_file", "insert_line", "apply_edits"}
+# Script runs read the whole tree but are independent of each other.
+WHOLE_TREE_READERS = {"run_python_script"}
+
+WHOLE_TREE = "."
+
+
+class Footprint(NamedTuple):
+    reads: Set[str]
+    writes: Set[str]
+
+
+def _norm(path) -> str:
+    return os.path.normpath(str(path or WHOLE_TREE)).replace(os.sep, "/")
+
+
+def footprint(call: dict) -> Footprint:
+    """Which sandbox paths a tool call reads and writes."""
+    name, args = call["name"], call.get("args", {})
+    if name in READ_ONLY_TOOLS:
+        return Footprint({_norm(args.get("path"))}, set())
+    if name in MUTATING_TOOLS:
+        return Footprint(set(), {_norm(args.get("path"))})
+    if name in WHOLE_TREE_READERS:
+        return Footprint({WHOLE_TREE}, set())
+    # Unknown tools are treated as barriers.
+    return Footprint(set(), {WHOLE_TREE})
+
+
+def _overlaps(a: str, b: str) -> bool:
+    return (a == WHOLE_TREE or b == WHOLE_TREE or a == b
+            or a.startswith(b + "/") or b.startswith(a + "/"))
+
+
+def _conflicts(a: Footprint, b: Footprint) -> bool:
+    return any(_overlaps(w, p) for w in a.writes for p in b.reads | b.writes) or \
+        any(_overlaps(w, p) for w in b.writes for p in a.reads)
+
+
+def schedule(calls: Sequence[dict]) -> List[List[int]]:
+    """Group call indexes into waves. Calls within a wave are independent of each other.
+
+    A call goes one wave after the latest earlier call it conflicts with, so writes
+    to the same path (and reads of a path after a write to it) keep their order.
+    """
+    prints = [footprint(call) for call in calls]
+    levels: List[int] = []
+    for i, fp in enumerate(prints):
+        deps = [levels[j] for j in range(i) if _conflicts(fp, prints[j])]
+        levels.append(max(deps) + 1 if deps else 0)
+    waves: Dict[int, List[int]] = {}
+    for i, level in enumerate(levels):
+        waves.setdefault(level, []).append(i)
+    return [waves[level] for level in sorted(waves)]
+
+
+class ToolScheduler:
+    """Graph node that executes the tool calls of the last model turn.
+
+    Drop-in replacement for `ToolNode(tools)`: independent calls run concurrently
+    on a thread pool, conflicting ones run in their original order, and the
+    resulting ToolMessages are always returned in the order the model asked.
+    """
+
+    def __init__(self, tools: Sequence, max_workers: int = None):
+        self.tools_by_name: Dict[str, BaseTool] = {}
+        for t in tools:
+            t = t if isinstance(t, BaseTool) else as_tool(t)
+            self.tools_by_name[t.name] = t
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or config.TOOL_MAX_WORKERS,
+                                        thread_name_prefix="tool")
+
+    def _run_one(self, call: dict, call_no: int = 0, seen: Dict[str, dict] = None) -> ToolMessage:
+        args = call.get("args", {})
+        with span(call["name"], "tool", bytes_in=len(json.dumps(args, default=str))) as s:
+            memo = self._memo(call, args, call_no, seen)
+            if memo is not None and "same_as_id" in memo:
+                message = ToolMessage(content=tool_memo.stub_content(call["name"], args, memo["same_as"]),
+                                      name=call["name"], tool_call_id=call["id"], artifact={"memo": memo})
+            else:
+                message = self._invoke(call, args)
+                if memo is not None and message.status != "error":
+                    message.artifact = {"memo": memo}
+            s.set(bytes_out=len(message.content), status=message.status,
+                  memo_hit=memo is not None and "same_as_id" in memo)
+        logger.log_observation(message.content, call["name"])
+        return message
+
+    @staticmethod
+    def _memo(call: dict, args: dict, call_no: int, seen: Dict[str, dict]):
+        """Memo record for an explorer call, pointing at an identical earlier result if there is one."""
+        if seen is None or not config.TOOL_MEMO_ENABLED:
+            return None
+        fp = tool_memo.fingerprint(call["name"], args)
+        if fp is None:
+            return None
+        key = tool_memo.memo_key(call["name"], args)
+        memo = {"key": key, "fp": fp, "call": call_no}
+        previous = seen.get(key)
+        if previous is not None and previous["fp"] == fp:
+            memo.update(same_as=previous["call"], same_as_id=previous["id"])
+        return memo
+
+    def _invoke(self, call: dict, args: dict) -> ToolMessage:
+        tool = self.tools_by_name.get(call["name"])
+        if tool is None:
+            content = f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools_by_name)}]."
+            return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+        try:
+            content = tool.invoke(args)
+        except Exception as e:
+            return ToolMessage(content=f"Error: {e!r}\n Please fix your mistakes.", name=call["name"],
+                               tool_call_id=call["id"], status="error")
+        return ToolMessage(content=str(content), name=call["name"], tool_call_id=call["id"])
+
+    def run_calls(self, calls: Sequence[dict], history: Sequence = None) -> List[ToolMessage]:
+        """Run one turn of calls. With the run's `history`, explorer calls whose result
+        cannot have changed since an earlier identical call are answered with a reference."""
+        seen = _memo_index(history) if history is not None else None
+        first_no = sum(isinstance(m, ToolMessage) for m in history or ()) + 1
+        results: List[ToolMessage] = [None] * len(calls)
+        for wave in schedule(calls):
+            if len(wave) == 1:
+                results[wave[0]] = self._run_one(calls[wave[0]], first_no + wave[0], seen)
+                continue
+            # Each task gets its own copy of the context so the per-job sandbox root follows it.
+            futures = {i: self._pool.submit(copy_context().run, self._run_one, calls[i], first_no + i, seen)
+                       for i in wave}
+            for i, future in futures.items():
+                results[i] = future.result()
+        return results
+
+    def __call__(self, state) -> dict:
+        last_message = state["messages"][-1]
+        if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
+            return {"messages": []}
+        started = time.perf_counter()
+        results = self.run_calls(last_message.tool_calls, state["messages"])
+        elapsed = time.perf_counter() - started
+        return {
+            "messages": results,
+            "budget": budget.charge(state.get("budget"), state.get("phase", "analyze_error"),
+                                    wall_s=elapsed, tool_s=elapsed),
+        }
+
+
+def _memo_index(history: Sequence) -> Dict[str, dict]:
+    """Latest full (non-reference) result of each memoized call in the run so far."""
+    seen = {}
+    for message in history:
+        artifact = message.artifact if isinstance(message, ToolMessage) else None
+        memo = artifact.get("memo") if isinstance(artifact, dict) else None
+        if isinstance(memo, dict) and "same_as_id" not in memo:
+            seen[memo["key"]] = {"fp": memo["fp"], "call": memo["call"], "id": message.tool_call_id}
+    return seen
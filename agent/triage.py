@@ -0,0 +1,114 @@
+# agent/triage.py
+import os
+import re
+from typing import Optional, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+
+from config import config
+from tools.import_graph import get_graph
+from tools.line_index import line_index
+from tools.sandbox import get_base_dir
+from tools.traceback_parser import extract_structured, fault_frame
+
+# Phases whose whole job is to find the failing file and line.
+TRIAGE_PHASES = {"analyze_error", "locate_code"}
+
+
+def latest_script_traceback(messages: Sequence[BaseMessage]) -> Optional[dict]:
+    """Structured traceback from a `run_python_script` result in the last tool turn, if any."""
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        if message.name == "run_python_script":
+            traceback = extract_structured(str(message.content))
+            if traceback:
+                return traceback
+    return None
+
+
+def code_windows(rel_path: str, marked_lines: Sequence[int], radius: int) -> str:
+    """Numbered source around each marked line of a file; overlapping windows are merged."""
+    full_path = os.path.join(get_base_dir(), rel_path)
+    try:
+        total = line_index.line_count(full_path)
+    except OSError:
+        return f"--- {rel_path}: unreadable ---"
+
+    ranges = []
+    for line in sorted(set(marked_lines)):
+        start, end = max(1, line - radius), min(total, line + radius)
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    blocks = []
+    for start, end in ranges:
+        lines = line_index.read_lines(full_path, start, end)
+        body = "\n".join(f"{'>' if n in marked_lines else ' '}{n:5d} | {text}" for n, text in enumerate(lines, start))
+        blocks.append(f"--- {rel_path} (lines {start}-{end}) ---\n{body}")
+    return "\n\n".join(blocks)
+
+
+_QUOTED_NAME = re.compile(r"'([A-Za-z_][\w.]*)'")
+
+
+def structure_hints(traceback: dict, fault: dict) -> str:
+    """Import path from the entry script to the fault file, and where the names quoted
+    in the error message are defined elsewhere in the sandbox."""
+    graph = get_graph(get_base_dir())
+    hints = []
+    sandbox_frames = [f for f in traceback["frames"] if f["in_sandbox"]]
+    entry = sandbox_frames[0]["path"] if sandbox_frames else None
+    if entry and entry != fault["path"]:
+        chain = graph.import_chain(entry, fault["path"])
+        if chain:
+            hints.append("Import path: " + " -> ".join(chain))
+
+    definitions = []
+    for name in dict.fromkeys(_QUOTED_NAME.findall(traceback["message"])):
+        for path, line in graph.find_symbol(name.rsplit(".", 1)[-1])[:5]:
+            definitions.append(f"  {name}: {path}:{line}")
+    if definitions:
+        hints.append("Definitions of names in the error:\n" + "\n".join(definitions))
+    return "\n".join(hints)
+
+
+def triage(messages: Sequence[BaseMessage]) -> Optional[dict]:
+    """Turn the last script failure into state updates and the code the model needs.
+
+    Returns None when there is no fresh traceback. `jump` is True when the fault
+    location is unambiguous (a sandbox frame that still exists on disk), in which
+    case analyze_error and locate_code can be skipped.
+    """
+    traceback = latest_script_traceback(messages)
+    if traceback is None:
+        return None
+
+    error = f"{traceback['exc_type']}: {traceback['message']}".strip(": ")
+    fault = fault_frame(traceback)
+    if fault is None or not os.path.isfile(os.path.join(get_base_dir(), fault["path"])):
+        return {"traceback": traceback, "last_error": error, "jump": False}
+
+    lines_by_path = {}
+    for frame in reversed(traceback["frames"]):
+        if frame["in_sandbox"]:
+            lines_by_path.setdefault(frame["path"], []).append(frame["line"])
+    windows = [code_windows(path, lines, config.TRIAGE_CONTEXT_LINES) for path, lines in lines_by_path.items()]
+    hints = structure_hints(traceback, fault)
+
+    note = HumanMessage(content=(
+        f"[Auto-triage] The script failed with {error}\n"
+        f"Fault location: {fault['path']}:{fault['line']} in {fault['function'] or '<module>'}\n"
+        + (hints + "\n" if hints else "") +
+        "The analyze_error and locate_code phases were completed automatically from the traceback. "
+        "Relevant code (innermost frame first):\n\n" + "\n\n".join(windows)
+    ))
+    return {
+        "traceback": traceback,
+        "last_error": error,
+        "current_file": fault["path"],
+        "jump": True,
+        "message": note,
+    }
@@ -1,28 +1,279 @@
+import json
+import os
+import shutil
+import tempfile
+import time
 from typing import Literal
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
+from langchain_core.messages import AIMessage, HumanMessage
 
 from state import AgentState, AgentPhase
 from config import config
 from utils.logger import logger
-from tools.explorer_tools import list_files, find_file, grep_text, read_header
-from tools.editor_tools import write_file, patch_file, insert_line
+from tools.explorer_tools import list_files, find_file, grep_text, read_header, read_range, read_around
+from tools.editor_tools import write_file, patch_file, insert_line, apply_edits, rollback_snapshot
 from tools.executor_tools import run_python_script
-from agent.prompts import PHASE_SYSTEM_PROMPTS
-import time
+from tools.static_check import format_findings, introduced_findings, static_check
+from tools.sandbox import get_base_dir, use_project_root
+from tools.snapshot import journal
+from tools.import_graph import get_graph
+from tools.traceback_parser import fault_frame
+from agent.prompts import PHASE_SYSTEM_PROMPTS, SPECULATIVE_PROPOSE_PROMPT
+from agent import budget, fix_cache, speculative
+from agent.compaction import compact_messages
+from agent.tool_scheduler import ToolScheduler
+from agent.triage import TRIAGE_PHASES, latest_script_traceback, triage
+from agent.llm_cache import CacheMissError, ResponseCache
+from agent.rate_limiter import rate_limiter
+from utils.tokens import estimate_message_tokens
+from utils.tracing import enter_phase, span
 
 tools = [
-    list_files, find_file, grep_text, read_header,
-    write_file, patch_file, insert_line,
-    run_python_script
+    list_files, find_file, grep_text, read_header, read_range, read_around,
+    write_file, patch_file, insert_line, apply_edits,
+    static_check, run_python_script
 ]
 
-llm = ChatGoogleGenerativeAI(
-    model=config.MODEL_NAME,
-    temperature=config.TEMPERATURE,
-    google_api_key=config.GOOGLE_API_KEY
-).bind_tools(tools)
+
+def _tool_schema_signature() -> str:
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return json.dumps([convert_to_openai_tool(t) for t in tools], sort_keys=True)
+
+
+# The model client, response cache and compiled graph are built on first use, so
+# importing this module (or anything that only needs a tool) does not pay for the
+# Gemini client or LangGraph.
+_UNSET = object()
+_llm = _UNSET
+_response_cache = _UNSET
+_workflow = None
+_app = None
+
+
+def get_llm():
+    """The chat model with the tools bound. None in replay mode, where every response
+    must come from the cache, so no client (and no network access) is needed at all."""
+    global _llm
+    if _llm is _UNSET:
+        if config.LLM_CACHE_MODE == "replay":
+            _llm = None
+        else:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            _llm = ChatGoogleGenerativeAI(
+                model=config.MODEL_NAME,
+                temperature=config.TEMPERATURE,
+                google_api_key=config.GOOGLE_API_KEY
+            ).bind_tools(tools)
+    return _llm
+
+
+def set_llm(model):
+    """Swap the chat model, e.g. for an offline stand-in in benchmarks. `model` must
+    already have the tools bound and expose `invoke(messages)`."""
+    global _llm
+    _llm = model
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is _UNSET:
+        _response_cache = None if config.LLM_CACHE_MODE == "off" else ResponseCache(
+            config.LLM_CACHE_DIR,
+            namespace=f"{config.MODEL_NAME}|{config.TEMPERATURE}|{_tool_schema_signature()}",
+            max_bytes=config.LLM_CACHE_MAX_BYTES,
+        )
+    return _response_cache
+
+
+def validation_targets_note() -> str:
+    """Entry points and tests that import (directly or not) a file edited in this fix attempt."""
+    root = get_base_dir()
+    snapshot = journal.active(root)
+    if snapshot is None or not snapshot.originals:
+        return ""
+    edited = [os.path.relpath(path, root).replace(os.sep, "/") for path in snapshot.originals]
+    targets = get_graph(root).affected_targets(edited)
+    if not targets:
+        return ""
+    return (
+        f"[Validation targets] This fix changed {', '.join(sorted(edited))}. "
+        f"Entry points and tests that depend on it: {', '.join(targets)}. "
+        "Re-run the failing script; the others are re-run automatically before the fix is accepted."
+    )
+
+
+def passed_before(root: str, snapshot, target: str) -> bool:
+    """Whether `target` passes with the files the fix attempt edited as they were before it."""
+    clone = tempfile.mkdtemp(prefix="baseline_")
+    try:
+        speculative.clone_tree(root, clone)
+        for full_path, original in snapshot.originals.items():
+            path = os.path.join(clone, os.path.relpath(full_path, root))
+            # Unlink first: the clone's files are hardlinks to the sandbox's.
+            if os.path.lexists(path):
+                os.remove(path)
+            if original is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(original)
+        with use_project_root(clone):
+            return fix_cache.validate_fix(clone, target, [], config.VALIDATION_TARGET_TIMEOUT) is None
+    finally:
+        shutil.rmtree(clone, ignore_errors=True)
+
+
+def regression_gate(messages) -> str:
+    """Re-run the entry points and tests that depend on the files this fix attempt edited,
+    besides the script the model validated. Returns a note naming the ones that fail now
+    but passed before the attempt, or "" if there are none."""
+    root = get_base_dir()
+    snapshot = journal.active(root)
+    if not config.VALIDATION_MAX_TARGETS or snapshot is None or not snapshot.originals:
+        return ""
+    edited = [os.path.relpath(path, root).replace(os.sep, "/") for path in snapshot.originals]
+    validated = os.path.normpath(speculative.validation_command(messages)[0]).replace(os.sep, "/")
+    targets = [t for t in get_graph(root).affected_targets(edited) if t != validated]
+    regressions = []
+    with span("regression_check", "tool", targets=len(targets)) as s:
+        for target in targets[:config.VALIDATION_MAX_TARGETS]:
+            error = fix_cache.validate_fix(root, target, [], config.VALIDATION_TARGET_TIMEOUT)
+            if error is not None and passed_before(root, snapshot, target):
+                regressions.append(f"{target}: {error}")
+        s.set(regressions=len(regressions))
+    logger.log_metrics("Regression check", {"targets": min(len(targets), config.VALIDATION_MAX_TARGETS),
+                                            "regressions": len(regressions)})
+    if not regressions:
+        return ""
+    return (
+        f"[Regression] Fix attempt #{snapshot.attempt} makes {validated} pass but breaks "
+        f"{len(regressions)} target(s) that passed before it:\n" + "\n".join(f"- {r}" for r in regressions)
+    )
+
+
+def failed_attempt(state, messages) -> bool:
+    """Whether a validation failure is the fix attempt's doing: the original error is
+    still there, or the new one faults in a file the attempt edited. A different error
+    elsewhere means the fix worked and uncovered the next bug, so the edit is kept."""
+    root = get_base_dir()
+    snapshot = journal.active(root)
+    traceback = latest_script_traceback(messages)
+    if snapshot is None or traceback is None:
+        return True
+    if fix_cache.error_signature(traceback, root) == state.get("error_signature"):
+        return True
+    fault = fault_frame(traceback)
+    edited = {os.path.relpath(p, root).replace(os.sep, "/") for p in snapshot.originals}
+    return fault is None or fault["path"].replace(os.sep, "/") in edited
+
+
+def static_gate() -> str:
+    """Roll back a fix attempt that added syntax or undefined-name errors to the files it
+    edited, before the slower script run. Returns the note for the model, or "" if it is clean."""
+    root = get_base_dir()
+    snapshot = journal.active(root)
+    if snapshot is None or not snapshot.originals:
+        return ""
+    with span("static_check", "tool", files=len(snapshot.originals)) as s:
+        findings = introduced_findings(root, snapshot.originals)
+        s.set(findings=len(findings))
+    if not findings:
+        return ""
+    rollback = rollback_snapshot()
+    logger.log_metrics("Static check", {"attempt": snapshot.attempt, "findings": len(findings)})
+    return (
+        f"[Static check] Fix attempt #{rollback['attempt']} was rolled back without running anything: "
+        f"it introduced {len(findings)} static error(s):\n{format_findings(findings)}\n"
+        "Propose a corrected fix."
+    )
+
+
+def llm_cache_stats() -> dict:
+    response_cache = None if _response_cache is _UNSET else _response_cache
+    return dict(response_cache.stats) if response_cache is not None else {}
+
+
+def invoke_llm(formatted_messages):
+    """Call the model through the response cache and the shared rate limiter."""
+    response_cache = get_response_cache()
+    with span("llm", "llm") as s:
+        if response_cache is not None:
+            cached = response_cache.get(formatted_messages)
+            if cached is not None:
+                s.set(cached=True)
+                return cached
+        # Only built on a cache miss, so replayed runs never construct a client.
+        llm = get_llm()
+        if llm is None:
+            raise CacheMissError("Replay mode: no recorded response for this request.")
+
+        estimated_tokens = estimate_message_tokens(formatted_messages)
+        response = rate_limiter.call(lambda: llm.invoke(formatted_messages), estimated_tokens)
+        usage = getattr(response, "usage_metadata", None) or {}
+        rate_limiter.record_usage(estimated_tokens, usage.get("total_tokens"))
+        s.set(cached=False, estimated_tokens=estimated_tokens, prompt_tokens=usage.get("input_tokens"),
+              completion_tokens=usage.get("output_tokens"), tool_calls=len(response.tool_calls))
+
+        if response_cache is not None:
+            response_cache.put(formatted_messages, response)
+        return response
+
+
+def try_cached_fix(state: AgentState, signature: str, messages: list):
+    """Replay the fix cached for `signature` and validate it without the model.
+
+    Returns the closing messages when it passes. Otherwise the edits are rolled
+    back, the stale entry is dropped and None is returned, so the normal loop
+    takes over on an unchanged sandbox.
+    """
+    cache = fix_cache.get_fix_cache()
+    entry = cache.get(signature) if cache is not None else None
+    if entry is None:
+        return None
+    base_dir = get_base_dir()
+    script, script_args = speculative.validation_command(messages)
+    journal.begin(base_dir, state.get("fix_attempt", 0) + 1)
+    with span("fix_cache", "tool", script=script) as s:
+        error = fix_cache.apply_patch(entry["changes"]) or fix_cache.validate_fix(base_dir, script, script_args)
+        s.set(passed=error is None)
+    if error is not None:
+        rollback_snapshot()
+        cache.discard(signature)
+        logger.log_metrics("Fix cache", {"signature": signature[:12], "passed": False, "error": error})
+        return None
+    journal.take(base_dir)
+    changed = ", ".join(change["path"] for change in entry["changes"])
+    logger.log_metrics("Fix cache", {"signature": signature[:12], "passed": True, "files": changed})
+    return [
+        HumanMessage(content=(
+            f"[Fix cache] {entry['error']} was seen before. Its validated fix ({changed}) was re-applied "
+            f"and {script} now runs cleanly."
+        )),
+        AIMessage(content="DONE (fix replayed from the fix cache)"),
+    ]
+
+
+def remember_fix(state: AgentState, snapshot):
+    """Store the edits of the attempt that just passed validation under the error's signature."""
+    cache = fix_cache.get_fix_cache()
+    signature = state.get("error_signature")
+    if cache is None or not signature or snapshot is None:
+        return
+    changes = fix_cache.patch_from_snapshot(snapshot, get_base_dir())
+    if changes:
+        cache.put(signature, state.get("last_error", ""), changes)
+
+
+def build_initial_state(task: str) -> AgentState:
+    return {
+        "messages": [
+            HumanMessage(content=f"Task: {task}")
+        ],
+        "iteration_count": 0,
+        "phase": "analyze_error",
+        "phase_log": [{"phase": "analyze_error", "start": 1}],
+        "token_reports": [],
+        "fix_attempt": 0,
+        "budget": budget.new_budget(),
+    }
 
 
 def get_next_phase_logic(state: AgentState, response) -> AgentPhase:
@@ -33,9 +284,11 @@ def get_next_phase_logic(state: AgentState, response) -> AgentPhase:
 
     if current_phase == "validate":
         if response.content and "DONE" in response.content:
+            enter_phase("done", previous=current_phase)
             return "done"
         else:
             logger.log_error("Validation failed. Rewinding to analyze_error...")
+            enter_phase("analyze_error", previous=current_phase, rewind=True)
             return "analyze_error"
 
     phase_map = {
@@ -48,24 +301,87 @@ def get_next_phase_logic(state: AgentState, response) -> AgentPhase:
     next_p = phase_map.get(current_phase, current_phase)
     if next_p != current_phase:
         logger.log_step(f"--- Phase Transition: {current_phase} -> {next_p} ---")
+        enter_phase(next_p, previous=current_phase)
     return next_p
 
 def call_model(state: AgentState):
-    time.sleep(1)
+    started = time.perf_counter()
+    # Time spent waiting on the shared rate limiter is other runs' load, not this run's work.
+    waited = rate_limiter.thread_wait_s()
+    with span("call_model", "agent", iteration=state["iteration_count"] + 1) as s:
+        updates = _call_model(state)
+        s.set(phase=state.get("phase", "analyze_error"), next_phase=updates["phase"])
+    # Charge the turn to the phase the model actually answered in (auto-triage may have moved it).
+    reports = updates.get("token_reports", [])
+    turn = reports[-1] if len(reports) > len(state.get("token_reports", [])) else {}
+    updates["budget"] = budget.charge(
+        state.get("budget"), turn.get("phase", state.get("phase", "analyze_error")),
+        prompt_tokens=turn.get("prompt_tokens"), completion_tokens=turn.get("completion_tokens"),
+        tool_s=turn.get("validation_s"),
+        wall_s=time.perf_counter() - started - (rate_limiter.thread_wait_s() - waited),
+    )
+    updates["budget"] = budget.degrade_compaction(updates["budget"], updates["phase"], updates["iteration_count"])
+    return updates
 
+def _call_model(state: AgentState):
     phase = state.get("phase", "analyze_error")
-    messages = state.get("messages", [])
+    enter_phase(phase)
+    messages = list(state.get("messages", []))
+    phase_log = list(state.get("phase_log", []))
+    injected = []
+    updates = {}
+
+    if phase in TRIAGE_PHASES:
+        triaged = triage(messages)
+        if triaged:
+            updates["last_error"] = triaged["last_error"]
+            updates["last_traceback"] = triaged["traceback"]
+            signature = fix_cache.error_signature(triaged["traceback"], get_base_dir())
+            if signature:
+                updates["error_signature"] = signature
+                closing = try_cached_fix(state, signature, messages)
+                if closing:
+                    logger.log_step(f"--- Phase Transition: {phase} -> done (fix cache) ---")
+                    enter_phase("done", previous=phase, fix_cache=True)
+                    phase_log.append({"phase": "done", "start": len(messages)})
+                    updates.update({
+                        "messages": closing,
+                        "iteration_count": state["iteration_count"] + 1,
+                        "phase": "done",
+                        "phase_log": phase_log,
+                        "fix_attempt": state.get("fix_attempt", 0) + 1,
+                    })
+                    return updates
+            if triaged["jump"]:
+                # The traceback already names the failing file and line, so skip
+                # straight to proposing a fix with the relevant code attached.
+                logger.log_step(f"--- Phase Transition: {phase} -> propose_fix (auto-triage) ---")
+                enter_phase("propose_fix", previous=phase, auto_triage=True)
+                updates["current_file"] = triaged["current_file"]
+                injected.append(triaged["message"])
+                phase_log.append({"phase": "propose_fix", "start": len(messages)})
+                messages.append(triaged["message"])
+                phase = "propose_fix"
+                state = {**state, "phase": phase}
 
     logger.log_step(f"Agent Phase: {phase}")
 
-    system_prompt = f"{PHASE_SYSTEM_PROMPTS.get(phase, '')}\n\n[IMPORTANT] Current Phase: {phase}"
+    phase_prompt = PHASE_SYSTEM_PROMPTS.get(phase, '')
+    if phase == "propose_fix" and speculative.enabled():
+        phase_prompt = SPECULATIVE_PROPOSE_PROMPT.format(k=config.SPECULATIVE_CANDIDATES)
+    system_prompt = f"{phase_prompt}\n\n[IMPORTANT] Current Phase: {phase}"
     
+    compacted, report = compact_messages(messages, phase_log, budget.compaction_budget(state.get("budget")))
+    report = {"iteration": state["iteration_count"] + 1, "phase": phase, **report}
+    logger.log_metrics("Context", report)
+
     formatted_messages = [
         {"role": "system", "content": system_prompt},
-        *messages
+        *compacted
     ]
 
-    response = llm.invoke(formatted_messages)
+    response = invoke_llm(formatted_messages)
+    usage = getattr(response, "usage_metadata", None) or {}
 
     if response.content:
         logger.log_thought(response.content)
@@ -75,11 +391,82 @@ def call_model(state: AgentState):
 
     next_phase = get_next_phase_logic(state, response)
 
-    updates = {
-        "messages": [response],
+    report["prompt_tokens"] = usage.get("input_tokens")
+    report["completion_tokens"] = usage.get("output_tokens")
+
+    trailing = []
+    if phase == "validate" and next_phase == "done" and budget.assess(state.get("budget"), phase)[0] is None:
+        started = time.perf_counter()
+        regression = regression_gate(messages)
+        report["validation_s"] = round(time.perf_counter() - started, 4)
+        if regression:
+            trailing.append(HumanMessage(content=regression))
+            next_phase = "analyze_error"
+            logger.log_step("--- Phase Transition: validate -> analyze_error (regression) ---")
+            enter_phase(next_phase, previous="validate", regression=True)
+
+    if next_phase == "apply_fix" and phase != "apply_fix":
+        # Snapshot the sandbox so a fix that fails validation can be undone instantly.
+        updates["fix_attempt"] = state.get("fix_attempt", 0) + 1
+        journal.begin(get_base_dir(), updates["fix_attempt"])
+        candidates = speculative.parse_candidates(response.content) if speculative.enabled() else None
+        if candidates:
+            script, script_args = speculative.validation_command(messages)
+            with span("speculate", "tool", candidates=len(candidates)) as s:
+                outcome = speculative.speculate(candidates, script, script_args)
+                s.set(winner=outcome["winner"])
+            logger.log_metrics("Speculative", {"candidates": len(candidates), "winner": outcome["winner"]})
+            trailing.append(HumanMessage(content=speculative.outcome_note(outcome, len(candidates))))
+            if outcome["winner"] is None:
+                journal.take(get_base_dir())
+            # A passing candidate is already applied; otherwise ask for new candidates.
+            next_phase = "validate" if outcome["winner"] is not None else "propose_fix"
+            logger.log_step(f"--- Phase Transition: apply_fix -> {next_phase} (speculative) ---")
+            enter_phase(next_phase, previous="apply_fix", speculative=True)
+    elif phase == "validate" and next_phase == "analyze_error" and not failed_attempt(state, messages):
+        kept = journal.take(get_base_dir())
+        if kept and kept.originals:
+            logger.log_metrics("Rollback", {"attempt": kept.attempt, "kept": len(kept.originals)})
+            trailing.append(HumanMessage(content=(
+                f"[Validation] Fix attempt #{kept.attempt} resolved the original error and was kept; "
+                "the script now fails with a different error. Analyze this new error."
+            )))
+    elif phase == "validate" and next_phase == "analyze_error":
+        rollback = rollback_snapshot()
+        if rollback and (rollback["restored"] or rollback["removed"]):
+            logger.log_metrics("Rollback", rollback)
+            changed = ", ".join(rollback["restored"] + rollback["removed"])
+            trailing.append(HumanMessage(content=(
+                f"[Rollback] Fix attempt #{rollback['attempt']} failed validation and was rolled back: "
+                f"{changed} restored to the state before that attempt. Do not undo it again; "
+                "analyze the error and propose a different fix."
+            )))
+    elif phase == "apply_fix" and next_phase == "validate" and config.STATIC_CHECK_GATE:
+        rejection = static_gate()
+        if rejection:
+            trailing.append(HumanMessage(content=rejection))
+            next_phase = "propose_fix"
+            logger.log_step("--- Phase Transition: apply_fix -> propose_fix (static check) ---")
+            enter_phase(next_phase, previous="apply_fix", static_check=True)
+    elif next_phase == "done":
+        remember_fix({**state, **updates}, journal.take(get_base_dir()))
+
+    if next_phase == "validate" and phase != "validate":
+        note = validation_targets_note()
+        if note:
+            trailing.append(HumanMessage(content=note))
+
+    updates.update({
+        "messages": [*injected, response, *trailing],
         "iteration_count": state["iteration_count"] + 1,
-        "phase": next_phase
-    }
+        "phase": next_phase,
+        "token_reports": [*state.get("token_reports", []), report],
+    })
+
+    if next_phase != phase:
+        # The next phase starts right after the response appended above.
+        phase_log.append({"phase": next_phase, "start": len(messages) + 1})
+    updates["phase_log"] = phase_log
 
     if response.tool_calls:
         for tool in response.tool_calls:
@@ -89,39 +476,115 @@ def call_model(state: AgentState):
     
     return updates
 
-def route_logic(state: AgentState) -> Literal["tools", "agent", "end"]:
+def route_logic(state: AgentState) -> Literal["tools", "agent", "budget", "end"]:
     last_message = state["messages"][-1]
 
     if state["iteration_count"] >= config.MAX_ITERATIONS:
         logger.log_error("Max iterations reached. Force stopping.")
         return "end"
 
-    if last_message.tool_calls:
-        return "tools"
-
     if state.get("phase") == "done":
         logger.log_success("Task accomplished.")
         return "end"
 
-    return "agent"
+    # Pending tool calls are always answered first; route_after_tools then checks the
+    # budget, so a stopped run never ends on a tool call without its result.
+    if getattr(last_message, "tool_calls", None):
+        return "tools"
 
-workflow = StateGraph(AgentState)
+    decision = budget.decide(state.get("budget"), state.get("phase", "analyze_error"))
+    return "budget" if decision else "agent"
 
-workflow.add_node("agent", call_model)
-workflow.add_node("tools", ToolNode(tools))
 
-workflow.set_entry_point("agent")
+def route_after_tools(state: AgentState) -> Literal["agent", "budget"]:
+    # A phase that keeps calling tools is held to its budget as well.
+    return "budget" if budget.decide(state.get("budget"), state.get("phase", "analyze_error")) else "agent"
 
-workflow.add_edge("tools", "agent")
 
-workflow.add_conditional_edges(
-    "agent",
-    route_logic,
-    {
-        "tools": "tools",
-        "agent": "agent",
-        "end": END
-    }
-)
+def enforce_budget(state: AgentState):
+    """Stop the run at a run limit, or skip ahead past a phase once the run is degraded."""
+    phase = state.get("phase", "analyze_error")
+    usage = state["budget"]
+    verdict, reasons = budget.assess(usage, phase)
+    if verdict == "stop":
+        logger.log_error(f"Budget exhausted ({', '.join(reasons)}). Stopping.")
+        enter_phase("failed", previous=phase, budget=True)
+        return {
+            "phase": "failed",
+            "budget": budget.record(usage, "stop", phase, state["iteration_count"], reasons),
+            "messages": [HumanMessage(content=f"[Budget] Run stopped in {phase}: {', '.join(reasons)}.")],
+        }
+
+    target = budget.SKIPS[phase]
+    logger.log_metrics("Budget", {"action": "skip", "phase": phase, "reasons": reasons})
+    logger.log_step(f"--- Phase Transition: {phase} -> {target} (budget) ---")
+    enter_phase(target, previous=phase, budget=True)
+    updates = {"budget": budget.record(usage, "skip", phase, state["iteration_count"], reasons)}
+    if target == "apply_fix":
+        updates["fix_attempt"] = state.get("fix_attempt", 0) + 1
+        journal.begin(get_base_dir(), updates["fix_attempt"])
+    updates.update({
+        "phase": target,
+        "phase_log": [*state.get("phase_log", []), {"phase": target, "start": len(state["messages"])}],
+        "messages": [HumanMessage(content=(
+            f"[Budget] The run is short on budget ({', '.join(reasons)}), so {phase} was cut short. "
+            + ("Apply the most likely fix now." if target == "apply_fix"
+               else "Propose a fix from what you have seen so far.")
+        ))],
+    })
+    return updates
+
+
+def route_after_budget(state: AgentState) -> Literal["agent", "end"]:
+    return "end" if state.get("phase") == "failed" else "agent"
+
+def get_workflow():
+    """The uncompiled graph, for callers that compile it with their own checkpointer."""
+    global _workflow
+    if _workflow is None:
+        from langgraph.graph import StateGraph, END
+
+        workflow = StateGraph(AgentState)
+
+        workflow.add_node("agent", call_model)
+        workflow.add_node("tools", ToolScheduler(tools))
+        workflow.add_node("budget", enforce_budget)
+
+        workflow.set_entry_point("agent")
+
+        workflow.add_conditional_edges("tools", route_after_tools, {"agent": "agent", "budget": "budget"})
+
+        workflow.add_conditional_edges(
+            "agent",
+            route_logic,
+            {
+                "tools": "tools",
+                "agent": "agent",
+                "budget": "budget",
+                "end": END
+            }
+        )
+        workflow.add_conditional_edges("budget", route_after_budget, {"agent": "agent", "end": END})
+        _workflow = workflow
+    return _workflow
+
+
+def get_app():
+    """The graph compiled without a checkpointer, built on first use."""
+    global _app
+    if _app is None:
+        _app = get_workflow().compile()
+    return _app
+
 
-app = workflow.compile()
\ No newline at end of file
+def __getattr__(name):
+    # `from agent.workflow import app` keeps working; the graph is built on that access.
+    if name == "app":
+        return get_app()
+    if name == "workflow":
+        return get_workflow()
+    if name == "llm":
+        return get_llm()
+    if name == "response_cache":
+        return get_response_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
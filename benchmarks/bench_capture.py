@@ -0,0 +1,47 @@
+"""Peak memory of capturing a script's output: subprocess.run vs the bounded streaming capture.
+
+A script writes N MB to stdout. `subprocess.run(capture_output=True)` holds all
+of it in memory; `run_captured` keeps only the head and tail, so its peak should
+stay flat as N grows. The output budget is disabled here so every byte is read.
+
+Usage:
+    python -m benchmarks.bench_capture [--sizes 1,16,64]
+"""
+import argparse
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from config import config
+from tools.process_capture import run_captured
+
+_WRITER = "import sys\nchunk = b'x' * 1023 + b'\\n'\nfor _ in range({n} * 1024):\n    sys.stdout.buffer.write(chunk)\n"
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,16,64", help="Comma-separated output sizes in MB.")
+    args = parser.parse_args()
+    config.EXECUTOR_OUTPUT_BUDGET = 0
+
+    print(f"{'output':>8} {'run() peak':>12} {'run() s':>8} {'bounded peak':>13} {'bounded s':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        cmd = [sys.executable, "-c", _WRITER.format(n=size)]
+        run_peak, run_s = measure(lambda: subprocess.run(cmd, capture_output=True))
+        bounded_peak, bounded_s = measure(lambda: run_captured(cmd, ".", 120))
+        print(f"{size:>6}MB {run_peak / 2**20:>10.1f}MB {run_s:>8.2f} {bounded_peak / 2**20:>11.2f}MB {bounded_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
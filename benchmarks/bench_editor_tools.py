@@ -0,0 +1,63 @@
+"""N small edits to a multi-MB file: N patch_file calls vs. one apply_edits call.
+
+Usage:
+    python -m benchmarks.bench_editor_tools [--mb 4] [--edits 20]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from tools.editor_tools import apply_edits, patch_file
+from tools.sandbox import use_project_root
+
+
+def make_source(path: str, megabytes: float) -> int:
+    lines = []
+    size, i = 0, 0
+    while size < megabytes * 1024 * 1024:
+        line = f"def function_{i}(value):\n    return value * {i} + OFFSET_{i}\n\n"
+        lines.append(line)
+        size += len(line)
+        i += 1
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(lines))
+    return i
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=float, default=4)
+    parser.add_argument("--edits", type=int, default=20)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_edit_")
+    try:
+        target = os.path.join(root, "big.py")
+        n_functions = make_source(target, args.mb)
+        picks = [n_functions * (k + 1) // (args.edits + 1) for k in range(args.edits)]
+        print(f"{os.path.getsize(target) / 1e6:.1f} MB file, {args.edits} edits")
+
+        with use_project_root(root):
+            start = time.perf_counter()
+            for i in picks:
+                result = patch_file("big.py", f"+ OFFSET_{i}\n", f"- OFFSET_{i}\n")
+                assert result.startswith("Successfully"), result
+            patch_time = time.perf_counter() - start
+
+            edits = [{"old_text": f"- OFFSET_{i}\n", "new_text": f"+ OFFSET_{i}\n"} for i in picks]
+            start = time.perf_counter()
+            result = apply_edits("big.py", edits)
+            apply_time = time.perf_counter() - start
+            assert result.startswith("Successfully"), result[:500]
+
+        print(f"{'patch_file x N':<28} {patch_time * 1000:10.1f} ms")
+        print(f"{'apply_edits (one call)':<28} {apply_time * 1000:10.1f} ms")
+        print(f"{'speed-up':<28} {patch_time / apply_time:10.1f} x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare the in-process file index with the subprocess-based explorer path.
+
+Usage:
+    python -m benchmarks.bench_file_index [--files 50000]
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from tools.file_index import FileIndex
+
+WORDS = ["alpha", "beta", "gamma", "delta", "parse", "render", "value", "items", "config", "result"]
+
+
+def build_tree(root: str, n_files: int, files_per_dir: int = 100, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n_files):
+        d = os.path.join(root, f"pkg_{i // files_per_dir // 20}", f"mod_{i // files_per_dir}")
+        os.makedirs(d, exist_ok=True)
+        body = [f"def {rng.choice(WORDS)}_{i}_{j}(x):\n    return x + {j}\n" for j in range(5)]
+        if i % 997 == 0:
+            body.append("def calculate_average(data):\n    return sum(data)\n")
+        with open(os.path.join(d, f"file_{i}.py"), "w") as f:
+            f.write("".join(body))
+
+
+def timed(label: str, fn, repeat: int = 3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=50000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_index_")
+    try:
+        print(f"Building synthetic tree with {args.files} files in {root} ...")
+        build_tree(root, args.files)
+
+        index = FileIndex(root)
+        timed("index: initial build", lambda: index.refresh(force=True), repeat=1)
+
+        def walk():
+            return [os.path.join(r, f) for r, _, fs in os.walk(root) for f in fs]
+
+        timed("list_files: os.walk", walk)
+        timed("list_files: index", lambda: index.list_files(root))
+
+        find_cmd = ["find", root, "-name", "*file_4242*", "-not", "-path", "*/.*"]
+        timed("find_file: find subprocess", lambda: subprocess.run(find_cmd, capture_output=True, text=True))
+        timed("find_file: index", lambda: index.find("*file_4242*", root))
+
+        grep_cmd = ["grep", "-rnI", "--include=*", "calculate_average", root]
+        timed("grep_text: grep subprocess", lambda: subprocess.run(grep_cmd, capture_output=True, text=True))
+        hits, _, _ = timed("grep_text: index", lambda: index.grep("calculate_average", root))
+        print(f"  ({len(hits)} matching lines)")
+
+        target = os.path.join(root, "pkg_0", "mod_0", "file_0.py")
+        with open(target, "a") as f:
+            f.write("\nNEW_SYMBOL = 1\n")
+        timed("incremental update_path", lambda: index.update_path(target))
+        timed("forced stat rescan", lambda: index.refresh(force=True), repeat=1)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare the streaming in-process grep engine with running grep as a subprocess.
+
+A common pattern ("return") matches in nearly every file, so the subprocess has to
+scan the whole tree and the caller throws away everything past the first 50 lines,
+while the engine stops reading as soon as it has 50 matches.
+
+Usage:
+    python -m benchmarks.bench_grep [--files 20000]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+
+from benchmarks.bench_file_index import build_tree, timed
+from config import config
+from tools import search_engine
+from tools.file_index import FileIndex, compile_grep_pattern
+
+
+def grep_subprocess(pattern: str, root: str):
+    cmd = ["grep", "-rnI", pattern, root]
+    lines = subprocess.run(cmd, capture_output=True, text=True).stdout.splitlines()
+    return lines[:config.GREP_MAX_RESULTS], len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=20000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_grep_")
+    try:
+        print(f"Building synthetic tree with {args.files} files in {root} ...")
+        build_tree(root, args.files)
+        index = FileIndex(root)
+        index.refresh(force=True)
+        walked = sorted(os.path.join(r, f) for r, _, fs in os.walk(root) for f in fs)
+
+        for label, pattern in (("common", "return"), ("rare", "calculate_average"), ("absent", "no_such_symbol")):
+            print(f"\npattern '{pattern}' ({label})")
+            lines, total = timed("grep subprocess + truncate", lambda: grep_subprocess(pattern, root))
+            print(f"  ({total} matching lines, {len(lines)} kept)")
+            regex = compile_grep_pattern(pattern)
+            timed("engine over os.walk list", lambda: search_engine.search(regex, walked, config.GREP_MAX_RESULTS))
+            lines, found, stopped = timed("engine + index candidates", lambda: index.grep(pattern, root))
+            print(f"  ({found} matches{', stopped early' if stopped else ''})")
+
+        print("\nwith context=2, max_per_file=1")
+        lines, _, _ = timed("engine + index candidates", lambda: index.grep("return", root, context=2, max_per_file=1))
+        print(f"  ({len(lines)} output lines)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
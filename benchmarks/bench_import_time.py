@@ -0,0 +1,90 @@
+"""Import-time budget for the CLI entry point and the tool modules.
+
+Each target is imported in a fresh interpreter under `-X importtime` and its
+cumulative import time is compared with a budget. Heavy packages that a target
+must not pull in at import (the Gemini client, LangGraph, LangChain for the
+tools) are checked too, since that is how a startup regression usually shows up.
+Exits with status 1 if any target is over budget or imports a forbidden module.
+
+Usage:
+    python -m benchmarks.bench_import_time [--runs 5] [--scale 1.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, NamedTuple, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Target(NamedTuple):
+    name: str
+    modules: Tuple[str, ...]
+    budget_ms: float
+    forbidden: Tuple[str, ...]
+
+
+TARGETS = [
+    Target("cli", ("main",), 200, ("langchain_google_genai", "langgraph", "langchain_core")),
+    Target("tools", ("tools.explorer_tools", "tools.editor_tools", "tools.executor_tools"), 120,
+           ("langchain_google_genai", "langgraph", "langchain_core")),
+    Target("workflow", ("agent.workflow",), 2500, ("langchain_google_genai",)),
+]
+
+
+def import_profile(modules: Tuple[str, ...]) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded while importing `modules`."""
+    env = {**os.environ, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY") or "unused"}
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:   self_us |   cumulative_us |   <indent>module"
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target; the median counts.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. on slow CI machines.")
+    args = parser.parse_args()
+
+    # Modules the bare interpreter already loads (site, .pth hooks) are not the target's doing.
+    startup = set(import_profile(()))
+    failures = []
+    print(f"{'target':<10} {'median ms':>10} {'budget ms':>10}  slowest imports")
+    for target in TARGETS:
+        profiles = [import_profile(target.modules) for _ in range(args.runs)]
+        totals = [sum(p.get(m, 0) for m in target.modules) / 1000 for p in profiles]
+        median = statistics.median(totals)
+        budget = target.budget_ms * args.scale
+
+        last = profiles[-1]
+        top_level = {name: us for name, us in last.items()
+                     if "." not in name and name not in target.modules and name not in startup}
+        slowest = ", ".join(f"{n} {us / 1000:.0f}" for n, us in sorted(top_level.items(), key=lambda x: -x[1])[:3])
+        print(f"{target.name:<10} {median:>10.1f} {budget:>10.0f}  {slowest}")
+
+        if median > budget:
+            failures.append(f"{target.name}: {median:.1f} ms is over the {budget:.0f} ms budget")
+        leaked = sorted(m for m in target.forbidden if m in last)
+        if leaked:
+            failures.append(f"{target.name}: imports {', '.join(leaked)} at import time")
+
+    if failures:
+        print("\nFAILED\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll targets within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Per-run latency of run_python_script with and without the warm interpreter pool.
+
+Usage:
+    python -m benchmarks.bench_interpreter_pool [--runs 20] [--preload asyncio,email.mime.text,decimal]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tools.interpreter_pool import InterpreterPool
+
+
+def make_project(root: str, modules):
+    os.makedirs(os.path.join(root, "utils"))
+    with open(os.path.join(root, "utils", "helpers.py"), "w") as f:
+        f.write("def double(x):\n    return x * 2\n")
+    with open(os.path.join(root, "main.py"), "w") as f:
+        f.write("".join(f"import {m}\n" for m in modules))
+        f.write("from utils.helpers import double\nprint(double(21))\n")
+
+
+def measure(label: str, fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert result.stdout.strip() == "42", result
+    print(f"{label:<24} median {statistics.median(samples):8.1f} ms   min {min(samples):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--preload", default="asyncio,email.mime.text,decimal,json,unittest")
+    args = parser.parse_args()
+    modules = [m for m in args.preload.split(",") if m]
+
+    root = tempfile.mkdtemp(prefix="bench_pool_")
+    try:
+        make_project(root, modules)
+        script = os.path.join(root, "main.py")
+
+        measure("cold subprocess", lambda: subprocess.run(
+            [sys.executable, script], capture_output=True, text=True, timeout=30, cwd=root
+        ), args.runs)
+
+        pool = InterpreterPool(root, modules + ["utils.helpers"])
+        start = time.perf_counter()
+        pool.run(script, [], 30)
+        print(f"{'pool warm-up':<24} {(time.perf_counter() - start) * 1000:8.1f} ms")
+        measure("warm pool", lambda: pool.run(script, [], 30), args.runs)
+
+        helpers = os.path.join(root, "utils", "helpers.py")
+        with open(helpers, "w") as f:
+            f.write("def double(x):\n    return x + x\n")
+        pool.invalidate(helpers)
+        print(f"pool restarted after editing preloaded module: {pool._proc is None}")
+        pool.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
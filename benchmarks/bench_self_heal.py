@@ -0,0 +1,197 @@
+"""End-to-end benchmark of the healing loop over a corpus of seeded buggy projects.
+
+Every case runs through the compiled `app` against a scripted offline model, so
+no API key or network access is needed and runs are repeatable. The JSON report
+(wall time, iterations vs MAX_ITERATIONS, LLM calls, prompt tokens, tool latency
+per phase, success) is meant to be diffed across commits.
+
+The fix cache starts empty in a temporary directory. With --repeat every case is
+healed a second time against it, which measures replaying a known fix.
+
+Usage:
+    python -m benchmarks.bench_self_heal [--cases logic_bug,large_tree] [--large-files 3000]
+                                         [--latency 0.0] [--max-iterations N] [--speculative K]
+                                         [--prompt-budget N] [--repeat] [--output self_heal.json]
+"""
+import os
+import tempfile
+
+# The stand-in model answers instantly and must not be throttled, cached or
+# replayed, and fixes from earlier runs must not leak in; these have to be set
+# before the config is imported.
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ["LLM_CACHE_MODE"] = "off"
+os.environ["FIX_CACHE_DIR"] = tempfile.mkdtemp(prefix="heal_fix_cache_")
+os.environ["RATE_LIMIT_RPM"] = "1000000"
+os.environ["RATE_LIMIT_TPM"] = "1000000000"
+os.environ.setdefault("LOG_CONSOLE", "0")
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from agent import workflow
+from agent.budget import report as budget_report
+from agent.fix_cache import fix_cache_stats
+from benchmarks.heal_corpus import Case, corpus, materialize
+from benchmarks.scripted_model import ScriptedModel
+from config import config
+from tools.sandbox import use_project_root
+from tools.tool_memo import memo_stats
+from utils.tracing import Trace, use_trace
+
+TASK = "Run {entry} and fix the error it reports."
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _entry_passes(root: str, entry: str) -> bool:
+    result = subprocess.run([sys.executable, entry], cwd=root, capture_output=True, timeout=30)
+    return result.returncode == 0
+
+
+def run_case(case: Case, latency: float, repeat: bool = False) -> dict:
+    root = tempfile.mkdtemp(prefix=f"heal_{case.name}_")
+    try:
+        materialize(case, root)
+        model = ScriptedModel(case, latency)
+        workflow.set_llm(model)
+
+        state = workflow.build_initial_state(TASK.format(entry=case.entry))
+        phase = state["phase"]
+        final = {"phase": phase, "iteration_count": 0, "token_reports": [], "budget": state["budget"]}
+        tool_latency = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        tool_messages = []
+
+        trace = Trace(case.name)
+        start = last = time.perf_counter()
+        with use_project_root(root), use_trace(trace):
+            for update in workflow.app.stream(state, stream_mode="updates"):
+                now = time.perf_counter()
+                for node, values in update.items():
+                    if node == "tools":
+                        # Tool calls run in the phase that the agent was in when it made them.
+                        stats = tool_latency[phase]
+                        stats["calls"] += len(values.get("messages", []))
+                        stats["seconds"] += now - last
+                        tool_messages.extend(values.get("messages", []))
+                    elif values:
+                        final.update({k: values[k] for k in final if k in values})
+                        phase = final["phase"]
+                last = now
+        wall = time.perf_counter() - start
+        trace.finish()
+
+        reports = final["token_reports"]
+        return {
+            "case": case.name,
+            "kind": case.kind,
+            "repeat": repeat,
+            "success": final["phase"] == "done" and _entry_passes(root, case.entry),
+            "final_phase": final["phase"],
+            "wall_time_s": round(wall, 4),
+            "iterations": final["iteration_count"],
+            "max_iterations": config.MAX_ITERATIONS,
+            "llm_calls": model.calls,
+            "llm_time_s": round(model.seconds, 4),
+            "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in reports),
+            "completion_tokens": sum(r.get("completion_tokens") or 0 for r in reports),
+            "tool_latency_by_phase": {
+                p: {"calls": s["calls"], "seconds": round(s["seconds"], 4)} for p, s in tool_latency.items()
+            },
+            "time_ms_by_category": {k: v["total_ms"] for k, v in trace.summary()["by_category"].items()},
+            "tool_memo": memo_stats(tool_messages),
+            "budget": budget_report(final["budget"]),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def summarize(results: list) -> dict:
+    succeeded = sum(r["success"] for r in results)
+    return {
+        "cases": len(results),
+        "succeeded": succeeded,
+        "success_rate": round(succeeded / len(results), 4) if results else 0.0,
+        "wall_time_s": round(sum(r["wall_time_s"] for r in results), 4),
+        "mean_iterations": round(sum(r["iterations"] for r in results) / len(results), 2) if results else 0.0,
+        "llm_calls": sum(r["llm_calls"] for r in results),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in results),
+        "tool_time_s": round(sum(s["seconds"] for r in results for s in r["tool_latency_by_phase"].values()), 4),
+        "tool_memo_hits": sum(r["tool_memo"]["hits"] for r in results),
+        "fix_cache": fix_cache_stats(),
+        "budget_actions": sum(len(r["budget"]["actions"]) for r in results),
+        "budget_stops": sum(r["budget"]["stopped"] is not None for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", help="Comma-separated case names (default: all).")
+    parser.add_argument("--large-files", type=int, default=3000, help="Filler modules in the large_tree case.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per model call.")
+    parser.add_argument("--max-iterations", type=int, default=None,
+                        help=f"Override MAX_ITERATIONS (default: {config.MAX_ITERATIONS}).")
+    parser.add_argument("--speculative", type=int, default=None,
+                        help="Candidates per speculative propose_fix (default: SPECULATIVE_CANDIDATES).")
+    parser.add_argument("--prompt-budget", type=int, default=None,
+                        help=f"Override BUDGET_PROMPT_TOKENS per run (default: {config.BUDGET_PROMPT_TOKENS}).")
+    parser.add_argument("--repeat", action="store_true",
+                        help="Heal every case a second time, replaying the fix cached by the first run.")
+    parser.add_argument("--output", default="self_heal.json", help="Where to write the JSON report.")
+    args = parser.parse_args()
+    if args.max_iterations:
+        config.MAX_ITERATIONS = args.max_iterations
+    if args.speculative is not None:
+        config.SPECULATIVE_CANDIDATES = args.speculative
+    if args.prompt_budget is not None:
+        config.BUDGET_PROMPT_TOKENS = args.prompt_budget
+
+    cases = corpus(args.large_files)
+    if args.cases:
+        wanted = set(args.cases.split(","))
+        cases = [c for c in cases if c.name in wanted]
+
+    results = [run_case(case, args.latency) for case in cases]
+    if args.repeat:
+        results += [run_case(case, args.latency, repeat=True) for case in cases]
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "max_iterations": config.MAX_ITERATIONS,
+            "model_latency_s": args.latency,
+            "large_files": args.large_files,
+            "speculative_candidates": config.SPECULATIVE_CANDIDATES,
+            "repeat": args.repeat,
+            "prompt_budget": config.BUDGET_PROMPT_TOKENS,
+        },
+        "summary": summarize(results),
+        "cases": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'case':<22} {'ok':<4} {'wall s':>8} {'iters':>6} {'llm':>5} {'prompt tok':>11}")
+    for r in results:
+        name = f"{r['case']} (repeat)" if r["repeat"] else r["case"]
+        print(f"{name:<22} {'yes' if r['success'] else 'NO':<4} {r['wall_time_s']:>8.3f} "
+              f"{r['iterations']:>6} {r['llm_calls']:>5} {r['prompt_tokens']:>11}")
+    shutil.rmtree(config.FIX_CACHE_DIR, ignore_errors=True)
+    print(f"\nsuccess rate {report['summary']['success_rate']:.0%}; report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Seeded buggy projects for the self-healing benchmark.
+
+Each case is a small project whose entry script fails (or trips an assertion)
+and the edits that fix it. The benchmark's scripted model applies exactly those
+edits, so every run of a case follows the same path through the graph.
+"""
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+
+class Case(NamedTuple):
+    name: str
+    kind: str
+    files: Dict[str, str]
+    # apply_edits calls that fix the bug: [{"path": ..., "edits": [{"old_text", "new_text"}]}]
+    fix: List[dict]
+    # Identifier the model greps for while analyzing the error.
+    symbol: str
+    entry: str = "main.py"
+    # Number of unrelated modules generated around the project.
+    filler: int = 0
+    # Edits the model applies on its first attempt before the real fix (it fails validation).
+    wrong_fix: List[dict] = []
+    # Edits for a second bug that only shows once `fix` is in (applied on the next attempt).
+    follow_up: List[dict] = []
+
+
+def _fix(path: str, old_text: str, new_text: str) -> dict:
+    return {"path": path, "edits": [{"old_text": old_text, "new_text": new_text}]}
+
+
+IMPORT_ERROR = Case(
+    name="import_error",
+    kind="import",
+    symbol="load_config",
+    files={
+        "main.py": (
+            "from settings.loader import load_config\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    print(load_config()[\"name\"])\n"
+        ),
+        "settings/__init__.py": "",
+        "settings/loader.py": (
+            "import jsn\n\n"
+            "DEFAULTS = '{\"name\": \"demo\", \"debug\": false}'\n\n\n"
+            "def load_config():\n"
+            "    return jsn.loads(DEFAULTS)\n"
+        ),
+    },
+    fix=[_fix("settings/loader.py", "import jsn\n", "import json as jsn\n")],
+)
+
+TYPE_ERROR = Case(
+    name="type_error",
+    kind="type",
+    symbol="format_total",
+    files={
+        "main.py": (
+            "from billing.invoice import format_total\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    print(format_total([19, 5, 7]))\n"
+        ),
+        "billing/__init__.py": "",
+        "billing/invoice.py": (
+            "def format_total(prices):\n"
+            "    total = sum(prices)\n"
+            "    return \"Total: \" + total\n"
+        ),
+    },
+    fix=[_fix("billing/invoice.py", "\"Total: \" + total", "\"Total: \" + str(total)")],
+)
+
+LOGIC_BUG = Case(
+    name="logic_bug",
+    kind="logic",
+    symbol="calculate_average",
+    files={
+        "main.py": (
+            "from utils.math_utils import calculate_average\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    result = calculate_average([10, 20, 30, 40])\n"
+            "    assert result == 25, f\"expected 25, got {result}\"\n"
+            "    print(f\"The calculated average is: {result}\")\n"
+        ),
+        "utils/__init__.py": "",
+        "utils/math_utils.py": (
+            "def calculate_average(data):\n"
+            "    total = 0\n"
+            "    for item in data:\n"
+            "        total += item\n"
+            "    return total\n"
+        ),
+    },
+    fix=[_fix("utils/math_utils.py", "    return total\n", "    return total / len(data)\n")],
+)
+
+SYNTAX_ERROR = Case(
+    name="syntax_error",
+    kind="syntax",
+    symbol="greet",
+    files={
+        "main.py": (
+            "def greet(name)\n"
+            "    return f\"Hello, {name}!\"\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    print(greet(\"world\"))\n"
+        ),
+    },
+    fix=[_fix("main.py", "def greet(name)\n", "def greet(name):\n")],
+)
+
+
+# The first attempt gets the off-by-one backwards. The real fix edits the same text,
+# so it only applies cleanly if the failed attempt was rolled back first.
+RETRY_AFTER_BAD_FIX = Case(
+    name="retry_bad_fix",
+    kind="retry",
+    symbol="word_count",
+    files={
+        "main.py": (
+            "from text.stats import word_count\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    count = word_count(\"the quick brown fox\")\n"
+            "    assert count == 4, f\"expected 4, got {count}\"\n"
+            "    print(count)\n"
+        ),
+        "text/__init__.py": "",
+        "text/stats.py": (
+            "def word_count(sentence):\n"
+            "    words = sentence.split(\" \")\n"
+            "    return len(words) - 1\n"
+        ),
+    },
+    wrong_fix=[_fix("text/stats.py", "len(words) - 1", "len(words) + 1")],
+    fix=[_fix("text/stats.py", "len(words) - 1", "len(words)")],
+)
+
+
+# The first attempt swaps one undefined name for another. The static check after
+# apply_fix rejects it, so the script is never run on the broken edit.
+BROKEN_EDIT = Case(
+    name="broken_edit",
+    kind="name",
+    symbol="total",
+    files={
+        "main.py": (
+            "from shop.cart import total\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    print(total([10, 20, 30]))\n"
+        ),
+        "shop/__init__.py": "",
+        "shop/cart.py": (
+            "def total(prices, tax=0.2):\n"
+            "    subtotal = sum(prices)\n"
+            "    return round(subtotal * (1 + taxes), 2)\n"
+        ),
+    },
+    wrong_fix=[_fix("shop/cart.py", "(1 + taxes)", "(1 + tax_rate)")],
+    fix=[_fix("shop/cart.py", "(1 + taxes)", "(1 + tax)")],
+)
+
+
+# Two independent bugs: fixing the first makes the script fail in another file.
+# That fix must be kept, not rolled back, for the second one to be found.
+TWO_BUGS = Case(
+    name="two_bugs",
+    kind="attribute",
+    symbol="header",
+    files={
+        "main.py": (
+            "from report.fmt import header\n"
+            "from report.rows import render_rows\n\n"
+            "if __name__ == \"__main__\":\n"
+            "    print(header(\"sales\"))\n"
+            "    print(render_rows([(\"north\", 12), (\"south\", 7)]))\n"
+        ),
+        "report/__init__.py": "",
+        "report/fmt.py": (
+            "def header(title):\n"
+            "    return title.uppper() + \"\\n\" + \"=\" * len(title)\n"
+        ),
+        "report/rows.py": (
+            "def render_rows(rows):\n"
+            "    return \"\\n\".join(name + \": \" + count for name, count in rows)\n"
+        ),
+    },
+    fix=[_fix("report/fmt.py", "title.uppper()", "title.upper()")],
+    follow_up=[_fix("report/rows.py", "\": \" + count", "\": \" + str(count)")],
+)
+
+
+def large_tree(filler: int = 3000) -> Case:
+    return Case(
+        name="large_tree",
+        kind="large",
+        symbol="percentile",
+        filler=filler,
+        files={
+            "main.py": (
+                "from analytics.core.stats import percentile\n\n"
+                "if __name__ == \"__main__\":\n"
+                "    print(percentile([3, 1, 4, 1, 5, 9, 2, 6], 100))\n"
+            ),
+            "analytics/__init__.py": "",
+            "analytics/core/__init__.py": "",
+            "analytics/core/stats.py": (
+                "def percentile(values, pct):\n"
+                "    ordered = sorted(values)\n"
+                "    index = round(pct / 100 * len(ordered))\n"
+                "    return ordered[index]\n"
+            ),
+        },
+        fix=[_fix("analytics/core/stats.py", "round(pct / 100 * len(ordered))",
+                  "round(pct / 100 * (len(ordered) - 1))")],
+    )
+
+
+def corpus(large_files: int = 3000) -> List[Case]:
+    return [IMPORT_ERROR, TYPE_ERROR, LOGIC_BUG, SYNTAX_ERROR, RETRY_AFTER_BAD_FIX, BROKEN_EDIT,
+            TWO_BUGS, large_tree(large_files)]
+
+
+_WORDS = ["parse", "render", "value", "items", "config", "result", "build", "fetch", "merge", "score"]
+
+
+def materialize(case: Case, root: str, seed: int = 0):
+    """Write the case's files (plus deterministic filler modules) under `root`."""
+    for rel, content in case.files.items():
+        full_path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    rng = random.Random(seed)
+    for i in range(case.filler):
+        pkg = os.path.join(root, "vendor", f"pkg_{i // 200}", f"mod_{i // 20}")
+        os.makedirs(pkg, exist_ok=True)
+        body = "".join(
+            f"def {rng.choice(_WORDS)}_{i}_{j}(x):\n    return x + {j}\n\n" for j in range(4)
+        )
+        with open(os.path.join(pkg, f"file_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(body)
@@ -0,0 +1,84 @@
+"""Offline stand-in for the chat model used by the self-healing benchmark.
+
+It reads the current phase from the system prompt and plays a fixed script for
+one heal case: reproduce the failure, fix it with the case's edits, then
+validate. Responses carry `usage_metadata` the way Gemini's do, so token
+accounting works the same as it does against the real model.
+"""
+import json
+import time
+from itertools import count
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from benchmarks.heal_corpus import Case
+from utils.tokens import estimate_message_tokens, estimate_tokens
+
+
+class ScriptedModel:
+    def __init__(self, case: Case, latency: float = 0.0):
+        self.case = case
+        self.latency = latency
+        self.calls = 0
+        self.seconds = 0.0
+        self.attempts = 0
+        self._ids = count(1)
+
+    def _call(self, name: str, **args) -> dict:
+        return {"name": name, "args": args, "id": f"call_{next(self._ids)}"}
+
+    def _candidates(self) -> AIMessage:
+        # A candidate only passes if the whole script does, so it has to cover both bugs.
+        attempts = [f for f in (self.case.wrong_fix, self.case.fix + self.case.follow_up) if f]
+        candidates = [{"description": f"hypothesis {i}", "changes": fixes} for i, fixes in enumerate(attempts, 1)]
+        return AIMessage(content="```json\n" + json.dumps({"candidates": candidates}) + "\n```")
+
+    def _respond(self, phase: str, last, system_prompt: str = "") -> AIMessage:
+        after_tools = isinstance(last, ToolMessage)
+        if phase == "analyze_error":
+            if not after_tools:
+                return AIMessage(content="", tool_calls=[
+                    self._call("run_python_script", script_path=self.case.entry),
+                    self._call("grep_text", pattern=self.case.symbol),
+                ])
+            return AIMessage(content=f"The failure is raised while running {self.case.entry}.")
+        if phase == "locate_code":
+            return AIMessage(content=f"The bug is in {self.case.fix[0]['path']}.")
+        if phase == "propose_fix":
+            if '"candidates"' in system_prompt:
+                return self._candidates()
+            return AIMessage(content=f"Edit {', '.join(f['path'] for f in self.case.fix)} to fix the {self.case.kind} bug.")
+        if phase == "apply_fix":
+            if not after_tools:
+                self.attempts += 1
+                plan = [f for f in (self.case.wrong_fix, self.case.fix, self.case.follow_up) if f]
+                fixes = plan[min(self.attempts, len(plan)) - 1]
+                return AIMessage(content="", tool_calls=[
+                    self._call("apply_edits", path=fix["path"], edits=fix["edits"]) for fix in fixes
+                ])
+            return AIMessage(content="The fix has been applied.")
+        if phase == "validate":
+            if not after_tools:
+                return AIMessage(content="", tool_calls=[self._call("run_python_script", script_path=self.case.entry)])
+            content = str(last.content)
+            failed = "--- STDERR" in content or content.startswith("Error")
+            return AIMessage(content="Validation failed." if failed else "DONE")
+        return AIMessage(content="Nothing to do.")
+
+    def invoke(self, messages) -> AIMessage:
+        start = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls += 1
+        system_prompt = messages[0]["content"]
+        phase = system_prompt.rsplit("Current Phase: ", 1)[1].strip()
+        response = self._respond(phase, messages[-1], system_prompt)
+        input_tokens = estimate_message_tokens(messages)
+        output_tokens = estimate_tokens(response.content + json.dumps([c["args"] for c in response.tool_calls]))
+        response.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        self.seconds += time.perf_counter() - start
+        return response
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -15,8 +16,127 @@ class Config:
         os.path.join(_current_dir, "sandbox/example_project")
     )
 
-    MAX_ITERATIONS = 10
-    
+    MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", "10"))
+
+    # Run budgets (0 = unlimited), checked after every model and tool turn. Past DEGRADE_AT of a run limit,
+    # or once the current phase used up its BUDGET_PHASES entry, the run is degraded (compaction
+    # down to DEGRADED_COMPACTION of its budget, then skipping ahead towards the fix); at a run
+    # limit it stops. MAX_ITERATIONS stays a hard cap on top. Time limits are opt-in: wall time
+    # excludes rate-limiter waits, but still depends on the model's latency and the machine.
+    BUDGET_PROMPT_TOKENS = int(os.getenv("BUDGET_PROMPT_TOKENS", "400000"))
+    BUDGET_COMPLETION_TOKENS = int(os.getenv("BUDGET_COMPLETION_TOKENS", "40000"))
+    BUDGET_WALL_SECONDS = float(os.getenv("BUDGET_WALL_SECONDS", "0"))
+    BUDGET_TOOL_SECONDS = float(os.getenv("BUDGET_TOOL_SECONDS", "0"))
+    # Per-phase limits on the same meters, e.g. '{"locate_code": {"prompt_tokens": 60000, "tool_s": 60}}'
+    BUDGET_PHASES = json.loads(os.getenv("BUDGET_PHASES", "{}"))
+    BUDGET_DEGRADE_AT = 0.8
+    BUDGET_DEGRADED_COMPACTION = 0.5
+
+    # File index behind list_files / find_file / grep_text
+    INDEX_RESCAN_INTERVAL = float(os.getenv("INDEX_RESCAN_INTERVAL", "5"))
+    INDEX_MAX_FILE_BYTES = 1024 * 1024
+
+    # In-process grep engine: matches returned per call and scanner threads
+    GREP_MAX_RESULTS = 50
+    GREP_WORKERS = int(os.getenv("GREP_WORKERS", "4"))
+
+    # Line-offset index behind read_range / read_around
+    LINE_INDEX_MAX_FILES = 128
+    LINE_INDEX_MMAP_BYTES = 4 * 1024 * 1024
+
+    # run_python_script output capture: the first HEAD and last TAIL bytes of each stream are
+    # kept, the run is stopped once both streams together exceed OUTPUT_BUDGET bytes (0 = never)
+    # or when it is still alive TRACEBACK_GRACE seconds after an uncaught exception (0 = never)
+    EXECUTOR_HEAD_BYTES = 4 * 1024
+    EXECUTOR_TAIL_BYTES = 16 * 1024
+    EXECUTOR_OUTPUT_BUDGET = int(os.getenv("EXECUTOR_OUTPUT_BUDGET", str(8 * 1024 * 1024)))
+    EXECUTOR_TRACEBACK_GRACE = float(os.getenv("EXECUTOR_TRACEBACK_GRACE", "0.5"))
+
+    # Warm interpreter pool for run_python_script (POSIX only)
+    EXECUTOR_USE_POOL = os.getenv("EXECUTOR_USE_POOL", "0") == "1"
+    EXECUTOR_PRELOAD_MODULES = [
+        m.strip() for m in os.getenv("EXECUTOR_PRELOAD_MODULES", "").split(",") if m.strip()
+    ]
+    # Seconds to wait for the pool to import the preload modules before falling back
+    EXECUTOR_POOL_START_TIMEOUT = float(os.getenv("EXECUTOR_POOL_START_TIMEOUT", "30"))
+
+    # Before a fix is accepted, up to MAX_TARGETS entry points and tests that import an edited
+    # file are re-run (as scripts); one that fails now but passed before the fix sends it back (0 = off)
+    VALIDATION_MAX_TARGETS = int(os.getenv("VALIDATION_MAX_TARGETS", "5"))
+    VALIDATION_TARGET_TIMEOUT = float(os.getenv("VALIDATION_TARGET_TIMEOUT", "30"))
+
+    # Shared model rate limits (0 disables a limit) and backoff for 429/503 errors
+    RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "10"))
+    RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "250000"))
+    RATE_LIMIT_MAX_RETRIES = 5
+    RATE_LIMIT_BACKOFF_BASE = 1.0
+    RATE_LIMIT_BACKOFF_MAX = 30.0
+
+    # Conversation compaction before each model call
+    COMPACTION_TOKEN_BUDGET = int(os.getenv("COMPACTION_TOKEN_BUDGET", "24000"))
+    COMPACTION_KEEP_RECENT = 4
+    COMPACTION_DIGEST_CHARS = 800
+    COMPACTION_DIGEST_LINES = 6
+    COMPACTION_SUMMARY_CHARS = 400
+
+    # Model response cache: "off", "readwrite" (record and reuse) or "replay" (offline, misses fail)
+    LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+    LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(_current_dir, ".llm_cache"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    # Durable checkpoints of the graph state after every node (python main.py --resume <run_id>)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "1") == "1"
+    CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(_current_dir, ".checkpoints", "runs.sqlite"))
+
+    # Lines of code shown around each traceback frame when analyze_error/locate_code are auto-triaged
+    TRIAGE_CONTEXT_LINES = 10
+
+    # Speculative fixes: propose_fix asks for this many candidates and validates them in
+    # parallel throwaway copies of the sandbox (0 or 1 = off)
+    SPECULATIVE_CANDIDATES = int(os.getenv("SPECULATIVE_CANDIDATES", "0"))
+    SPECULATIVE_TIMEOUT = 30
+
+    # Static pre-validation (compile + undefined names): worker processes, files checked in this
+    # process below PARALLEL_MIN, findings cached per content hash; after apply_fix an edit that
+    # adds static errors is rolled back before the script is run (GATE=0 to only offer the tool)
+    STATIC_CHECK_WORKERS = int(os.getenv("STATIC_CHECK_WORKERS", str(min(4, os.cpu_count() or 1))))
+    STATIC_CHECK_PARALLEL_MIN = 64
+    STATIC_CHECK_CACHE_ENTRIES = 8192
+    STATIC_CHECK_GATE = os.getenv("STATIC_CHECK_GATE", "1") == "1"
+
+    # Cross-run fix cache: the patch that passed validation for an error signature is replayed
+    # (and re-validated) before asking the model the next time the same failure shows up
+    FIX_CACHE_ENABLED = os.getenv("FIX_CACHE_ENABLED", "1") == "1"
+    FIX_CACHE_DIR = os.getenv("FIX_CACHE_DIR", os.path.join(_current_dir, ".fix_cache"))
+    FIX_CACHE_MAX_BYTES = int(os.getenv("FIX_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Lines around the fault hashed into the signature, and the replayed fix's validation run limit
+    FIX_CACHE_CONTEXT_LINES = 3
+    FIX_CACHE_TIMEOUT = 30
+
+    # Worker threads for running independent tool calls of one model turn concurrently
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    # Answer a repeated explorer call whose files are unchanged with a reference to the earlier result
+    TOOL_MEMO_ENABLED = os.getenv("TOOL_MEMO_ENABLED", "1") == "1"
+
+    # Batch mode (python main.py --batch jobs.jsonl)
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+    # Daemon mode (python main.py --serve): Unix socket, jobs running at once, waiting jobs
+    # accepted, and finished job results kept for status queries
+    DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", os.path.join(_current_dir, ".daemon", "healer.sock"))
+    DAEMON_CONCURRENCY = int(os.getenv("DAEMON_CONCURRENCY", str(BATCH_CONCURRENCY)))
+    DAEMON_MAX_QUEUE = 100
+    DAEMON_KEEP_RESULTS = 1000
+
     LOG_DIR = "logs"
+    # Console rendering of the agent log (the JSONL file is always written)
+    LOG_CONSOLE = os.getenv("LOG_CONSOLE", "1") == "1"
+    # Longer log payloads are cut to this many chars; the full text goes to logs/blobs/*.gz
+    LOG_MAX_PAYLOAD_CHARS = 2000
+    LOG_PAYLOAD_BLOBS = os.getenv("LOG_PAYLOAD_BLOBS", "1") == "1"
+
+    # Span tracing (utils/tracing.py): one Chrome trace + summary per run in TRACE_DIR
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+    TRACE_DIR = os.getenv("TRACE_DIR", os.path.join(LOG_DIR, "traces"))
 
 config = Config()
\ No newline at end of file
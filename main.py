@@ -1,40 +1,122 @@
 # main.py
+import argparse
 import os
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
 
-from agent.workflow import app
-from agent.prompts import get_system_prompt
 from config import config
-from utils.logger import logger
+from utils.logger import get_logger
+from utils.tracing import Trace, use_trace
 
 # Ensure environment variables are loaded from the .env file
 load_dotenv()
 
 # main.py
 
-def run_agent(task: str):
-    """Initializes and executes the FileAgent-SelfHealer workflow."""
-    initial_state = {
-        "messages": [
-            HumanMessage(content=f"Task: {task}")
-        ],
-        "iteration_count": 0,
-        "phase": "analyze_error",
-    }
-
-    logger.log_step("Initializing FileAgent-SelfHealer")
+def run_agent(task: str, resume_id: str = None):
+    """Initializes and executes the FileAgent-SelfHealer workflow.
+
+    With checkpointing enabled the state is saved after every node, and passing
+    `resume_id` continues that run from its last completed node instead of
+    starting over (completed model calls and tool runs are not repeated).
+    """
+    # The agent stack (LangChain, LangGraph, the Gemini client) is only imported
+    # once there is a run to do, so `--help` and argument errors return instantly.
+    from agent.budget import report as budget_report
+    from agent.checkpoints import new_run_id, open_checkpointer, run_config
+    from agent.rate_limiter import rate_limiter
+    from agent.fix_cache import fix_cache_stats
+    from agent.workflow import build_initial_state, get_app, get_workflow, llm_cache_stats
+    from tools.tool_memo import memo_stats
+
+    logger = get_logger()
+    checkpointer = open_checkpointer() if config.CHECKPOINT_ENABLED or resume_id else None
+    graph = get_workflow().compile(checkpointer=checkpointer) if checkpointer else get_app()
+    run_id = resume_id or new_run_id()
+    graph_config = run_config(run_id)
+    graph_input = build_initial_state(task)
+
+    if resume_id:
+        saved = graph.get_state(graph_config)
+        if not saved.values:
+            logger.log_error(f"No checkpoint found for run {resume_id} in {config.CHECKPOINT_DB}.")
+            return
+        if not saved.next:
+            logger.log_success(f"Run {resume_id} already finished in phase {saved.values.get('phase')}.")
+            return
+        graph_input = None
+        logger.log_step(f"Resuming run {resume_id} at iteration {saved.values.get('iteration_count')} "
+                        f"(next node: {', '.join(saved.next)})")
+    else:
+        logger.log_step("Initializing FileAgent-SelfHealer")
+
+    logger.flush()
     print(f"Targeting Project: {config.PROJECT_ROOT}")
+    if checkpointer:
+        print(f"Run id: {run_id} (resume with: python main.py --resume {run_id})")
 
+    trace = Trace(run_id) if config.TRACE_ENABLED else None
     try:
-        final_state = app.invoke(initial_state)
+        with use_trace(trace):
+            final_state = graph.invoke(graph_input, graph_config)
         logger.log_success("Workflow completed.")
         print(final_state["messages"][-1].content)
+        print(f"Tool memo: {memo_stats(final_state['messages'])}")
+        print(f"Budget: {budget_report(final_state.get('budget'))}")
     except Exception as e:
         logger.log_error(f"Execution failed: {str(e)}")
+    finally:
+        logger.flush()
+        print(f"Rate limiter: {rate_limiter.metrics()}")
+        if llm_cache_stats():
+            print(f"LLM cache: {llm_cache_stats()}")
+        if fix_cache_stats():
+            print(f"Fix cache: {fix_cache_stats()}")
+        if trace is not None:
+            print(f"Trace: {trace.export(config.TRACE_DIR)}")
+            logger.log_metrics("Trace", {k: v["total_ms"] for k, v in trace.summary()["by_category"].items()})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FileAgent-SelfHealer")
+    parser.add_argument("--batch", metavar="JOBS_JSONL",
+                        help="Heal every {project_root, task} job in a JSONL file concurrently.")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="Where batch mode streams per-job results (default: batch_results.jsonl).")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"Maximum jobs in flight in batch or daemon mode (default: {config.BATCH_CONCURRENCY}).")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue a checkpointed run from its last completed node.")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a long-lived daemon that accepts healing jobs on a Unix socket.")
+    parser.add_argument("--submit", metavar="PROJECT_ROOT",
+                        help="Send a healing job for PROJECT_ROOT to a running daemon and print its result.")
+    parser.add_argument("--daemon-status", action="store_true",
+                        help="Print the metrics of a running daemon.")
+    parser.add_argument("--socket", default=None,
+                        help=f"Daemon socket path (default: {config.DAEMON_SOCKET}).")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    demo_task = "Explore the project directory, find the main entry point, run it, and fix any errors you encounter."
-    
-    run_agent(demo_task)
\ No newline at end of file
+    args = parse_args()
+
+    if args.serve:
+        from agent.daemon import serve
+        serve(args.socket, args.concurrency)
+    elif args.submit or args.daemon_status:
+        import json
+        from agent.daemon import DaemonClient, DaemonError
+        client = DaemonClient(args.socket)
+        try:
+            result = client.heal(args.submit) if args.submit else client.metrics()
+        except DaemonError as e:
+            raise SystemExit(f"Error: {e}")
+        print(json.dumps(result, indent=2))
+    elif args.batch:
+        import asyncio
+        from agent.batch import run_batch
+        asyncio.run(run_batch(args.batch, args.output, args.concurrency))
+    else:
+        demo_task = "Explore the project directory, find the main entry point, run it, and fix any errors you encounter."
+
+        run_agent(demo_task, resume_id=args.resume)
@@ -1,4 +1,4 @@
-from typing import Annotated, Sequence, TypedDict, Literal
+from typing import Annotated, List, Sequence, TypedDict, Literal
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
@@ -16,6 +16,18 @@ class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
     current_file: str
     last_error: str
+    # Structured traceback of the last failing script run (tools.traceback_parser).
+    last_traceback: dict
     iteration_count: int
     is_fixed: bool
-    phase: AgentPhase
\ No newline at end of file
+    phase: AgentPhase
+    # {"phase", "start"} entries: the message index at which each phase began.
+    phase_log: List[dict]
+    # Per-iteration context size report produced by agent.compaction.
+    token_reports: List[dict]
+    # Number of apply_fix attempts so far; each one is covered by a sandbox snapshot.
+    fix_attempt: int
+    # Normalized signature of the error being fixed (agent.fix_cache), the key a validated fix is stored under.
+    error_signature: str
+    # Token, wall-time and tool-time usage per run and phase against its limits (agent.budget).
+    budget: dict
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The modules are imported as top-level packages (agent, tools, utils), as main.py does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sandbox(tmp_path):
+    """A fresh project root that the tools resolve paths against."""
+    from tools.sandbox import use_project_root
+
+    with use_project_root(str(tmp_path)):
+        yield tmp_path
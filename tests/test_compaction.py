@@ -0,0 +1,56 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from agent.compaction import _digest, compact_messages
+from config import config
+
+
+def _turn(call_id, name, args, content, artifact=None):
+    call = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": call_id}])
+    return [call, ToolMessage(content=content, tool_call_id=call_id, name=name, artifact=artifact)]
+
+
+def _contents(messages):
+    return [m.content for m in messages if isinstance(m, ToolMessage)]
+
+
+def test_a_repeated_identical_read_supersedes_the_older_one():
+    history = [HumanMessage(content="task"),
+               *_turn("1", "read_range", {"path": "a.py", "start_line": 1, "end_line": 9}, "old view"),
+               *_turn("2", "read_range", {"path": "a.py", "start_line": 1, "end_line": 9}, "new view")]
+    compacted, report = compact_messages(history, budget=10 ** 6)
+    assert report["stale_reads"] == 1
+    assert _contents(compacted)[0].startswith("[Superseded") and _contents(compacted)[1] == "new view"
+
+
+def test_a_shorter_header_read_does_not_supersede_a_longer_one():
+    history = [HumanMessage(content="task"),
+               *_turn("1", "read_header", {"path": "a.py", "line_count": 200}, "200 lines"),
+               *_turn("2", "read_header", {"path": "a.py", "line_count": 10}, "10 lines")]
+    compacted, report = compact_messages(history, budget=10 ** 6)
+    assert report["stale_reads"] == 0 and _contents(compacted) == ["200 lines", "10 lines"]
+
+
+def test_a_memo_reference_keeps_its_target():
+    memo = {"memo": {"same_as_id": "1"}}
+    history = [HumanMessage(content="task"),
+               *_turn("1", "read_header", {"path": "a.py"}, "full text"),
+               *_turn("2", "read_header", {"path": "a.py"}, "[Unchanged since call #1]", artifact=memo)]
+    compacted, _ = compact_messages(history, budget=10 ** 6)
+    assert _contents(compacted)[0] == "full text"
+
+
+def test_calls_and_results_stay_paired_under_a_tight_budget():
+    history = [HumanMessage(content="task")]
+    for i in range(12):
+        history += _turn(str(i), "grep_text", {"pattern": f"p{i}"}, "\n".join(f"hit {n}" for n in range(200)))
+    compacted, report = compact_messages(history, budget=50)
+    assert report["digested"] > 0 and report["sent_tokens"] < report["raw_tokens"]
+    call_ids = {c["id"] for m in compacted if isinstance(m, AIMessage) for c in m.tool_calls}
+    assert call_ids == {m.tool_call_id for m in compacted if isinstance(m, ToolMessage)}
+
+
+def test_script_digests_keep_the_traceback_tail():
+    lines = [f"line {n}" for n in range(100)] + ["ZeroDivisionError: division by zero"]
+    digest = _digest("\n".join(lines), "run_python_script")
+    assert digest.endswith("ZeroDivisionError: division by zero")
+    assert len(digest.splitlines()) == 2 * config.COMPACTION_DIGEST_LINES + 1
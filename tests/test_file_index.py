@@ -0,0 +1,71 @@
+import shutil
+import subprocess
+
+import pytest
+
+from tools.file_index import FileIndex, _bre_to_re, _required_literals
+
+LINES = [
+    "the color is red",
+    "the colour is blue",
+    "colouur is not a word",
+    "lor and co met",
+    "abcdef abccdef",
+    "helloworld and world",
+    "x = percentile(values, 90)",
+    "a.b.cde or axbxcde",
+    "]xyzw",
+    "price: 3+4 {x}",
+]
+
+PATTERNS = [
+    "colou\\?r",
+    "co\\{0,1\\}lor",
+    "colo\\{1,2\\}u*r",
+    "colou*r",
+    "abc\\+def",
+    "\\(hello\\)*world",
+    "\\(hello\\)\\{0,1\\}world",
+    "\\(hello\\)\\+world",
+    "percentile(",
+    "a\\.b\\.cde",
+    "[]abc]xyzw",
+    "3+4 {x}",
+    "red\\|blue",
+    "^the col",
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "text.txt").write_text("\n".join(LINES) + "\n")
+    return tmp_path
+
+
+@pytest.mark.skipif(shutil.which("grep") is None, reason="needs grep")
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_grep_matches_real_grep(tree, pattern):
+    expected = subprocess.run(["grep", "-n", "--", pattern, "text.txt"], cwd=tree,
+                              capture_output=True, text=True).stdout.splitlines()
+    lines, _, _ = FileIndex(str(tree)).grep(pattern, str(tree))
+    assert [line.split(":", 1)[1] for line in lines] == expected
+
+
+@pytest.mark.parametrize("pattern, literals", [
+    ("colou\\?r", ["colo"]),
+    ("co\\{0,1\\}lor", ["lor"]),
+    ("colo\\{2\\}ur", ["col"]),
+    ("abc\\+def", ["abc", "def"]),
+    ("\\(hello\\)*world", ["world"]),
+    ("\\(hello\\)\\+world", ["hello", "world"]),
+    ("[^]abc]xyzw", ["xyzw"]),
+    ("a\\.b\\.cde", ["a.b.cde"]),
+    ("foo\\|bar", []),
+])
+def test_required_literals(pattern, literals):
+    assert _required_literals(pattern) == literals
+
+
+def test_bre_translation():
+    assert _bre_to_re("a\\(b\\)\\+c") == "a(b)+c"
+    assert _bre_to_re("f(x) + {y}?") == "f\\(x\\) \\+ \\{y\\}\\?"
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from agent.fix_cache import FixCache, _file_edits, error_signature, patch_from_snapshot
+from tools.editor_tools import apply_edits, write_file
+from tools.snapshot import journal
+from tools.traceback_parser import parse_traceback
+
+BUGGY = "def total(prices):\n    return sum(prices) + taxes\n"
+
+
+def _traceback(root, line=2):
+    stderr = (
+        "Traceback (most recent call last):\n"
+        f'  File "{root}/main.py", line 3, in <module>\n'
+        "    total([1, 2])\n"
+        f'  File "{root}/shop/cart.py", line {line}, in total\n'
+        "    return sum(prices) + taxes\n"
+        "NameError: name 'taxes' is not defined\n"
+    )
+    return parse_traceback(stderr, str(root))
+
+
+def _project(root, prefix=""):
+    (root / "shop").mkdir()
+    (root / "shop" / "cart.py").write_text(prefix + BUGGY)
+    (root / "main.py").write_text("from shop.cart import total\n\ntotal([1, 2])\n")
+
+
+def test_signature_ignores_checkout_and_moved_lines(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    _project(a)
+    _project(b, prefix="import os\n" + "\n" * 6)
+    assert error_signature(_traceback(a), str(a)) == error_signature(_traceback(b, line=9), str(b))
+
+
+def test_signature_changes_with_the_code_at_the_fault(tmp_path):
+    _project(tmp_path)
+    before = error_signature(_traceback(tmp_path), str(tmp_path))
+    (tmp_path / "shop" / "cart.py").write_text(BUGGY.replace("sum(prices)", "sum(prices) * 2"))
+    assert error_signature(_traceback(tmp_path), str(tmp_path)) != before
+
+
+def test_signature_needs_a_sandbox_frame(tmp_path):
+    stderr = ('Traceback (most recent call last):\n  File "/usr/lib/x.py", line 1, in f\n'
+              "ValueError: bad\n")
+    assert error_signature(parse_traceback(stderr, str(tmp_path)), str(tmp_path)) is None
+
+
+def test_put_get_and_discard(tmp_path):
+    cache = FixCache(str(tmp_path / "cache"), 1 << 20)
+    cache.put("ab" * 32, "NameError", [{"path": "a.py", "create": "x = 1\n"}])
+    assert cache.get("ab" * 32)["changes"] == [{"path": "a.py", "create": "x = 1\n"}]
+    cache.discard("ab" * 32)
+    assert cache.get("ab" * 32) is None
+    assert cache.stats["stored"] == 1 and cache.stats["hits"] == 1 and cache.stats["failed"] == 1
+
+
+def test_unwritable_cache_is_counted_not_raised(tmp_path):
+    blocker = tmp_path / "cache"
+    blocker.write_text("not a directory")
+    cache = FixCache(str(blocker), 1 << 20)
+    cache.put("cd" * 32, "NameError", [])
+    assert cache.stats["write_errors"] == 1 and cache.stats["stored"] == 0
+    assert [p.name for p in tmp_path.iterdir()] == ["cache"]
+
+
+def test_eviction_keeps_the_cache_under_its_size(tmp_path):
+    cache = FixCache(str(tmp_path / "cache"), 600)
+    for i in range(10):
+        cache.put(f"{i:02d}" * 32, "E", [{"path": "a.py", "create": "x" * 100}])
+    size = sum(p.stat().st_size for p in (tmp_path / "cache").rglob("*.json"))
+    assert size <= 600 and cache.stats["evictions"] > 0
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_file_edits_replay_to_the_same_text(sandbox, seed):
+    rng = random.Random(seed)
+    before = [f"line {rng.randrange(6)}\n" for _ in range(rng.randrange(1, 30))]
+    after = list(before)
+    for _ in range(rng.randrange(1, 5)):
+        at = rng.randrange(len(after) + 1)
+        op = rng.choice(["insert", "delete", "replace"])
+        if op == "insert" or not after:
+            after.insert(at, f"new {rng.randrange(100)}\n")
+        elif op == "delete" and at < len(after):
+            del after[at]
+        elif at < len(after):
+            after[at] = f"changed {rng.randrange(100)}\n"
+    before, after = "".join(before), "".join(after)
+    (sandbox / "f.py").write_text(before)
+    edits = _file_edits(before, after)
+    if edits:
+        assert apply_edits("f.py", edits).startswith("Success")
+    assert (sandbox / "f.py").read_text() == after
+
+
+def test_patch_from_snapshot(sandbox):
+    (sandbox / "a.py").write_text("x = 1\ny = 2\n")
+    journal.begin(str(sandbox), 1)
+    try:
+        apply_edits("a.py", [{"old_text": "y = 2", "new_text": "y = 3"}])
+        write_file("b.py", "z = 1\n")
+    finally:
+        snapshot = journal.take(str(sandbox))
+    assert patch_from_snapshot(snapshot, str(sandbox)) == [
+        {"path": "a.py", "edits": [{"old_text": "y = 2\n", "new_text": "y = 3\n"}]},
+        {"path": "b.py", "create": "z = 1\n"},
+    ]
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from config import config
+from tools import executor_tools
+from tools.interpreter_pool import InterpreterPool
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the pool forks")
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "noisy.py").write_text("print('imported noisy')\n")
+    (tmp_path / "main.py").write_text("import noisy\nprint('hello')\n")
+    return tmp_path
+
+
+def test_preload_output_does_not_break_the_handshake(project):
+    pool = InterpreterPool(str(project), ["noisy"])
+    try:
+        result = pool.run(str(project / "main.py"), [], 10)
+    finally:
+        pool.close()
+    assert result.returncode == 0
+    # The child re-imports nothing: `noisy` was preloaded by the server.
+    assert result.stdout == "hello\n"
+
+
+def test_slow_start_is_a_runtime_error(project, monkeypatch):
+    (project / "slow.py").write_text("import time\ntime.sleep(5)\n")
+    monkeypatch.setattr(config, "EXECUTOR_POOL_START_TIMEOUT", 0.2)
+    pool = InterpreterPool(str(project), ["slow"])
+    try:
+        with pytest.raises(RuntimeError, match="did not answer"):
+            pool.run(str(project / "main.py"), [], 10)
+    finally:
+        pool.close()
+
+
+def test_malformed_message_is_a_runtime_error(project, monkeypatch):
+    pool = InterpreterPool(str(project), [])
+    monkeypatch.setattr("tools.interpreter_pool._SERVER_SCRIPT", str(project / "main.py"))
+    try:
+        with pytest.raises(RuntimeError, match="malformed"):
+            pool.run(str(project / "main.py"), [], 10)
+    finally:
+        pool.close()
+
+
+def test_executor_falls_back_to_a_cold_interpreter(sandbox, monkeypatch):
+    (sandbox / "main.py").write_text("print('cold')\n")
+    monkeypatch.setattr(config, "EXECUTOR_USE_POOL", True)
+    monkeypatch.setattr(config, "EXECUTOR_POOL_START_TIMEOUT", 0.2)
+    monkeypatch.setattr("tools.interpreter_pool._SERVER_SCRIPT", str(sandbox / "main.py"))
+    monkeypatch.setattr("tools.interpreter_pool._pools", {})
+    result = executor_tools._execute(str(sandbox / "main.py"), [])
+    assert result.returncode == 0 and result.stdout == "cold\n"
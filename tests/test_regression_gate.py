@@ -0,0 +1,54 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from agent.workflow import regression_gate
+from tools.editor_tools import apply_edits
+from tools.snapshot import journal
+
+MAIN = "from lib import scale\n\nif __name__ == \"__main__\":\n    assert scale(2) == 6\n"
+
+
+def _validated(script="main.py"):
+    return [AIMessage(content="", tool_calls=[
+        {"name": "run_python_script", "args": {"script_path": script}, "id": "call_1"}])]
+
+
+@pytest.fixture
+def project(sandbox):
+    (sandbox / "lib.py").write_text("def scale(x):\n    return x * 2\n")
+    (sandbox / "main.py").write_text(MAIN)
+    journal.begin(str(sandbox), 1)
+    yield sandbox
+    journal.take(str(sandbox))
+
+
+def _fix():
+    assert apply_edits("lib.py", [{"old_text": "x * 2", "new_text": "x * 3"}]).startswith("Success")
+
+
+def test_a_broken_dependent_entry_point_is_a_regression(project):
+    (project / "report.py").write_text(
+        "from lib import scale\n\nif __name__ == \"__main__\":\n    assert scale(1) == 2\n")
+    _fix()
+    note = regression_gate(_validated())
+    assert note.startswith("[Regression] Fix attempt #1") and "report.py: AssertionError" in note
+    # The baseline run must not have touched the sandbox.
+    assert (project / "lib.py").read_text() == "def scale(x):\n    return x * 3\n"
+
+
+def test_a_target_that_already_failed_is_not_a_regression(project):
+    (project / "report.py").write_text(
+        "from lib import scale\n\nif __name__ == \"__main__\":\n    raise SystemExit(scale(1) + 1)\n")
+    _fix()
+    assert regression_gate(_validated()) == ""
+
+
+def test_independent_entry_points_are_not_run(project):
+    (project / "other.py").write_text("if __name__ == \"__main__\":\n    raise SystemExit(1)\n")
+    _fix()
+    assert regression_gate(_validated()) == ""
+
+
+def test_gate_is_off_without_an_active_attempt(sandbox):
+    (sandbox / "main.py").write_text(MAIN)
+    assert regression_gate(_validated()) == ""
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+
+from tools import search_engine
+
+
+@pytest.fixture
+def tree(tmp_path):
+    def write(name, hits, misses=0):
+        path = tmp_path / name
+        path.write_text("".join(["needle\n"] * hits + ["hay\n"] * misses))
+        return str(path)
+    return write
+
+
+def run(files, max_results, **kwargs):
+    return search_engine.search(re.compile("needle"), files, max_results, **kwargs)
+
+
+def test_exact_limit_in_one_file_is_not_stopped(tree):
+    lines, found, stopped = run([tree("a.txt", 5, 3)], 5)
+    assert (len(lines), found, stopped) == (5, 5, False)
+
+
+def test_match_past_limit_is_stopped(tree):
+    lines, found, stopped = run([tree("a.txt", 6)], 5)
+    assert (len(lines), found, stopped) == (5, 5, True)
+
+
+def test_exact_limit_with_quiet_files_left_is_not_stopped(tree):
+    files = [tree("a.txt", 5)] + [tree(f"q{i}.txt", 0, 4) for i in range(3)]
+    assert run(files, 5)[1:] == (5, False)
+
+
+def test_exact_limit_across_files_is_not_stopped(tree):
+    files = [tree("a.txt", 2), tree("b.txt", 3), tree("c.txt", 0, 2)]
+    assert run(files, 5)[1:] == (5, False)
+
+
+def test_matching_file_left_over_is_stopped(tree):
+    files = [tree("a.txt", 5), tree("b.txt", 1)]
+    assert run(files, 5)[1:] == (5, True)
+
+
+def test_unread_files_are_stopped(tree, monkeypatch):
+    monkeypatch.setattr(search_engine.config, "GREP_WORKERS", 1)
+    files = [tree("a.txt", 5)] + [tree(f"q{i}.txt", 1) for i in range(10)]
+    assert run(files, 5)[1:] == (5, True)
+
+
+def test_per_file_cap_is_not_stopped(tree):
+    # Matches hidden by max_per_file are not counted against the overall limit.
+    lines, found, stopped = run([tree("a.txt", 4)], 10, max_per_file=2)
+    assert (len(lines), found, stopped) == (2, 2, False)
+
+
+def test_context_output(tree):
+    path = tree("a.txt", 1, 2)
+    lines, found, stopped = run([path], 5, context=1)
+    assert lines == [f"{path}:1:needle", f"{path}-2-hay"]
+    assert (found, stopped) == (1, False)
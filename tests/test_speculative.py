@@ -0,0 +1,45 @@
+import json
+import os
+
+from agent.speculative import clone_tree, parse_candidates
+from config import config
+from tools.editor_tools import apply_edits
+from tools.sandbox import use_project_root
+
+
+def _tree(root):
+    (root / "pkg").mkdir()
+    (root / "pkg" / "mod.py").write_text("VALUE = 1\n")
+    (root / "main.py").write_text("from pkg.mod import VALUE\n")
+    (root / "data.csv").write_text("a,b\n")
+    (root / ".venv" / "lib").mkdir(parents=True)
+    (root / ".venv" / "lib" / "big.py").write_text("x = 1\n")
+
+
+def test_clone_links_unchanged_files_and_copies_edited_ones(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    _tree(src)
+    clone_tree(str(src), str(dst), copy=["pkg/mod.py"])
+    assert os.path.samefile(src / "data.csv", dst / "data.csv")
+    assert not os.path.samefile(src / "pkg" / "mod.py", dst / "pkg" / "mod.py")
+    assert not (dst / ".venv").exists()
+
+
+def test_edits_in_a_clone_leave_the_sandbox_alone(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    _tree(src)
+    clone_tree(str(src), str(dst))
+    with use_project_root(str(dst)):
+        assert apply_edits("main.py", [{"old_text": "VALUE", "new_text": "VALUE as V"}]).startswith("Success")
+    assert (src / "main.py").read_text() == "from pkg.mod import VALUE\n"
+
+
+def test_parse_candidates_keeps_only_well_formed_ones(monkeypatch):
+    monkeypatch.setattr(config, "SPECULATIVE_CANDIDATES", 3)
+    edit = {"old_text": "a", "new_text": "b"}
+    text = ('```json\n{"candidates": [{"description": "a", "changes": [{"path": "x.py", "edits": [%s]}]},'
+            ' {"description": "no changes"}]}\n```' % json.dumps(edit))
+    candidates = parse_candidates(text)
+    assert [c["description"] for c in candidates] == ["a"]
@@ -0,0 +1,104 @@
+import pytest
+
+from tools import static_check as sc
+
+
+def check(source):
+    return [(f["line"], f["kind"], f["message"]) for f in sc.check_source(("m.py", source.encode()))]
+
+
+def test_clean_module():
+    assert check("import os\n\ndef f(x):\n    return os.path.join(x, len(x))\n") == []
+
+
+def test_syntax_and_indentation_errors():
+    assert check("def f(:\n    pass\n")[0][:2] == (1, "SyntaxError")
+    assert check("def f():\nreturn 1\n")[0][:2] == (2, "IndentationError")
+    assert check("x = 1\0\n")[0][1] == "SyntaxError"
+    findings = sc.check_source(("m.py", b"\xff\xfe"))
+    assert findings[0]["kind"] == "UnicodeDecodeError"
+
+
+def test_undefined_names_first_use_in_order():
+    source = "def f():\n    return helper(y)\n\nprint(y)\nz = helper\n"
+    assert check(source) == [
+        (2, "UndefinedName", "name 'helper' is not defined"),
+        (2, "UndefinedName", "name 'y' is not defined"),
+    ]
+
+
+def test_locals_classes_and_comprehensions_are_defined():
+    source = ("class A:\n    n = 1\n    def m(self):\n        return [k for k in range(self.n)]\n"
+              "def g():\n    value = A()\n    return lambda: value\n")
+    assert check(source) == []
+
+
+def test_global_declaration_binds_the_name():
+    assert check("def setup():\n    global np\n    import numpy as np\n\ndef f():\n    return np\n") == []
+    assert check("def setup():\n    global cfg\n    cfg = {}\n\ndef f():\n    return cfg\n") == []
+
+
+def test_dynamic_globals_silence_the_module():
+    assert check("globals()['late'] = 1\nprint(late)\n") == []
+    assert check("from os.path import *\nprint(join, late)\n") == []
+    # A variable called `globals` is not the builtin being called.
+    assert check("globals = {}\nprint(late)\n") == [(2, "UndefinedName", "name 'late' is not defined")]
+
+
+def test_name_error_guard():
+    source = "try:\n    unicode\nexcept NameError:\n    unicode = str\n"
+    assert check(source) == []
+    source = "try:\n    late\nexcept (KeyError, NameError):\n    pass\n"
+    assert check(source) == []
+    source = "try:\n    late\nexcept KeyError:\n    pass\n"
+    assert check(source) == [(2, "UndefinedName", "name 'late' is not defined")]
+
+
+def test_checker_caches_by_content():
+    checker = sc.StaticChecker(max_entries=2, workers=1)
+    sources = {"a.py": b"print(late)\n", "b.py": b"x = 1\n", "copy.py": b"x = 1\n"}
+    first = checker.check("/unused", sources)
+    assert (first["files"], first["parsed"]) == (3, 2)
+    assert [(f["path"], f["line"]) for f in first["findings"]] == [("a.py", 1)]
+
+    again = checker.check("/unused", sources)
+    assert again["parsed"] == 0
+    assert again["findings"] == first["findings"]
+
+    # Clean files are cached too, as an empty list.
+    assert checker.check("/unused", {"c.py": b"x = 1\n"})["parsed"] == 0
+    checker.check("/unused", {"d.py": b"y = 2\n", "e.py": b"z = 3\n"})
+    assert len(checker._cache) == 2
+
+
+def test_introduced_findings(sandbox):
+    path = sandbox / "mod.py"
+    original = b"def f():\n    return missing\n"
+    path.write_bytes(original + b"\ndef g():\n    return other\n")
+    introduced = sc.introduced_findings(str(sandbox), {str(path): original})
+    assert [(f["path"], f["message"]) for f in introduced] == [("mod.py", "name 'other' is not defined")]
+
+    new_file = sandbox / "new.py"
+    new_file.write_bytes(b"def h(:\n")
+    introduced = sc.introduced_findings(str(sandbox), {str(new_file): None, str(sandbox / "notes.txt"): b""})
+    assert [(f["path"], f["kind"]) for f in introduced] == [("new.py", "SyntaxError")]
+
+
+def test_static_check_tool(sandbox):
+    (sandbox / "pkg").mkdir()
+    (sandbox / "pkg" / "bad.py").write_text("print(late)\n")
+    (sandbox / "ok.py").write_text("x = 1\n")
+    report = sc.static_check(".")
+    assert report.startswith("Static errors: 1 in 1 of 2 Python files.")
+    assert "pkg/bad.py:1:7: UndefinedName" in report
+    assert sc.static_check("ok.py") == "No static errors in 1 Python files."
+
+
+@pytest.mark.parametrize("stderr, expected", [
+    ("Traceback ...\nValueError: bad\n", ""),
+    ("Traceback ...\nNameError: name 'late' is not defined\n", "--- STATIC CHECK (main.py"),
+])
+def test_failure_report(sandbox, stderr, expected):
+    (sandbox / "main.py").write_text("import helper\nprint(late)\n")
+    (sandbox / "helper.py").write_text("def f(:\n")
+    assert sc.failure_report(stderr, str(sandbox), "main.py").startswith(expected)
@@ -0,0 +1,35 @@
+from tools import file_index
+from tools.editor_tools import write_file
+from tools.tool_memo import fingerprint
+
+
+def test_tree_fingerprint_is_stable_without_changes(sandbox):
+    (sandbox / "a.py").write_text("x = 1\n")
+    assert fingerprint("grep_text", {"pattern": "x"}) == fingerprint("grep_text", {"pattern": "x"})
+
+
+def test_tree_fingerprint_changes_on_editor_write(sandbox):
+    (sandbox / "a.py").write_text("x = 1\n")
+    before = fingerprint("find_file", {"name": "*.py"})
+    write_file("b.py", "y = 2\n")
+    assert fingerprint("find_file", {"name": "*.py"}) != before
+
+
+def test_tree_fingerprint_changes_after_script_run(sandbox):
+    (sandbox / "a.py").write_text("x = 1\n")
+    before = fingerprint("list_files", {"recursive": True})
+    (sandbox / "pkg").mkdir()
+    file_index.mark_stale(str(sandbox))
+    assert fingerprint("list_files", {"recursive": True}) != before
+
+
+def test_single_file_fingerprint_follows_the_file(sandbox):
+    target = sandbox / "a.py"
+    target.write_text("x = 1\n")
+    before = fingerprint("read_header", {"path": "a.py"})
+    target.write_text("x = 10\n")
+    assert fingerprint("read_header", {"path": "a.py"}) != before
+
+
+def test_unknown_tool_is_not_memoized(sandbox):
+    assert fingerprint("write_file", {"path": "a.py"}) is None
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+from tools.traceback_parser import (extract_structured, fault_frame, format_structured,
+                                    parse_traceback)
+
+
+def run_script(tmp_path, source):
+    (tmp_path / "helper.py").write_text("def ratio(a, b):\n    return a / b\n")
+    (tmp_path / "main.py").write_text(source)
+    proc = subprocess.run([sys.executable, "main.py"], cwd=tmp_path, capture_output=True, text=True)
+    return proc.stderr
+
+
+def test_real_traceback(tmp_path):
+    stderr = run_script(tmp_path, "import json\nfrom helper import ratio\n\nprint(ratio(1, 0))\n")
+    parsed = parse_traceback(stderr, str(tmp_path))
+    assert parsed["exc_type"] == "ZeroDivisionError"
+    assert parsed["message"] == "division by zero"
+    assert [(f["path"], f["line"], f["function"]) for f in parsed["frames"]] == [
+        ("main.py", 4, "<module>"), ("helper.py", 2, "ratio")]
+    assert parsed["frames"][1]["context"] == ["     1 | def ratio(a, b):", ">    2 |     return a / b"]
+    assert fault_frame(parsed)["path"] == "helper.py"
+
+
+def test_frames_outside_sandbox(tmp_path):
+    stderr = run_script(tmp_path, "import json\n\njson.loads('{')\n")
+    parsed = parse_traceback(stderr, str(tmp_path))
+    assert parsed["exc_type"] == "json.decoder.JSONDecodeError"
+    outside = [f for f in parsed["frames"] if not f["in_sandbox"]]
+    assert outside and all(f["context"] == [] for f in outside)
+    assert fault_frame(parsed)["path"] == "main.py"
+    assert fault_frame({"frames": outside}) is None
+
+
+def test_last_traceback_wins(tmp_path):
+    stderr = (
+        "Traceback (most recent call last):\n"
+        '  File "a.py", line 1, in <module>\n'
+        "KeyError: 'x'\n"
+        "\nDuring handling of the above exception, another exception occurred:\n\n"
+        "Traceback (most recent call last):\n"
+        '  File "b.py", line 7, in run\n'
+        "    value = table[key]\n"
+        "ValueError: bad value: 3\n"
+    )
+    parsed = parse_traceback(stderr, str(tmp_path))
+    assert (parsed["exc_type"], parsed["message"]) == ("ValueError", "bad value: 3")
+    assert [(f["path"], f["line"]) for f in parsed["frames"]] == [("b.py", 7)]
+    # The file does not exist, so there is no context to show.
+    assert parsed["frames"][0]["context"] == []
+
+
+def test_bare_exception_and_missing_function(tmp_path):
+    stderr = 'Traceback (most recent call last):\n  File "<string>", line 1\nKeyboardInterrupt\n'
+    parsed = parse_traceback(stderr, str(tmp_path))
+    assert (parsed["exc_type"], parsed["message"]) == ("KeyboardInterrupt", "")
+    assert parsed["frames"][0]["function"] is None
+
+
+def test_no_traceback(tmp_path):
+    assert parse_traceback("all good\n", str(tmp_path)) is None
+
+
+def test_structured_round_trip():
+    parsed = {"exc_type": "TypeError", "message": "ünïcode", "frames": []}
+    output = "stdout text\n" + format_structured(parsed) + "\ntrailing noise\n"
+    assert extract_structured(output) == parsed
+    assert extract_structured("no marker here") is None
+    assert extract_structured(format_structured(parsed)[:-5]) is None
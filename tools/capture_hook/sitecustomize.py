@@ -0,0 +1,36 @@
+"""Loaded by scripts that `tools.process_capture` runs (this directory is put on PYTHONPATH).
+
+Writes one byte to the fd in HEALER_TRACEBACK_FD right after the interpreter has
+printed an uncaught exception, so the parent can tell a crash that is stuck on
+non-daemon threads or exit handlers from a traceback the script printed and
+survived. Must stay dependency-free: it runs inside the sandboxed script.
+"""
+import os
+import sys
+
+_fd = os.environ.pop("HEALER_TRACEBACK_FD", None)
+if _fd is not None:
+    _original_hook = sys.excepthook
+
+    def _signal_uncaught(exc_type, exc, tb):
+        _original_hook(exc_type, exc, tb)
+        try:
+            sys.stderr.flush()
+            os.write(int(_fd), b"1")
+        except (OSError, ValueError):
+            pass
+
+    sys.excepthook = _signal_uncaught
+
+# Hand over to the sitecustomize this module shadows, if the environment has one.
+_here = os.path.dirname(os.path.abspath(__file__))
+_saved_path = sys.path[:]
+_self = sys.modules.pop(__name__, None)
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != _here]
+try:
+    import sitecustomize  # noqa: F401
+except ImportError:
+    if _self is not None:
+        sys.modules[__name__] = _self
+finally:
+    sys.path[:] = _saved_path
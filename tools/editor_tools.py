@@ -1,29 +1,94 @@
+import bisect
+import difflib
 import os
 import re
-from typing import Optional
+import shutil
+import tempfile
+import time
+from itertools import accumulate
+from typing import List, Optional, Union
+from typing_extensions import TypedDict
 
 from config import config
-import os
-BASE_DIR = os.path.abspath(config.PROJECT_ROOT)
+from tools.sandbox import check_path as _check_path, get_base_dir
+from tools import file_index, interpreter_pool
+from tools.line_index import line_index
+from tools.snapshot import journal
 
-def _check_path(path: str):
-    joined_path = os.path.join(BASE_DIR, path)
-    full_path = os.path.abspath(joined_path)
+# Read once at import: os.umask can only be read by setting it, which is not thread-safe.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
-    if not full_path.startswith(BASE_DIR):
-        raise PermissionError(f"Access denied: {path} is outside the allowed sandbox: {BASE_DIR}")
-    
-    return full_path
+def _after_write(target: str):
+    base_dir = get_base_dir()
+    file_index.notify_write(base_dir, target)
+    interpreter_pool.notify_write(base_dir, target)
+    line_index.invalidate(target)
+
+def _atomic_write(target: str, content: Union[str, bytes]):
+    """Write through a temp file in the same directory and os.replace() it into place.
+    The previous contents are recorded in the active fix snapshot, if any."""
+    journal.record(get_base_dir(), target)
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        with f:
+            f.write(content)
+        if os.path.exists(target):
+            shutil.copymode(target, tmp_path)
+        else:
+            # mkstemp creates 0600; a new file gets the mode open() would have given it.
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def rollback_snapshot() -> Optional[dict]:
+    """Undo every edit made since the active fix snapshot began.
+
+    Returns the attempt number, the restored and removed paths (relative to the
+    sandbox) and the time it took, or None when no snapshot is active.
+    """
+    base_dir = get_base_dir()
+    snapshot = journal.take(base_dir)
+    if snapshot is None:
+        return None
+    started = time.perf_counter()
+    restored, removed = [], []
+    for target, original in snapshot.originals.items():
+        rel = os.path.relpath(target, base_dir)
+        if original is None:
+            try:
+                os.remove(target)
+                removed.append(rel)
+            except FileNotFoundError:
+                pass
+        else:
+            _atomic_write(target, original)
+            restored.append(rel)
+        _after_write(target)
+    return {
+        "attempt": snapshot.attempt,
+        "restored": sorted(restored),
+        "removed": sorted(removed),
+        "ms": round((time.perf_counter() - started) * 1000, 2),
+    }
 
 def write_file(path: str, content: str) -> str:
     """Write or overwrite a file with new content. Use this to create new files or fully rewrite existing ones."""
     try:
         target = _check_path(path)
-        
-        os.makedirs(os.path.dirname(target), exist_ok=True)
-        
-        with open(target, 'w', encoding='utf-8') as f:
-            f.write(content)
+        _atomic_write(target, content)
+        _after_write(target)
         return f"Successfully wrote to {path}."
     except Exception as e:
         return f"Error writing file: {str(e)}"
@@ -67,8 +132,8 @@ def patch_file(path: str, pattern: str, replacement: str, count: int = 1) -> str
             flags=re.DOTALL
         )
 
-        with open(target_abs_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
+        _atomic_write(target_abs_path, new_content)
+        _after_write(target_abs_path)
         
         return f"Successfully patched {path}."
     except PermissionError as pe:
@@ -87,8 +152,179 @@ def insert_line(path: str, line_number: int, content: str) -> str:
         idx = max(0, line_number - 1)
         lines.insert(idx, content + "\n")
         
-        with open(target, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
+        _atomic_write(target, "".join(lines))
+        _after_write(target)
         return f"Successfully inserted line at {line_number} in {path}."
     except Exception as e:
-        return f"Error inserting line: {str(e)}"
\ No newline at end of file
+        return f"Error inserting line: {str(e)}"
+
+
+class Edit(TypedDict, total=False):
+    old_text: str
+    new_text: str
+    start_line: int
+    end_line: int
+
+
+def _line_starts(content: str) -> List[int]:
+    """Offsets at which each "\n"-terminated line starts (computed without a Python-level loop)."""
+    lengths = map(len, content.split("\n")[:-1])
+    return list(accumulate(map((1).__add__, lengths), initial=0))
+
+
+def _split_lines(text: str) -> List[str]:
+    """Like str.splitlines(keepends=True), but only "\n" ends a line, matching _line_starts."""
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def _resolve_edit(i: int, edit: dict, content: str, starts: List[int]):
+    """Map one edit onto (start, end, replacement) offsets in `content`, or return an error string."""
+    new_text = edit.get("new_text", "")
+    if edit.get("old_text"):
+        old = edit["old_text"]
+        first = content.find(old)
+        if first == -1:
+            return f"hunk #{i}: old_text not found (check indentation and whitespace)."
+        second = content.find(old, first + 1)
+        if second != -1:
+            line_a = bisect.bisect_right(starts, first)
+            line_b = bisect.bisect_right(starts, second)
+            return (f"hunk #{i}: old_text is ambiguous, it matches at lines {line_a} and {line_b}"
+                    f"{' (and more)' if content.find(old, second + 1) != -1 else ''}. Add surrounding lines.")
+        return first, first + len(old), new_text
+
+    if "start_line" in edit:
+        n_lines = len(starts) - (1 if content.endswith("\n") or not content else 0)
+        start_line = edit["start_line"]
+        end_line = edit.get("end_line", start_line)
+        if start_line < 1 or end_line < start_line - 1 or end_line > n_lines or start_line > n_lines + 1:
+            return f"hunk #{i}: line range {start_line}-{end_line} is outside the file (1-{n_lines})."
+        start = starts[start_line - 1] if start_line - 1 < len(starts) else len(content)
+        end = starts[end_line] if end_line < len(starts) else len(content)
+        replaces_whole_lines = end == start or content[end - 1] == "\n"
+        if new_text and not new_text.endswith("\n") and replaces_whole_lines:
+            new_text += "\n"
+        if new_text and start == end == len(content) and content and not content.endswith("\n"):
+            # Appending after a last line that has no newline: end that line first.
+            new_text = "\n" + new_text
+        return start, end, new_text
+
+    return f"hunk #{i}: needs either old_text or start_line."
+
+
+def _unified_hunks(path: str, content: str, starts: List[int], resolved, context: int = 3) -> str:
+    """Unified diff built only from the edited regions, so it stays cheap on huge files."""
+    # Line span [first, last] touched by each edit; a pure insertion at a line start touches none.
+    spans = []
+    for start, end, replacement in resolved:
+        first = bisect.bisect_right(starts, start) - 1
+        if end == start and start == starts[first]:
+            last = first - 1
+        else:
+            last = bisect.bisect_right(starts, max(start, end - 1)) - 1
+        spans.append([first, last, [(start, end, replacement)]])
+
+    groups = []
+    for span in spans:
+        if groups and span[0] - groups[-1][1] <= 2 * context + 1:
+            groups[-1][1] = max(groups[-1][1], span[1])
+            groups[-1][2].extend(span[2])
+        else:
+            groups.append(span)
+
+    out = [f"--- a/{path}\n", f"+++ b/{path}\n"]
+    delta = 0
+    for first, last, edits in groups:
+        region_start = starts[first] if first < len(starts) else len(content)
+        region_end = starts[last + 1] if last + 1 < len(starts) else len(content)
+        pieces, cursor = [], region_start
+        for start, end, replacement in edits:
+            pieces.append(content[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        pieces.append(content[cursor:region_end])
+
+        removed = _split_lines(content[region_start:region_end])
+        added = _split_lines("".join(pieces))
+        before_start = starts[max(0, first - context)]
+        before = _split_lines(content[before_start:region_start])
+        after_end = starts[last + 1 + context] if last + 1 + context < len(starts) else len(content)
+        after = _split_lines(content[region_end:after_end])
+        old_start = first - len(before) + 1
+        old_len = len(before) + len(removed) + len(after)
+        new_len = len(before) + len(added) + len(after)
+        out.append(f"@@ -{old_start},{old_len} +{old_start + delta},{new_len} @@\n")
+        out.extend(" " + line for line in before)
+        # The region is small, so a line-level diff inside it is cheap and keeps the hunk minimal.
+        for tag, a0, a1, b0, b1 in difflib.SequenceMatcher(None, removed, added, autojunk=False).get_opcodes():
+            if tag == "equal":
+                out.extend(" " + line for line in removed[a0:a1])
+            else:
+                out.extend("-" + line for line in removed[a0:a1])
+                out.extend("+" + line for line in added[b0:b1])
+        out.extend(" " + line for line in after)
+        delta += len(added) - len(removed)
+    return "".join(line if line.endswith("\n") else line + "\n" for line in out)
+
+
+def apply_edits(path: str, edits: List[Edit]) -> str:
+    """Apply several edits to ONE file in a single atomic step and return a unified diff.
+
+    Each edit is one of:
+      - {"old_text": "...", "new_text": "..."}: replace an exact literal snippet. The snippet
+        must occur exactly once in the file; include surrounding lines to disambiguate.
+      - {"start_line": A, "end_line": B, "new_text": "..."}: replace lines A..B (1-based,
+        inclusive). Use end_line = A - 1 to insert before line A without removing anything.
+
+    All edits are matched against the ORIGINAL file content (line numbers do not shift between
+    edits) and must not overlap. If any edit fails, nothing is written and every failing edit is
+    reported, so fix those and resend the whole list.
+
+    Args:
+        path: The relative path to the target file.
+        edits: The list of edits described above.
+    """
+    try:
+        target = _check_path(path)
+        if not os.path.isfile(target):
+            return f"Error: File '{path}' not found in project root."
+        if not edits:
+            return "Error: No edits given."
+
+        with open(target, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
+        starts = _line_starts(content)
+
+        resolved, errors = [], []
+        for i, edit in enumerate(edits, 1):
+            result = _resolve_edit(i, edit, content, starts)
+            if isinstance(result, str):
+                errors.append(result)
+            else:
+                resolved.append((i, *result))
+
+        resolved.sort(key=lambda r: (r[1], r[2]))
+        for (i, _, end_a, _), (j, start_b, _, _) in zip(resolved, resolved[1:]):
+            if start_b < end_a:
+                errors.append(f"hunk #{j}: overlaps hunk #{i}.")
+        if errors:
+            errors.sort(key=lambda e: int(e.split("#", 1)[1].split(":", 1)[0]))
+            return f"Error: {len(errors)} of {len(edits)} edits failed; nothing was written to {path}.\n" + "\n".join(errors)
+
+        pieces, cursor = [], 0
+        for _, start, end, replacement in resolved:
+            pieces.append(content[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        pieces.append(content[cursor:])
+
+        _atomic_write(target, "".join(pieces))
+        _after_write(target)
+        diff = _unified_hunks(path, content, starts, [r[1:] for r in resolved])
+        return f"Successfully applied {len(resolved)} edits to {path}.\n{diff}"
+    except PermissionError as pe:
+        return str(pe)
+    except Exception as e:
+        return f"Error applying edits: {str(e)}"
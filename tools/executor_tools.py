@@ -1,26 +1,44 @@
-import subprocess
 import os
 import sys
 from typing import List, Optional
-from langchain_core.tools import tool
 
 from config import config
-import os
-BASE_DIR = os.path.abspath(config.PROJECT_ROOT)
+from tools.sandbox import check_path as _check_path, get_base_dir
+from tools import file_index, interpreter_pool
+from tools.process_capture import CaptureResult, run_captured
+from tools.static_check import failure_report
+from tools.traceback_parser import format_structured, parse_traceback
+from utils.tracing import span
 
-def _check_path(path: str):
-    joined_path = os.path.join(BASE_DIR, path)
-    full_path = os.path.abspath(joined_path)
+_STOP_REASONS = {
+    "timeout": "Script execution timed out (limit: {timeout}s)",
+    "output_budget": "Script was stopped after producing more than {budget} bytes of output",
+    "traceback": "Script raised an uncaught exception but had not exited {grace}s later (non-daemon threads or exit handlers?), so it was stopped",
+}
 
-    if not full_path.startswith(BASE_DIR):
-        raise PermissionError(f"Access denied: {path} is outside the allowed sandbox: {BASE_DIR}")
-    
-    return full_path
 
-@tool
+def _execute(target_script: str, script_args: List[str], timeout: int = 30) -> CaptureResult:
+    """Run a script from the sandbox root, through the warm interpreter pool when enabled."""
+    base_dir = get_base_dir()
+    if config.EXECUTOR_USE_POOL:
+        try:
+            return interpreter_pool.get_pool(base_dir).run(target_script, script_args, timeout)
+        except (RuntimeError, OSError):
+            # Fall back to a cold interpreter if the pool is unavailable.
+            pass
+
+    return run_captured([sys.executable, target_script, *script_args], base_dir, timeout)
+
+
+def _omitted_note(stream: str, omitted: int, total: int) -> str:
+    return f"[{stream}: {total} bytes, {omitted} bytes omitted from the middle]" if omitted else ""
+
 def run_python_script(script_path: str, script_args: List[str] = None) -> str:
     """
     Execute a Python script and return its STDOUT and STDERR. 
+    If the script raised, a structured JSON traceback (exception, message, frames with
+    sandbox-relative paths, line numbers and source context) is appended after STDERR.
+    If it died of a syntax or name error, every such error in the modules it imports is listed too.
     
     Args:
         script_path: The relative path to the python script to run.
@@ -35,30 +53,40 @@ def run_python_script(script_path: str, script_args: List[str] = None) -> str:
         if not os.path.exists(target_script):
             return f"Error: File {script_path} not found."
 
-        cmd = [sys.executable, target_script]
-        cmd.extend(script_args)
-
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=BASE_DIR
-        )
+        try:
+            with span("subprocess", "subprocess", script=script_path, pooled=config.EXECUTOR_USE_POOL) as s:
+                result = _execute(target_script, script_args)
+                s.set(returncode=result.returncode, bytes_out=result.stdout_bytes + result.stderr_bytes,
+                      stopped=result.stopped)
+        finally:
+            # The script may have created or modified files in the sandbox.
+            file_index.mark_stale(get_base_dir())
 
         output = []
+        if result.stopped == "timeout":
+            # Keep the historical first line, which callers match on.
+            output.append("Error: " + _STOP_REASONS["timeout"].format(timeout=30) + ".")
+        elif result.stopped:
+            output.append("--- NOTE --- " + _STOP_REASONS[result.stopped].format(
+                budget=config.EXECUTOR_OUTPUT_BUDGET, grace=config.EXECUTOR_TRACEBACK_GRACE) + ".")
+
         if result.stdout:
             output.append(f"--- STDOUT ---\n{result.stdout}")
-        
+            output.append(_omitted_note("STDOUT", result.stdout_omitted, result.stdout_bytes))
+
         if result.stderr:
             output.append(f"--- STDERR (Potential Bugs) ---\n{result.stderr}")
-        
-        if not result.stdout and not result.stderr:
+            output.append(_omitted_note("STDERR", result.stderr_omitted, result.stderr_bytes))
+            traceback = parse_traceback(result.stderr, get_base_dir())
+            if traceback:
+                output.append(format_structured(traceback))
+            entry = os.path.relpath(target_script, get_base_dir()).replace(os.sep, "/")
+            output.append(failure_report(result.stderr, get_base_dir(), entry))
+
+        if not output:
             return "Script executed successfully with no output."
-        
-        return "\n".join(output)
 
-    except subprocess.TimeoutExpired:
-        return "Error: Script execution timed out (limit: 30s)."
+        return "\n".join(line for line in output if line)
+
     except Exception as e:
         return f"Error during execution: {str(e)}"
\ No newline at end of file
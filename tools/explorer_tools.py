@@ -1,31 +1,17 @@
 import os
-import subprocess
 from typing import Optional
 
 from config import config
-import os
-BASE_DIR = os.path.abspath(config.PROJECT_ROOT)
-
-def _check_path(path: str):
-    joined_path = os.path.join(BASE_DIR, path)
-    full_path = os.path.abspath(joined_path)
-
-    if not full_path.startswith(BASE_DIR):
-        raise PermissionError(f"Access denied: {path} is outside the allowed sandbox: {BASE_DIR}")
-    
-    return full_path
+from tools.sandbox import check_path as _check_path, get_base_dir
+from tools.file_index import get_index
+from tools.line_index import line_index
 
 def list_files(path: str = ".", recursive: bool = False) -> str:
     """List files in the specified directory. Set recursive=True to see all subdirectories."""
     try:
         target = _check_path(path)
         if recursive:
-            res = []
-            for root, dirs, files in os.walk(target):
-                rel_path = os.path.relpath(root, target)
-                prefix = "" if rel_path == "." else rel_path + "/"
-                for f in files:
-                    res.append(f"{prefix}{f}")
+            res = get_index(get_base_dir()).list_files(target)
             return "\n".join(res) if res else "Directory is empty."
         else:
             files = os.listdir(target)
@@ -37,28 +23,25 @@ def find_file(name: str, path: str = ".") -> str:
     """Search for files matching a specific name pattern within a directory."""
     try:
         target = _check_path(path)
-        cmd = ["find", target, "-name", f"*{name}*", "-not", "-path", "*/.*"]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.stdout:
-            paths = [os.path.relpath(p, BASE_DIR) for p in result.stdout.strip().split('\n')]
+        paths = get_index(get_base_dir()).find(f"*{name}*", target)
+        if paths:
             return "\n".join(paths)
         return f"No files found matching '{name}'."
     except Exception as e:
         return f"Error finding file: {str(e)}"
 
-def grep_text(pattern: str, path: str = ".", file_type: str = "*") -> str:
-    """Search for a specific text pattern/string inside files (similar to the grep command)."""
+def grep_text(pattern: str, path: str = ".", file_type: str = "*", context: int = 0, max_per_file: int = 0) -> str:
+    """Search for a specific text pattern/string inside files (similar to the grep command).
+    Set context to also show that many lines around each match, and max_per_file to cap matches per file."""
     try:
         target = _check_path(path)
-        cmd = ["grep", "-rnI", f"--include={file_type}", pattern, target]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        
-        if result.stdout:
-            lines = result.stdout.split('\n')
-            if len(lines) > 50:
-                return "\n".join(lines[:50]) + f"\n... (Total {len(lines)} matches found, showing first 50)"
-            return result.stdout
+        lines, found, stopped = get_index(get_base_dir()).grep(
+            pattern, target, file_type, context=context, max_per_file=max_per_file)
+
+        if lines:
+            if stopped:
+                return "\n".join(lines) + f"\n... (stopped after the first {found} matches; narrow the path or pattern to see more)"
+            return "\n".join(lines)
         return f"No matches found for '{pattern}'."
     except Exception as e:
         return f"Error running grep: {str(e)}"
@@ -77,4 +60,36 @@ def read_header(path: str, line_count: int = 20) -> str:
         with open(target, 'r', encoding='utf-8') as f:
             return f.read()
     except Exception as e:
-        return f"Error reading header: {str(e)}"
\ No newline at end of file
+        return f"Error reading header: {str(e)}"
+
+def _format_range(path: str, target: str, start: int, end: int) -> str:
+    total = line_index.line_count(target)
+    lines = line_index.read_lines(target, start, end)
+    if not lines:
+        return f"Error: {path} has {total} lines; lines {start}-{end} do not exist."
+    start = max(1, start)
+    body = "\n".join(f"{n:6d}\t{line}" for n, line in enumerate(lines, start))
+    return f"--- {path}: lines {start}-{start + len(lines) - 1} of {total} ---\n{body}"
+
+def read_range(path: str, start_line: int, end_line: int) -> str:
+    """Read lines start_line..end_line (1-based, inclusive) of a file, prefixed with line numbers.
+    Use this instead of read_header to look at code deep inside a large file, e.g. a traceback line.
+    The line-number prefix is NOT part of the file content."""
+    try:
+        target = _check_path(path)
+        if not os.path.isfile(target):
+            return f"Error: {path} is not a file."
+        return _format_range(path, target, start_line, end_line)
+    except Exception as e:
+        return f"Error reading range: {str(e)}"
+
+def read_around(path: str, line: int, context: int = 20) -> str:
+    """Read a window of `context` lines before and after `line` (1-based) of a file, prefixed with line numbers.
+    The line-number prefix is NOT part of the file content."""
+    try:
+        target = _check_path(path)
+        if not os.path.isfile(target):
+            return f"Error: {path} is not a file."
+        return _format_range(path, target, line - context, line + context)
+    except Exception as e:
+        return f"Error reading range: {str(e)}"
@@ -0,0 +1,343 @@
+import os
+import re
+import fnmatch
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import config
+from tools import search_engine
+
+_TOKEN_RE = re.compile(r"\w+")
+_BRE_META = set(".*[]^$\\")
+
+
+def _bre_to_re(pattern: str) -> str:
+    """Translate a grep basic regular expression into Python `re` syntax."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            out.append(nxt if nxt in "()|+?{}" else c + nxt)
+            i += 2
+            continue
+        out.append("\\" + c if c in "()|+?{}" else c)
+        i += 1
+    return "".join(out)
+
+
+def compile_grep_pattern(pattern: str) -> "re.Pattern":
+    return re.compile(_bre_to_re(pattern))
+
+
+def _required_literals(pattern: str) -> List[str]:
+    """Literal runs that every match of the BRE `pattern` must contain.
+
+    A quantified atom ends the run before it, and is dropped from it when it may
+    match zero times (`*`, `\\?`, `\\{m,n\\}`); so are the runs inside a group that is.
+    """
+    if "\\|" in pattern:
+        return []
+    segments, current, groups = [], [], []
+
+    def close():
+        segments.append("".join(current))
+        current.clear()
+
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        if c == "\\" and i < len(pattern):
+            nxt = pattern[i]
+            i += 1
+            if nxt in _BRE_META:
+                current.append(nxt)
+                continue
+            if nxt in "?{" and current:
+                current.pop()
+            close()
+            if nxt == "{":
+                end = pattern.find("\\}", i)
+                i = len(pattern) if end == -1 else end + 2
+            elif nxt == "(":
+                groups.append(len(segments))
+            elif nxt == ")" and groups:
+                opened = groups.pop()
+                if pattern.startswith(("*", "\\?", "\\{"), i):
+                    del segments[opened:]
+        elif c in _BRE_META:
+            if c == "*" and current:
+                current.pop()
+            elif c == "[":
+                # Skip the whole bracket expression; a "]" right after "[" or "[^" is a member.
+                j = i + 1 if pattern.startswith("^", i) else i
+                end = pattern.find("]", j + 1)
+                i = len(pattern) if end == -1 else end + 1
+            close()
+        else:
+            current.append(c)
+    close()
+    return [s for s in segments if len(s) >= 3]
+
+
+def _is_binary(chunk: bytes) -> bool:
+    return b"\0" in chunk[:8192]
+
+
+class FileIndex:
+    """In-memory index of a sandbox tree: paths, sizes, mtimes and a token index over contents.
+
+    The index is built on first use and kept current incrementally: editor tools push
+    writes through `update_path`, script runs call `mark_stale`, and anything else is
+    picked up by a stat-only rescan at most every `INDEX_RESCAN_INTERVAL` seconds.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.RLock()
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._dirs: Set[str] = set()
+        self._tokens: Dict[str, Set[str]] = {}
+        self._file_tokens: Dict[str, frozenset] = {}
+        self._binary: Set[str] = set()
+        self._unindexed: Set[str] = set()
+        self._built = False
+        self._last_scan = 0.0
+        # Bumped whenever the index may no longer match what callers saw before.
+        self._generation = 0
+
+    # ---- maintenance -------------------------------------------------
+
+    def _rel(self, full_path: str) -> str:
+        return os.path.relpath(full_path, self.root).replace(os.sep, "/")
+
+    def _scan(self) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+        files, dirs = {}, set()
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.add(self._rel(entry.path))
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files[self._rel(entry.path)] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return files, dirs
+
+    def _drop_tokens(self, rel: str):
+        for token in self._file_tokens.pop(rel, ()):
+            postings = self._tokens.get(token)
+            if postings is not None:
+                postings.discard(rel)
+                if not postings:
+                    del self._tokens[token]
+        self._binary.discard(rel)
+        self._unindexed.discard(rel)
+
+    def _index_content(self, rel: str, size: int):
+        self._drop_tokens(rel)
+        if size > config.INDEX_MAX_FILE_BYTES:
+            self._unindexed.add(rel)
+            return
+        try:
+            with open(os.path.join(self.root, rel), "rb") as f:
+                data = f.read()
+        except OSError:
+            self._unindexed.add(rel)
+            return
+        if _is_binary(data):
+            self._binary.add(rel)
+            return
+        tokens = frozenset(_TOKEN_RE.findall(data.decode("utf-8", errors="replace")))
+        self._file_tokens[rel] = tokens
+        for token in tokens:
+            self._tokens.setdefault(token, set()).add(rel)
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """Bring the index up to date with the disk. Returns the changed relative paths."""
+        with self._lock:
+            now = time.monotonic()
+            if self._built and not force and now - self._last_scan < config.INDEX_RESCAN_INTERVAL:
+                return []
+            files, dirs = self._scan()
+            changed = []
+            for rel in set(self._files) - set(files):
+                self._drop_tokens(rel)
+                changed.append(rel)
+            for rel, stat in files.items():
+                if self._files.get(rel) != stat:
+                    self._index_content(rel, stat[0])
+                    changed.append(rel)
+            if changed or dirs != self._dirs:
+                self._generation += 1
+            self._files, self._dirs = files, dirs
+            self._built = True
+            self._last_scan = time.monotonic()
+            return changed
+
+    def mark_stale(self):
+        """Force the next query to rescan, e.g. after a script that may have written files."""
+        with self._lock:
+            self._last_scan = 0.0
+            self._generation += 1
+
+    def update_path(self, full_path: str):
+        """Re-index a single file after it was written or removed."""
+        with self._lock:
+            if not self._built:
+                return
+            rel = self._rel(full_path)
+            self._generation += 1
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                self._files.pop(rel, None)
+                self._drop_tokens(rel)
+                return
+            self._files[rel] = (st.st_size, st.st_mtime_ns)
+            parent = os.path.dirname(rel)
+            while parent and parent not in self._dirs:
+                self._dirs.add(parent)
+                parent = os.path.dirname(parent)
+            self._index_content(rel, st.st_size)
+
+    # ---- queries -----------------------------------------------------
+
+    def _under(self, rel_dir: str, rel: str) -> bool:
+        return rel_dir in ("", ".") or rel == rel_dir or rel.startswith(rel_dir + "/")
+
+    def list_files(self, target: str) -> List[str]:
+        """Files below `target`, relative to `target`."""
+        self.refresh()
+        with self._lock:
+            rel_dir = self._rel(target)
+            if rel_dir in self._files:
+                return [os.path.basename(rel_dir)]
+            prefix_len = 0 if rel_dir == "." else len(rel_dir) + 1
+            return sorted(rel[prefix_len:] for rel in self._files if self._under(rel_dir, rel))
+
+    def file_stats(self, suffix: str = "") -> Dict[str, Tuple[int, int]]:
+        """(size, mtime_ns) of every file whose name ends with `suffix`, keyed by relative path."""
+        self.refresh()
+        with self._lock:
+            return {rel: stat for rel, stat in self._files.items() if rel.endswith(suffix)}
+
+    def generation(self) -> int:
+        """Counter that changes whenever a file or directory in the tree may have changed."""
+        self.refresh()
+        with self._lock:
+            return self._generation
+
+    def find(self, name_glob: str, target: str) -> List[str]:
+        """Non-hidden files and directories below `target` whose basename matches `name_glob`."""
+        self.refresh()
+        with self._lock:
+            rel_dir = self._rel(target)
+            matches = re.compile(fnmatch.translate(name_glob)).match
+            results = []
+            for rel in (*self._files, *self._dirs):
+                if not matches(rel.rpartition("/")[2]) or not self._under(rel_dir, rel):
+                    continue
+                if rel.startswith(".") or "/." in rel:
+                    continue
+                results.append(rel)
+            return sorted(results)
+
+    def _token_candidates(self, literal: str) -> Optional[Set[str]]:
+        candidates = None
+        for match in _TOKEN_RE.finditer(literal):
+            token = match.group()
+            left_open = match.start() == 0
+            right_open = match.end() == len(literal)
+            if not left_open and not right_open:
+                files = set(self._tokens.get(token, ()))
+            else:
+                files = set()
+                for vocab, postings in self._tokens.items():
+                    if left_open and right_open:
+                        hit = token in vocab
+                    elif left_open:
+                        hit = vocab.endswith(token)
+                    else:
+                        hit = vocab.startswith(token)
+                    if hit:
+                        files |= postings
+            candidates = files if candidates is None else candidates & files
+            if not candidates:
+                return set()
+        return candidates
+
+    def grep_candidates(self, pattern: str, target: str, file_type: str = "*") -> List[str]:
+        """Text files below `target` that may contain a match for the BRE `pattern`."""
+        self.refresh()
+        with self._lock:
+            rel_dir = self._rel(target)
+            allowed = None
+            for literal in _required_literals(pattern):
+                found = self._token_candidates(literal)
+                if found is None:
+                    continue
+                allowed = found if allowed is None else allowed & found
+            scope = self._files if allowed is None else (allowed | self._unindexed) & self._files.keys()
+            matches = None if file_type == "*" else re.compile(fnmatch.translate(file_type)).match
+            return sorted(
+                rel for rel in scope
+                if rel not in self._binary
+                and self._under(rel_dir, rel)
+                and (matches is None or matches(rel.rpartition("/")[2]))
+            )
+
+    def grep(self, pattern: str, target: str, file_type: str = "*", max_results: int = None,
+             context: int = 0, max_per_file: int = 0) -> Tuple[List[str], int, bool]:
+        """Matching lines formatted like `grep -rn`: `<abs path>:<line>:<text>`.
+
+        Candidates are streamed through the search engine, which stops reading
+        files as soon as `max_results` matches are found. Returns (lines, number
+        of matches, whether the search stopped early).
+        """
+        regex = compile_grep_pattern(pattern)
+        files = (
+            os.path.join(self.root, rel)
+            for rel in self.grep_candidates(pattern, target, file_type)
+            if not search_engine.is_ignored(rel)
+        )
+        return search_engine.search(regex, files, max_results or config.GREP_MAX_RESULTS,
+                                    context=context, max_per_file=max_per_file)
+
+
+_indexes: Dict[str, FileIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_index(root: str) -> FileIndex:
+    """Return the shared index for a sandbox root, creating it on first use."""
+    root = os.path.abspath(root)
+    with _registry_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = FileIndex(root)
+        return index
+
+
+def notify_write(root: str, full_path: str):
+    """Tell an already-built index that `full_path` changed on disk."""
+    index = _indexes.get(os.path.abspath(root))
+    if index is not None:
+        index.update_path(full_path)
+
+
+def mark_stale(root: str):
+    index = _indexes.get(os.path.abspath(root))
+    if index is not None:
+        index.mark_stale()
@@ -0,0 +1,245 @@
+import ast
+import os
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from tools import file_index
+from tools.search_engine import is_ignored
+
+
+class ModuleInfo(NamedTuple):
+    path: str
+    # Sandbox modules this one imports, as relative paths.
+    imports: Set[str]
+    # Top-level functions, classes and assignments, plus "Class.method", mapped to line numbers.
+    symbols: Dict[str, int]
+    # Has an `if __name__ == "__main__":` block.
+    is_entry: bool
+    is_test: bool
+
+
+def module_name(rel_path: str) -> str:
+    parts = rel_path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    names = [node.test.left, *node.test.comparators]
+    return any(isinstance(n, ast.Name) and n.id == "__name__" for n in names) and \
+        any(isinstance(n, ast.Constant) and n.value == "__main__" for n in names)
+
+
+def _symbols(tree: ast.Module) -> Dict[str, int]:
+    symbols = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols[node.name] = node.lineno
+        elif isinstance(node, ast.ClassDef):
+            symbols[node.name] = node.lineno
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    symbols[f"{node.name}.{item.name}"] = item.lineno
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    symbols.setdefault(target.id, node.lineno)
+    return symbols
+
+
+class ImportGraph:
+    """AST-level module dependency graph of a sandbox.
+
+    Files are parsed on first use and re-parsed only when their (size, mtime)
+    in the shared file index changes, so edits made through the editor tools
+    (which update the index) are picked up incrementally.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.RLock()
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._raw_imports: Dict[str, List[Tuple[str, int, List[str]]]] = {}
+        self._modules: Dict[str, ModuleInfo] = {}
+        self._importers: Optional[Dict[str, Set[str]]] = None
+
+    # ---- maintenance -------------------------------------------------
+
+    def _parse(self, rel: str):
+        """Record raw (module, level, names) imports and the symbols of one file."""
+        try:
+            with open(os.path.join(self.root, rel), "rb") as f:
+                tree = ast.parse(f.read(), filename=rel)
+        except (OSError, SyntaxError, ValueError):
+            tree = ast.Module(body=[], type_ignores=[])
+        raw = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                raw.extend((alias.name, 0, []) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                raw.append((node.module or "", node.level, [alias.name for alias in node.names]))
+        self._raw_imports[rel] = raw
+        name = os.path.basename(rel)
+        self._modules[rel] = ModuleInfo(
+            path=rel,
+            imports=set(),
+            symbols=_symbols(tree),
+            is_entry=any(_is_main_guard(node) for node in tree.body),
+            is_test=name.startswith("test_") or name.endswith("_test.py"),
+        )
+
+    def _resolve(self, rel: str, module: str, level: int, names: List[str], by_name: Dict[str, str]) -> Set[str]:
+        if level:
+            package = module_name(rel).split(".")
+            if not rel.endswith("__init__.py"):
+                package = package[:-1]
+            package = package[:len(package) - (level - 1)] if level > 1 else package
+            module = ".".join([*package, module] if module else package)
+        found = set()
+        if module in by_name:
+            found.add(by_name[module])
+        for name in names:
+            submodule = f"{module}.{name}" if module else name
+            if submodule in by_name:
+                found.add(by_name[submodule])
+        # `import a.b.c` also imports the packages a and a.b.
+        parts = module.split(".")
+        for i in range(1, len(parts)):
+            parent = ".".join(parts[:i])
+            if parent in by_name:
+                found.add(by_name[parent])
+        found.discard(rel)
+        return found
+
+    def refresh(self) -> List[str]:
+        """Re-parse changed .py files and re-link imports. Returns the changed paths."""
+        stats = {rel: st for rel, st in file_index.get_index(self.root).file_stats(".py").items()
+                 if not is_ignored(rel)}
+        with self._lock:
+            changed = [rel for rel, st in stats.items() if self._stats.get(rel) != st]
+            removed = [rel for rel in self._stats if rel not in stats]
+            if not changed and not removed:
+                return []
+            for rel in removed:
+                self._raw_imports.pop(rel, None)
+                self._modules.pop(rel, None)
+            for rel in changed:
+                self._parse(rel)
+            self._stats = stats
+            # Module names can appear or disappear, so links are recomputed for every file;
+            # this is cheap next to parsing, which only happens for changed files.
+            by_name = {module_name(rel): rel for rel in self._modules}
+            for rel, info in self._modules.items():
+                info.imports.clear()
+                for module, level, names in self._raw_imports[rel]:
+                    info.imports.update(self._resolve(rel, module, level, names, by_name))
+            self._importers = None
+            return changed + removed
+
+    def _reverse(self) -> Dict[str, Set[str]]:
+        if self._importers is None:
+            importers: Dict[str, Set[str]] = {rel: set() for rel in self._modules}
+            for rel, info in self._modules.items():
+                for dep in info.imports:
+                    importers.setdefault(dep, set()).add(rel)
+            self._importers = importers
+        return self._importers
+
+    # ---- queries -----------------------------------------------------
+
+    def module(self, rel: str) -> Optional[ModuleInfo]:
+        self.refresh()
+        return self._modules.get(rel)
+
+    def importees(self, rel: str) -> Set[str]:
+        info = self.module(rel)
+        return set(info.imports) if info else set()
+
+    def importers(self, rel: str) -> Set[str]:
+        self.refresh()
+        with self._lock:
+            return set(self._reverse().get(rel, ()))
+
+    def dependents(self, paths: Iterable[str]) -> Set[str]:
+        """`paths` plus every module that transitively imports one of them."""
+        self.refresh()
+        with self._lock:
+            importers = self._reverse()
+            seen, stack = set(), [p for p in paths if p in self._modules]
+            while stack:
+                rel = stack.pop()
+                if rel in seen:
+                    continue
+                seen.add(rel)
+                stack.extend(importers.get(rel, ()))
+            return seen
+
+    def dependencies(self, paths: Iterable[str]) -> Set[str]:
+        """`paths` plus every sandbox module they transitively import."""
+        self.refresh()
+        with self._lock:
+            seen, stack = set(), [p for p in paths if p in self._modules]
+            while stack:
+                rel = stack.pop()
+                if rel in seen:
+                    continue
+                seen.add(rel)
+                stack.extend(self._modules[rel].imports)
+            return seen
+
+    def affected_targets(self, paths: Iterable[str]) -> List[str]:
+        """Entry points and tests that need re-running after `paths` changed."""
+        return sorted(rel for rel in self.dependents(paths)
+                      if self._modules[rel].is_entry or self._modules[rel].is_test)
+
+    def import_chain(self, source: str, target: str) -> Optional[List[str]]:
+        """Shortest import path from module `source` to module `target`, inclusive."""
+        self.refresh()
+        with self._lock:
+            previous = {source: None}
+            frontier = [source]
+            while frontier:
+                next_frontier = []
+                for rel in frontier:
+                    if rel == target:
+                        chain = []
+                        while rel is not None:
+                            chain.append(rel)
+                            rel = previous[rel]
+                        return chain[::-1]
+                    info = self._modules.get(rel)
+                    for dep in sorted(info.imports if info else ()):
+                        if dep not in previous:
+                            previous[dep] = rel
+                            next_frontier.append(dep)
+                frontier = next_frontier
+            return None
+
+    def find_symbol(self, name: str) -> List[Tuple[str, int]]:
+        """(path, line) of every definition of `name` (or `Class.name`) in the sandbox."""
+        self.refresh()
+        with self._lock:
+            hits = []
+            for rel, info in self._modules.items():
+                for symbol, line in info.symbols.items():
+                    if symbol == name or symbol.endswith("." + name):
+                        hits.append((rel, line))
+            return sorted(hits)
+
+
+_graphs: Dict[str, ImportGraph] = {}
+_registry_lock = threading.Lock()
+
+
+def get_graph(root: str) -> ImportGraph:
+    """Return the shared import graph for a sandbox root, creating it on first use."""
+    root = os.path.abspath(root)
+    with _registry_lock:
+        graph = _graphs.get(root)
+        if graph is None:
+            graph = _graphs[root] = ImportGraph(root)
+        return graph
@@ -0,0 +1,142 @@
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import config
+from tools.process_capture import CaptureResult, read_bounded
+
+_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pool_server.py")
+
+
+class InterpreterPool:
+    """A pre-warmed interpreter that forks a clean child for every script run.
+
+    The server process imports `preload` once; each run then pays only for `fork()`
+    instead of interpreter startup plus those imports. If a sandbox file that was
+    imported during the preload is edited, the pool shuts down and is restarted on
+    the next run so no stale module is ever served.
+    """
+
+    def __init__(self, base_dir: str, preload: List[str]):
+        self.base_dir = os.path.abspath(base_dir)
+        self.preload = list(preload)
+        self._proc: Optional[subprocess.Popen] = None
+        self._sandbox_files = set()
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            [sys.executable, _SERVER_SCRIPT, self.base_dir, *self.preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            # Output of the preloaded modules; the scripts' own output goes to temp files.
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=self.base_dir,
+        )
+        ready = self._read_response(config.EXECUTOR_POOL_START_TIMEOUT, "ready")
+        self._sandbox_files = set(ready["sandbox_files"])
+
+    def _read_response(self, timeout: float, *fields: str) -> dict:
+        """The server's next message. Any failure is a RuntimeError, so callers fall back."""
+        readable, _, _ = select.select([self._proc.stdout], [], [], timeout)
+        if not readable:
+            raise RuntimeError(f"interpreter pool did not answer within {timeout:g}s")
+        line = self._proc.stdout.readline()
+        if not line:
+            raise RuntimeError("interpreter pool exited unexpectedly")
+        try:
+            message = json.loads(line)
+            missing = [field for field in fields if field not in message]
+        except (ValueError, TypeError) as e:
+            raise RuntimeError(f"interpreter pool sent a malformed message: {line[:200]!r}") from e
+        if missing:
+            raise RuntimeError(f"interpreter pool message lacks {', '.join(missing)}: {line[:200]!r}")
+        return message
+
+    def run(self, script: str, args: List[str], timeout: float) -> CaptureResult:
+        """Run `script` in a forked child, with the same bounded capture as `run_captured`.
+
+        The child writes to temp files; only their head and tail are read back, and the
+        server kills the child once the files outgrow EXECUTOR_OUTPUT_BUDGET.
+        """
+        started = time.monotonic()
+        with self._lock:
+            try:
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                request = {"script": script, "args": list(args), "timeout": timeout,
+                           "max_output": config.EXECUTOR_OUTPUT_BUDGET}
+                self._proc.stdin.write(json.dumps(request) + "\n")
+                self._proc.stdin.flush()
+                response = self._read_response(timeout + 10, "returncode", "stdout_path", "stderr_path", "stopped")
+            except Exception:
+                self._shutdown()
+                raise
+
+        try:
+            stdout = read_bounded(response["stdout_path"])
+            stderr = read_bounded(response["stderr_path"])
+        finally:
+            for key in ("stdout_path", "stderr_path"):
+                try:
+                    os.remove(response[key])
+                except OSError:
+                    pass
+
+        return CaptureResult(
+            returncode=response["returncode"],
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            stdout_bytes=stdout.total,
+            stderr_bytes=stderr.total,
+            stdout_omitted=stdout.omitted,
+            stderr_omitted=stderr.omitted,
+            stopped=response["stopped"],
+            seconds=time.monotonic() - started,
+        )
+
+    def invalidate(self, full_path: str):
+        """Restart the pool if `full_path` was imported while warming up."""
+        with self._lock:
+            if os.path.abspath(full_path) in self._sandbox_files:
+                self._shutdown()
+
+    def _shutdown(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+            except Exception:
+                pass
+        self._proc = None
+        self._sandbox_files = set()
+
+    def close(self):
+        with self._lock:
+            self._shutdown()
+
+
+_pools: Dict[str, InterpreterPool] = {}
+_registry_lock = threading.Lock()
+
+
+def get_pool(base_dir: str) -> InterpreterPool:
+    base_dir = os.path.abspath(base_dir)
+    with _registry_lock:
+        pool = _pools.get(base_dir)
+        if pool is None:
+            pool = _pools[base_dir] = InterpreterPool(base_dir, config.EXECUTOR_PRELOAD_MODULES)
+        return pool
+
+
+def notify_write(base_dir: str, full_path: str):
+    pool = _pools.get(os.path.abspath(base_dir))
+    if pool is not None:
+        pool.invalidate(full_path)
@@ -0,0 +1,89 @@
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from typing import List, Tuple
+
+from config import config
+
+_CHUNK = 1024 * 1024
+
+
+def _scan_offsets(data, size: int) -> array:
+    """Start offset of every line, plus `size` as a sentinel, scanning in bounded chunks."""
+    offsets = array("Q", [0])
+    for chunk_start in range(0, size, _CHUNK):
+        chunk = data[chunk_start:chunk_start + _CHUNK]
+        lengths = map(len, chunk.split(b"\n")[:-1])
+        ends = accumulate(map((1).__add__, lengths), initial=chunk_start)
+        next(ends)
+        offsets.extend(ends)
+    if offsets[-1] != size:
+        offsets.append(size)
+    return offsets
+
+
+class LineIndexCache:
+    """Per-file line-offset indexes, keyed by (path, mtime, size).
+
+    With the index, reading lines A..B costs one seek and a read of just those
+    bytes, no matter how deep into the file they are. Files above
+    LINE_INDEX_MMAP_BYTES are scanned through mmap so building the index never
+    holds the whole file in memory.
+    """
+
+    def __init__(self, max_files: int):
+        self.max_files = max_files
+        self._entries: "OrderedDict[str, Tuple[int, int, array]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build(self, full_path: str, size: int) -> array:
+        with open(full_path, "rb") as f:
+            if size == 0:
+                return array("Q", [0])
+            if size >= config.LINE_INDEX_MMAP_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return _scan_offsets(mm, size)
+            return _scan_offsets(f.read(), size)
+
+    def offsets(self, full_path: str) -> array:
+        st = os.stat(full_path)
+        with self._lock:
+            entry = self._entries.get(full_path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(full_path)
+                return entry[2]
+        offsets = self._build(full_path, st.st_size)
+        with self._lock:
+            self._entries[full_path] = (st.st_mtime_ns, st.st_size, offsets)
+            self._entries.move_to_end(full_path)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+        return offsets
+
+    def line_count(self, full_path: str) -> int:
+        return len(self.offsets(full_path)) - 1
+
+    def read_lines(self, full_path: str, start: int, end: int) -> List[str]:
+        """Lines start..end (1-based, inclusive, clamped to the file) without their newlines."""
+        offsets = self.offsets(full_path)
+        total = len(offsets) - 1
+        start, end = max(1, start), min(total, end)
+        if start > end:
+            return []
+        with open(full_path, "rb") as f:
+            f.seek(offsets[start - 1])
+            data = f.read(offsets[end] - offsets[start - 1])
+        text = data.decode("utf-8", errors="replace")
+        if text.endswith("\n"):
+            text = text[:-1]
+        return [line.rstrip("\r") for line in text.split("\n")]
+
+    def invalidate(self, full_path: str):
+        with self._lock:
+            self._entries.pop(full_path, None)
+
+
+line_index = LineIndexCache(config.LINE_INDEX_MAX_FILES)
@@ -0,0 +1,138 @@
+"""Pre-warmed fork server used by `tools.interpreter_pool`.
+
+Started as `python pool_server.py <base_dir> [module ...]`. It imports the given
+modules once, then reads one JSON request per line on stdin and answers each by
+forking a fresh child that runs the requested script as `__main__`. Answers go out
+on the original stdout only; anything else printed to it (by a preloaded module,
+say) is sent to stderr. This file is executed standalone and must not import
+anything from the agent itself.
+"""
+import importlib
+import json
+import os
+import runpy
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def _run_child(script: str, args, base_dir: str, out_path: str, err_path: str, protocol_fd: int):
+    os.setsid()
+    os.close(protocol_fd)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.dup2(os.open(out_path, os.O_WRONLY), 1)
+    os.dup2(os.open(err_path, os.O_WRONLY), 2)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+
+    os.chdir(base_dir)
+    sys.argv = [script, *args]
+    sys.path[0] = os.path.dirname(script)
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Drop the runpy frames so the traceback looks like `python script.py`.
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    os._exit(code)
+
+
+def _handle(request: dict, base_dir: str, protocol_fd: int) -> dict:
+    fd_out, out_path = tempfile.mkstemp(prefix="pool_out_")
+    fd_err, err_path = tempfile.mkstemp(prefix="pool_err_")
+    os.close(fd_out)
+    os.close(fd_err)
+
+    pid = os.fork()
+    if pid == 0:
+        _run_child(request["script"], request.get("args", []), base_dir, out_path, err_path, protocol_fd)
+
+    deadline = time.monotonic() + request.get("timeout", 30)
+    max_output = request.get("max_output", 0)
+    stopped = None
+    status = 0
+    polls = 0
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        polls += 1
+        if time.monotonic() > deadline:
+            stopped = "timeout"
+        elif max_output and polls % 10 == 0 and \
+                os.path.getsize(out_path) + os.path.getsize(err_path) > max_output:
+            stopped = "output_budget"
+        if stopped:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status = os.waitpid(pid, 0)
+            break
+        time.sleep(0.002)
+
+    return {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "stdout_path": out_path,
+        "stderr_path": err_path,
+        "stopped": stopped,
+    }
+
+
+def main():
+    base_dir = sys.argv[1]
+    # Replace this script's own directory so the agent's modules stay invisible.
+    sys.path[0] = base_dir
+    os.chdir(base_dir)
+    # Keep the protocol on a private copy of stdout and point fd 1 at stderr.
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    failed = []
+    for name in sys.argv[2:]:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failed.append(f"{name}: {e}")
+
+    sandbox_files = sorted({
+        os.path.abspath(m.__file__)
+        for m in list(sys.modules.values())
+        if getattr(m, "__file__", None) and os.path.abspath(m.__file__).startswith(base_dir + os.sep)
+    })
+    sys.stdout.flush()
+    protocol.write(json.dumps({"ready": True, "sandbox_files": sandbox_files, "failed": failed}) + "\n")
+    protocol.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = _handle(json.loads(line), base_dir, protocol.fileno())
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
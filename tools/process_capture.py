@@ -0,0 +1,188 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from config import config
+
+# Directory with the sitecustomize that reports uncaught exceptions back to us.
+_HOOK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capture_hook")
+
+
+class BoundedBuffer:
+    """Keeps the first `head_bytes` and the last `tail_bytes` of a stream.
+
+    Memory stays at most head_bytes + tail_bytes + one chunk however much is
+    written; everything in between is only counted.
+    """
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, chunk: bytes):
+        self.total += len(chunk)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if chunk:
+            self.tail += chunk
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    @property
+    def omitted(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if not self.omitted:
+            return head + tail
+        return f"{head}\n[... {self.omitted} bytes omitted ...]\n{tail}"
+
+
+class CaptureResult(NamedTuple):
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    stdout_bytes: int
+    stderr_bytes: int
+    stdout_omitted: int
+    stderr_omitted: int
+    # None if the process exited by itself; otherwise "timeout", "output_budget", "traceback" or "cancelled".
+    stopped: Optional[str]
+    seconds: float
+
+
+def _new_buffers():
+    return (BoundedBuffer(config.EXECUTOR_HEAD_BYTES, config.EXECUTOR_TAIL_BYTES),
+            BoundedBuffer(config.EXECUTOR_HEAD_BYTES, config.EXECUTOR_TAIL_BYTES))
+
+
+def _kill(proc: subprocess.Popen):
+    try:
+        if os.name == "posix":
+            # The script runs in its own session, so this also stops anything it spawned.
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _hook_env(write_fd: int) -> dict:
+    env = dict(os.environ)
+    env["HEALER_TRACEBACK_FD"] = str(write_fd)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_HOOK_DIR, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def run_captured(cmd: List[str], cwd: str, timeout: float,
+                 cancel: Optional[threading.Event] = None) -> CaptureResult:
+    """Run `cmd` reading stdout and stderr as they are produced into bounded buffers.
+
+    The process is killed when it exceeds `timeout`, when both streams together
+    pass EXECUTOR_OUTPUT_BUDGET bytes, or when it is still alive
+    EXECUTOR_TRACEBACK_GRACE seconds after the interpreter printed an uncaught
+    exception (a crash that non-daemon threads or exit handlers keep from exiting).
+    It is also killed as soon as `cancel` is set.
+    """
+    started = time.monotonic()
+    stdout, stderr = _new_buffers()
+    over_budget = threading.Event()
+    lock = threading.Lock()
+    uncaught_at = []
+
+    # Uncaught-exception reports arrive on a pipe of their own (POSIX only, via pass_fds).
+    marker_read, marker_write = os.pipe() if os.name == "posix" else (None, None)
+    try:
+        proc = subprocess.Popen(
+            cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=os.name == "posix",
+            env=_hook_env(marker_write) if marker_write is not None else None,
+            pass_fds=(marker_write,) if marker_write is not None else (),
+        )
+    finally:
+        if marker_write is not None:
+            os.close(marker_write)
+
+    def pump(pipe, buffer: BoundedBuffer):
+        with pipe:
+            while True:
+                chunk = pipe.read1(65536)
+                if not chunk:
+                    return
+                with lock:
+                    buffer.write(chunk)
+                    if config.EXECUTOR_OUTPUT_BUDGET and stdout.total + stderr.total > config.EXECUTOR_OUTPUT_BUDGET:
+                        over_budget.set()
+
+    def watch_marker():
+        with open(marker_read, "rb") as marker:
+            if marker.read(1):
+                uncaught_at.append(time.monotonic())
+
+    readers = [threading.Thread(target=pump, args=(proc.stdout, stdout), daemon=True),
+               threading.Thread(target=pump, args=(proc.stderr, stderr), daemon=True)]
+    if marker_read is not None:
+        readers.append(threading.Thread(target=watch_marker, daemon=True))
+    for reader in readers:
+        reader.start()
+
+    stopped = None
+    deadline = started + timeout
+    while True:
+        try:
+            proc.wait(timeout=0.02)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        now = time.monotonic()
+        if cancel is not None and cancel.is_set():
+            stopped = "cancelled"
+        elif now > deadline:
+            stopped = "timeout"
+        elif over_budget.is_set():
+            stopped = "output_budget"
+        elif config.EXECUTOR_TRACEBACK_GRACE and uncaught_at and now - uncaught_at[0] > config.EXECUTOR_TRACEBACK_GRACE:
+            stopped = "traceback"
+        if stopped:
+            _kill(proc)
+            proc.wait()
+            break
+
+    for reader in readers:
+        # Grandchildren that inherited the pipes could keep them open; do not wait on them forever.
+        reader.join(timeout=1)
+    with lock:
+        return CaptureResult(
+            returncode=proc.returncode,
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            stdout_bytes=stdout.total,
+            stderr_bytes=stderr.total,
+            stdout_omitted=stdout.omitted,
+            stderr_omitted=stderr.omitted,
+            stopped=stopped,
+            seconds=time.monotonic() - started,
+        )
+
+
+def read_bounded(path: str) -> BoundedBuffer:
+    """Head and tail of a captured output file, without reading the middle."""
+    buffer = BoundedBuffer(config.EXECUTOR_HEAD_BYTES, config.EXECUTOR_TAIL_BYTES)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer.write(f.read(buffer.head_bytes))
+        if size > buffer.head_bytes + buffer.tail_bytes:
+            f.seek(size - buffer.tail_bytes)
+            buffer.total = size - buffer.tail_bytes
+        buffer.write(f.read(buffer.tail_bytes))
+    return buffer
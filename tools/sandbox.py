@@ -0,0 +1,37 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from config import config
+
+# The sandbox root of the job running in the current context. Unset means the
+# process-wide default, config.PROJECT_ROOT. Being a ContextVar, it follows each
+# asyncio task and the executor threads LangGraph runs sync nodes in.
+_project_root: ContextVar[Optional[str]] = ContextVar("project_root", default=None)
+
+
+def get_base_dir() -> str:
+    """Absolute sandbox root for the current job."""
+    return os.path.abspath(_project_root.get() or config.PROJECT_ROOT)
+
+
+@contextmanager
+def use_project_root(project_root: str):
+    """Run the enclosed block (and everything it spawns) against another sandbox root."""
+    token = _project_root.set(os.path.abspath(project_root))
+    try:
+        yield
+    finally:
+        _project_root.reset(token)
+
+
+def check_path(path: str) -> str:
+    base_dir = get_base_dir()
+    joined_path = os.path.join(base_dir, path)
+    full_path = os.path.abspath(joined_path)
+
+    if not full_path.startswith(base_dir):
+        raise PermissionError(f"Access denied: {path} is outside the allowed sandbox: {base_dir}")
+
+    return full_path
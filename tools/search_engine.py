@@ -0,0 +1,148 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from config import config
+
+# Directory names that are never searched (VCS metadata, caches, virtualenvs).
+IGNORED_DIRS = {".git", ".hg", ".svn", "__pycache__", ".mypy_cache", ".pytest_cache",
+                ".ruff_cache", ".tox", ".nox", ".venv", "venv", "node_modules"}
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=config.GREP_WORKERS, thread_name_prefix="grep")
+    return _pool
+
+
+def is_ignored(rel_path: str) -> bool:
+    return any(part in IGNORED_DIRS for part in rel_path.split("/")[:-1])
+
+
+class FileMatches(NamedTuple):
+    lines: List[str]
+    matches: int
+    # The file has another match past `limit` that was left out.
+    more: bool = False
+
+
+def _search_file(regex: "re.Pattern", full_path: str, context: int, max_per_file: int,
+                 limit: int) -> FileMatches:
+    """Matching lines of one file formatted like `grep -n` (with `-C context` if asked)."""
+    try:
+        with open(full_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return FileMatches([], 0)
+    if b"\0" in data[:8192]:
+        return FileMatches([], 0)
+    text = data.decode("utf-8", errors="replace")
+
+    cap = min(max_per_file, limit) if max_per_file else limit
+    # One hit past the overall limit tells the caller whether the output was cut short.
+    probe = cap + 1 if cap == limit else cap
+    hits = []  # (line number, line start, line end)
+    pos, line_no, counted_to = 0, 1, 0
+    # Scan the whole text in C and only then confirm each hit on its own line, so a
+    # pattern that could span a newline keeps grep's per-line semantics.
+    while len(hits) < probe:
+        match = regex.search(text, pos)
+        if match is None:
+            break
+        start = text.rfind("\n", 0, match.start()) + 1
+        line_no += text.count("\n", counted_to, start)
+        counted_to = start
+        end = text.find("\n", match.start())
+        end = len(text) if end == -1 else end
+        if regex.search(text[start:end]):
+            hits.append((line_no, start, end))
+        pos = end + 1
+        if pos > len(text):
+            break
+
+    if not hits:
+        return FileMatches([], 0)
+    more = len(hits) > cap
+    hits = hits[:cap]
+    if not context:
+        return FileMatches([f"{full_path}:{n}:{text[s:e]}" for n, s, e in hits], len(hits), more)
+
+    all_lines = text.split("\n")
+    hit_numbers = {n for n, _, _ in hits}
+    out, last_printed = [], 0
+    for n, _, _ in hits:
+        first, last = max(1, n - context), min(len(all_lines), n + context)
+        if last_printed and first > last_printed + 1:
+            out.append("--")
+        for k in range(max(first, last_printed + 1), last + 1):
+            sep = ":" if k in hit_numbers else "-"
+            out.append(f"{full_path}{sep}{k}{sep}{all_lines[k - 1]}")
+        last_printed = max(last_printed, last)
+    return FileMatches(out, len(hits), more)
+
+
+def stream_search(regex: "re.Pattern", files: Iterable[str], max_results: int, context: int = 0,
+                  max_per_file: int = 0) -> Iterator[FileMatches]:
+    """Search `files` in parallel and yield per-file results in input order.
+
+    At most a small window of files is in flight at once; once `max_results`
+    matches have been yielded, only that window is finished and nothing else is
+    read from disk. The generator's return value says whether matches or unread
+    files were left behind.
+    """
+    if not regex.flags & re.MULTILINE:
+        # Whole-file scanning needs ^ and $ to match at every line boundary.
+        regex = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+    pool = _get_pool()
+    window = config.GREP_WORKERS * 4
+    pending = deque()
+    files = iter(files)
+    found = 0
+    exhausted = False
+
+    while True:
+        while not exhausted and len(pending) < window:
+            try:
+                path = next(files)
+            except StopIteration:
+                exhausted = True
+                break
+            pending.append(pool.submit(_search_file, regex, path, context, max_per_file, max_results))
+        if not pending:
+            return False
+        result = pending.popleft().result()
+        if not result.matches:
+            continue
+        found += result.matches
+        yield result
+        if found >= max_results:
+            # Settle the files already queued (at most one window) so an exact
+            # hit on the limit is not reported as stopping early.
+            stopped = found > max_results or result.more
+            stopped = any([future.result().matches for future in pending]) or stopped
+            return stopped or (not exhausted and next(files, None) is not None)
+
+
+def search(regex: "re.Pattern", files: Iterable[str], max_results: int, context: int = 0,
+           max_per_file: int = 0) -> tuple:
+    """Collect up to `max_results` matches. Returns (output lines, match count, stopped early)."""
+    lines, found = [], 0
+    results = stream_search(regex, files, max_results, context, max_per_file)
+    while True:
+        try:
+            result = next(results)
+        except StopIteration as done:
+            stopped = bool(done.value)
+            break
+        if context and lines:
+            lines.append("--")
+        lines.extend(result.lines)
+        found += result.matches
+    if not context:
+        # Files are scanned concurrently, so the last one may overshoot the limit.
+        lines = lines[:max_results]
+    return lines, min(found, max_results), stopped
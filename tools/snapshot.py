@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Snapshot:
+    """Original bytes of every file changed since the snapshot began.
+
+    A file that did not exist yet is recorded as None, so restoring removes it.
+    Only files that are actually written get recorded, which keeps the cost of a
+    snapshot proportional to the edit and independent of the tree size.
+    """
+
+    def __init__(self, attempt: int):
+        self.attempt = attempt
+        self.originals: Dict[str, Optional[bytes]] = {}
+        self.started = time.time()
+
+
+class SnapshotJournal:
+    """Active snapshot per sandbox root. The editor tools record into it before each write."""
+
+    def __init__(self):
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, root: str, attempt: int) -> Snapshot:
+        """Start a new snapshot for `root`, dropping any previous one."""
+        snapshot = Snapshot(attempt)
+        with self._lock:
+            self._snapshots[os.path.abspath(root)] = snapshot
+        return snapshot
+
+    def active(self, root: str) -> Optional[Snapshot]:
+        return self._snapshots.get(os.path.abspath(root))
+
+    def record(self, root: str, full_path: str):
+        """Remember the current contents of `full_path` unless it is already recorded."""
+        snapshot = self.active(root)
+        if snapshot is None:
+            return
+        with self._lock:
+            if full_path in snapshot.originals:
+                return
+            try:
+                with open(full_path, "rb") as f:
+                    snapshot.originals[full_path] = f.read()
+            except FileNotFoundError:
+                snapshot.originals[full_path] = None
+
+    def take(self, root: str) -> Optional[Snapshot]:
+        """Remove and return the active snapshot of `root`."""
+        with self._lock:
+            return self._snapshots.pop(os.path.abspath(root), None)
+
+
+journal = SnapshotJournal()
@@ -0,0 +1,289 @@
+import ast
+import builtins
+import hashlib
+import json
+import os
+import symtable
+import threading
+import time
+import warnings
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import config
+from tools.file_index import get_index
+from tools.import_graph import get_graph
+from tools.sandbox import check_path as _check_path, get_base_dir
+
+STRUCTURED_MARKER = "--- STATIC CHECK (structured) ---"
+
+# Script failures that a static check could have found, usually together with others like them.
+STATIC_EXCEPTIONS = {"SyntaxError", "IndentationError", "TabError", "NameError"}
+
+# Names every module has without defining them.
+_IMPLICIT_NAMES = set(dir(builtins)) | {
+    "__file__", "__name__", "__doc__", "__spec__", "__loader__", "__package__", "__path__",
+    "__cached__", "__builtins__", "__annotations__", "WindowsError",
+}
+
+# Enum helpers that export members into the module's globals at run time.
+_DYNAMIC_GLOBALS = {"global_enum", "_convert_"}
+
+
+def _line_text(lines: List[str], line: int) -> str:
+    return lines[line - 1].strip() if 0 < line <= len(lines) else ""
+
+
+def _undefined_names(source: str, filename: str) -> set:
+    """Global names that are read somewhere but bound nowhere in the module."""
+    top = symtable.symtable(source, filename, "exec")
+    defined, used = set(), set()
+    tables = [top]
+    while tables:
+        table = tables.pop()
+        for symbol in table.get_symbols():
+            name = symbol.get_name()
+            if table is top and (symbol.is_assigned() or symbol.is_imported() or symbol.is_namespace()):
+                defined.add(name)
+            elif symbol.is_declared_global() and (symbol.is_assigned() or symbol.is_imported()):
+                defined.add(name)
+            # is_local() as well: symtable mistakes a function named "top" for the module scope.
+            if symbol.is_global() and not symbol.is_local() and symbol.is_referenced():
+                used.add(name)
+        tables.extend(table.get_children())
+    return used - defined - _IMPLICIT_NAMES
+
+
+def _first_uses(tree: ast.AST, names: set) -> Dict[str, Tuple[int, int]]:
+    """First read of each name, leaving out modules that can bind names dynamically
+    (star imports, `globals()`, enum members exported to the module) and reads in
+    `try` bodies that handle NameError."""
+    first_use, guarded = {}, set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            return {}
+        if isinstance(node, ast.Attribute) and node.attr in _DYNAMIC_GLOBALS:
+            return {}
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "globals"
+                and not node.args):
+            return {}
+        if isinstance(node, ast.Name):
+            if node.id in _DYNAMIC_GLOBALS:
+                return {}
+            if node.id in names and isinstance(node.ctx, ast.Load):
+                position = (node.lineno, node.col_offset + 1)
+                first_use[node.id] = min(first_use.get(node.id, position), position)
+        elif isinstance(node, ast.Try):
+            handled = set()
+            for handler in node.handlers:
+                types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+                handled.update(t.id if isinstance(t, ast.Name) else "BaseException" for t in types)
+            if handled & {"NameError", "Exception", "BaseException"}:
+                guarded.update(n.id for stmt in node.body for n in ast.walk(stmt) if isinstance(n, ast.Name))
+    return {name: position for name, position in first_use.items() if name not in guarded}
+
+
+def check_source(item: Tuple[str, bytes]) -> List[dict]:
+    """Static errors in one file: anything `compile` rejects, then undefined global names.
+
+    Runs in the worker processes, so it only depends on the standard library. The
+    AST is only walked for the rare file where symtable finds an unbound name.
+    """
+    filename, data = item
+    try:
+        source = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        return [{"line": 1, "col": 1, "kind": "UnicodeDecodeError", "message": str(e), "text": ""}]
+    lines = source.splitlines()
+    try:
+        with warnings.catch_warnings():
+            # SyntaxWarnings are not errors; keep them out of the workers' stderr.
+            warnings.simplefilter("ignore")
+            compile(source, filename, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        line = e.lineno or 1
+        return [{"line": line, "col": e.offset or 1, "kind": type(e).__name__, "message": e.msg,
+                 "text": _line_text(lines, line)}]
+    except ValueError as e:
+        # e.g. "source code string cannot contain null bytes"
+        return [{"line": 1, "col": 1, "kind": "SyntaxError", "message": str(e), "text": ""}]
+
+    missing = _undefined_names(source, filename)
+    if not missing:
+        return []
+    first_use = _first_uses(ast.parse(source, filename), missing)
+    return [
+        {"line": line, "col": col, "kind": "UndefinedName", "message": f"name '{name}' is not defined",
+         "text": _line_text(lines, line)}
+        for name, (line, col) in sorted(first_use.items(), key=lambda kv: kv[1])
+    ]
+
+
+class StaticChecker:
+    """Checks files across a process pool, caching findings by content hash.
+
+    Files whose bytes were seen before are answered from the cache, so after the
+    first pass only edited files are parsed again. Small batches are checked in
+    this process; the pool only pays off once there are enough misses to spread.
+    """
+
+    def __init__(self, max_entries: int, workers: int):
+        self.max_entries = max_entries
+        self.workers = workers
+        self._cache: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Spawned, not forked: callers run threads (tool scheduler, logger, daemon).
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _check_all(self, items: List[Tuple[str, bytes]]) -> List[List[dict]]:
+        if self.workers > 1 and len(items) >= config.STATIC_CHECK_PARALLEL_MIN:
+            from concurrent.futures.process import BrokenProcessPool
+            try:
+                chunksize = max(1, len(items) // (self.workers * 4))
+                return list(self._get_pool().map(check_source, items, chunksize=chunksize))
+            except (BrokenProcessPool, OSError):
+                with self._lock:
+                    self._pool = None
+        return [check_source(item) for item in items]
+
+    def check(self, base_dir: str, sources: Dict[str, bytes]) -> dict:
+        """Findings for `sources` ({sandbox-relative path: bytes}), sorted by path and line."""
+        started = time.perf_counter()
+        keys = {rel: hashlib.blake2b(data, digest_size=16).hexdigest() for rel, data in sources.items()}
+        results, misses = {}, {}
+        with self._lock:
+            for rel, key in keys.items():
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[rel] = self._cache[key]
+                else:
+                    misses.setdefault(key, rel)
+
+        items = [(misses[key], sources[misses[key]]) for key in misses]
+        for (rel, _), findings in zip(items, self._check_all(items)):
+            results[rel] = findings
+            with self._lock:
+                self._cache[keys[rel]] = findings
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        for rel, key in keys.items():
+            if rel not in results:
+                cached = self._cache.get(key)
+                results[rel] = cached if cached is not None else check_source((rel, sources[rel]))
+
+        findings = [{"path": rel, **f} for rel in sorted(results) for f in results[rel]]
+        return {
+            "files": len(sources),
+            "parsed": len(items),
+            "findings": findings,
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+
+
+checker = StaticChecker(config.STATIC_CHECK_CACHE_ENTRIES, config.STATIC_CHECK_WORKERS)
+
+
+def _read_sources(base_dir: str, rel_paths: Sequence[str]) -> Dict[str, bytes]:
+    sources = {}
+    for rel in rel_paths:
+        try:
+            with open(os.path.join(base_dir, rel), "rb") as f:
+                sources[rel] = f.read()
+        except OSError:
+            continue
+    return sources
+
+
+def check_tree(base_dir: str, prefix: str = "") -> dict:
+    """Static check of every .py file of the sandbox under `prefix`."""
+    rel_paths = [rel for rel in get_index(base_dir).file_stats(".py") if rel.startswith(prefix)]
+    return checker.check(base_dir, _read_sources(base_dir, rel_paths))
+
+
+def check_imports(base_dir: str, entry: str) -> dict:
+    """Static check of `entry` and every sandbox module it imports, directly or not."""
+    rel_paths = get_graph(base_dir).dependencies([entry]) | {entry}
+    return checker.check(base_dir, _read_sources(base_dir, sorted(rel_paths)))
+
+
+def introduced_findings(base_dir: str, originals: Dict[str, Optional[bytes]]) -> List[dict]:
+    """Findings in the edited .py files that their original contents did not have.
+
+    `originals` is a fix snapshot's {full path: original bytes or None}. Errors
+    already present before the edit (say, the bug being healed elsewhere in the
+    file) are not blamed on it.
+    """
+    edited = {os.path.relpath(p, base_dir).replace(os.sep, "/"): data
+              for p, data in originals.items() if p.endswith(".py")}
+    after = checker.check(base_dir, _read_sources(base_dir, list(edited)))["findings"]
+    before = checker.check(base_dir, {rel: data for rel, data in edited.items() if data is not None})["findings"]
+    budget = Counter((f["path"], f["kind"], f["message"]) for f in before)
+    introduced = []
+    for finding in after:
+        key = (finding["path"], finding["kind"], finding["message"])
+        if budget[key]:
+            budget[key] -= 1
+        else:
+            introduced.append(finding)
+    return introduced
+
+
+def format_findings(findings: List[dict]) -> str:
+    return "\n".join(
+        f"{f['path']}:{f['line']}:{f['col']}: {f['kind']}: {f['message']}" + (f"\n    {f['text']}" if f["text"] else "")
+        for f in findings
+    )
+
+
+def failure_report(stderr: str, base_dir: str, entry: str) -> str:
+    """Every static error in the code a script imports, when the script itself died of one.
+
+    Running the script only surfaces the first such error; this lists them all.
+    """
+    last = stderr.strip().rsplit("\n", 1)[-1]
+    if last.partition(":")[0].strip() not in STATIC_EXCEPTIONS:
+        return ""
+    findings = check_imports(base_dir, entry)["findings"]
+    if len(findings) < 2:
+        # Nothing beyond the error the traceback already shows.
+        return ""
+    return f"--- STATIC CHECK ({entry} and the modules it imports) ---\n" + format_findings(findings)
+
+
+def static_check(path: str = ".") -> str:
+    """
+    Check Python files for static errors without running them: syntax, indentation and
+    undefined names. Every error in every file is reported at once.
+
+    Args:
+        path: A file or directory relative to the project root (default: the whole project).
+    """
+    try:
+        target = _check_path(path)
+        base_dir = get_base_dir()
+        rel = os.path.relpath(target, base_dir).replace(os.sep, "/")
+        if os.path.isfile(target):
+            result = checker.check(base_dir, _read_sources(base_dir, [rel]))
+        else:
+            result = check_tree(base_dir, "" if rel == "." else rel + "/")
+
+        findings = result["findings"]
+        if not findings:
+            return f"No static errors in {result['files']} Python files."
+        files = len({f["path"] for f in findings})
+        return (
+            f"Static errors: {len(findings)} in {files} of {result['files']} Python files.\n"
+            f"{format_findings(findings)}\n{STRUCTURED_MARKER}\n{json.dumps(findings, ensure_ascii=False)}"
+        )
+    except Exception as e:
+        return f"Error running static check: {str(e)}"
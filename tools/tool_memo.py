@@ -0,0 +1,65 @@
+import json
+import os
+from typing import Optional, Sequence
+
+from tools.file_index import get_index
+from tools.sandbox import check_path, get_base_dir
+
+# Explorer tools whose output is fully determined by their arguments and the files they cover.
+MEMO_TOOLS = {"list_files", "find_file", "grep_text", "read_header", "read_range", "read_around", "static_check"}
+_SINGLE_FILE_TOOLS = {"read_header", "read_range", "read_around"}
+
+
+def memo_key(name: str, args: dict) -> str:
+    return json.dumps({"tool": name, "args": args}, sort_keys=True, default=str)
+
+
+def fingerprint(name: str, args: dict) -> Optional[str]:
+    """(mtime, size) digest of everything a memoizable call's output depends on.
+
+    None means the call cannot be memoized (unknown tool or unreadable target).
+    Single-file reads stat the file itself; a plain directory listing stats the
+    directory; tree-wide tools use the file index's generation, which editor writes,
+    script runs and rescans that find a change all move forward.
+    """
+    if name not in MEMO_TOOLS:
+        return None
+    try:
+        target = check_path(args.get("path", "."))
+        single = name in _SINGLE_FILE_TOOLS or os.path.isfile(target)
+        if single or (name == "list_files" and not args.get("recursive")):
+            st = os.stat(target)
+            return f"{st.st_mtime_ns}:{st.st_size}"
+        index = get_index(get_base_dir())
+        return f"{index.root}:{index.generation()}"
+    except (OSError, PermissionError, ValueError):
+        return None
+
+
+def stub_content(name: str, args: dict, call_no: int) -> str:
+    arg_text = ", ".join(f"{k}={v!r}" for k, v in args.items())
+    return (f"[Unchanged since call #{call_no}] {name}({arg_text}) returns exactly the same output "
+            "as its earlier call above; nothing it covers has changed since.")
+
+
+def memo_stats(messages: Sequence) -> dict:
+    """Hit rate of the memoization layer over one run's messages."""
+    eligible = hits = saved_chars = 0
+    originals = {}
+    for message in messages:
+        artifact = getattr(message, "artifact", None) if getattr(message, "type", None) == "tool" else None
+        memo = artifact.get("memo") if isinstance(artifact, dict) else None
+        if not isinstance(memo, dict):
+            continue
+        eligible += 1
+        if "same_as_id" in memo:
+            hits += 1
+            saved_chars += max(0, originals.get(memo["same_as_id"], 0) - len(str(message.content)))
+        else:
+            originals[message.tool_call_id] = len(str(message.content))
+    return {
+        "calls": eligible,
+        "hits": hits,
+        "hit_rate": round(hits / eligible, 3) if eligible else 0.0,
+        "chars_saved": saved_chars,
+    }
@@ -0,0 +1,88 @@
+import json
+import os
+import re
+from typing import List, Optional
+
+from tools.line_index import line_index
+
+STRUCTURED_MARKER = "--- TRACEBACK (structured) ---"
+
+_FRAME_RE = re.compile(r'^  File "(?P<path>.+?)", line (?P<line>\d+)(?:, in (?P<function>.+))?$')
+_HEADER = "Traceback (most recent call last):"
+
+
+def _source_context(full_path: str, line: int, radius: int) -> List[str]:
+    try:
+        lines = line_index.read_lines(full_path, line - radius, line + radius)
+    except OSError:
+        return []
+    start = max(1, line - radius)
+    return [f"{'>' if n == line else ' '}{n:5d} | {text}" for n, text in enumerate(lines, start)]
+
+
+def parse_traceback(stderr: str, base_dir: str, context_radius: int = 2) -> Optional[dict]:
+    """Parse the last Python traceback in `stderr`.
+
+    Returns the exception type and message plus the frames, outermost first. Each
+    frame has its path relative to the sandbox (when inside it), line number,
+    function and a few lines of source context. Returns None if there is no traceback.
+    """
+    lines = stderr.splitlines()
+    starts = [i for i, line in enumerate(lines) if line.startswith(_HEADER)]
+    if not starts:
+        return None
+
+    frames = []
+    exception_line = ""
+    for line in lines[starts[-1] + 1:]:
+        match = _FRAME_RE.match(line)
+        if match:
+            frames.append(match.groupdict())
+            continue
+        if line and not line[0].isspace():
+            exception_line = line
+            break
+
+    exc_type, _, message = exception_line.partition(":")
+    base_dir = os.path.abspath(base_dir)
+    parsed_frames = []
+    for frame in frames:
+        full_path = os.path.abspath(os.path.join(base_dir, frame["path"]))
+        in_sandbox = full_path.startswith(base_dir + os.sep)
+        line_no = int(frame["line"])
+        parsed_frames.append({
+            "path": os.path.relpath(full_path, base_dir) if in_sandbox else frame["path"],
+            "in_sandbox": in_sandbox,
+            "line": line_no,
+            "function": frame["function"],
+            "context": _source_context(full_path, line_no, context_radius) if in_sandbox else [],
+        })
+
+    return {
+        "exc_type": exc_type.strip(),
+        "message": message.strip(),
+        "frames": parsed_frames,
+    }
+
+
+def fault_frame(traceback: dict) -> Optional[dict]:
+    """The innermost frame that lives in the sandbox, i.e. the most likely place to fix."""
+    for frame in reversed(traceback.get("frames", [])):
+        if frame["in_sandbox"]:
+            return frame
+    return None
+
+
+def format_structured(traceback: dict) -> str:
+    return f"{STRUCTURED_MARKER}\n{json.dumps(traceback, ensure_ascii=False)}"
+
+
+def extract_structured(output: str) -> Optional[dict]:
+    """Recover the structured traceback that `run_python_script` appended to its output."""
+    _, marker, payload = output.rpartition(STRUCTURED_MARKER)
+    if not marker:
+        return None
+    try:
+        return json.loads(payload.strip().splitlines()[0])
+    except (ValueError, IndexError):
+        return None
@@ -1,59 +1,213 @@
+import atexit
+import gzip
+import hashlib
+import json
 import logging
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from colorama import Fore, Style, init
 
-init(autoreset=True)
+from config import config
+from utils.tracing import current_trace
+
+
+class _LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory and file on the first record, not at import."""
+
+    def __init__(self, filename: str):
+        super().__init__(filename, encoding="utf-8", delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _JSONLFormatter(logging.Formatter):
+    """One JSON object per record. Payloads over `max_chars` are cut to a preview;
+    with `blob_dir` set, the full text is stored there as a gzip blob.
+
+    Runs on the listener thread, so compressing and writing blobs never blocks the agent.
+    """
+
+    def __init__(self, max_chars: int, blob_dir: str = None):
+        super().__init__()
+        self.max_chars = max_chars
+        self.blob_dir = blob_dir
+
+    def _cap(self, value):
+        if isinstance(value, dict):
+            return {k: self._cap(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._cap(v) for v in value]
+        if not isinstance(value, str) or len(value) <= self.max_chars:
+            return value
+        text = value
+        capped = {"text": text[:self.max_chars], "truncated_chars": len(text) - self.max_chars}
+        if self.blob_dir:
+            data = text.encode("utf-8")
+            name = hashlib.sha1(data).hexdigest() + ".txt.gz"
+            path = os.path.join(self.blob_dir, name)
+            if not os.path.exists(path):
+                os.makedirs(self.blob_dir, exist_ok=True)
+                with gzip.open(path, "wb") as f:
+                    f.write(data)
+            capped["blob"] = path
+        return capped
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": getattr(record, "event", "log"),
+            "thread": record.threadName,
+        }
+        run_id = getattr(record, "run_id", None)
+        if run_id:
+            entry["run"] = run_id
+        for key, value in getattr(record, "data", {}).items():
+            entry[key] = self._cap(value)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """The colorized, human-oriented rendering of each event."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", "log")
+        data = getattr(record, "data", {})
+        if event == "step":
+            divider = "═" * 60
+            return f"{Fore.MAGENTA}{Style.BRIGHT}\n{divider}\n[ENTER STEP]: {data['step']}\n{divider}"
+        if event == "thought":
+            return f"{Fore.CYAN}💭 [THOUGHT]: {Style.RESET_ALL}{data['thought']}"
+        if event == "action":
+            return f"{Fore.YELLOW}🛠️ [ACTION]: Using tool [{data['tool']}] with args: {data['args']}"
+        if event == "observation":
+            observation = data["observation"]
+            preview = (observation[:300] + "...") if len(observation) > 300 else observation
+            source = f" [{data['tool']}]" if data.get("tool") else ""
+            return f"{Fore.GREEN}👁️ [OBSERVATION]{source}: {Style.RESET_ALL}{preview}"
+        if event == "metrics":
+            body = " ".join(f"{k}={v}" for k, v in data["metrics"].items())
+            return f"{Fore.BLUE}📊 [{data['name'].upper()}]: {Style.RESET_ALL}{body}"
+        if event == "error":
+            return f"{Fore.RED}{Style.BRIGHT}❌ [SYSTEM ERROR]: {data['error']}"
+        if event == "success":
+            return f"\n{Fore.GREEN}{Style.BRIGHT}✅ [SUCCESS]: {data['message']}"
+        return record.getMessage()
+
 
 class AgentLogger:
-    def __init__(self, log_dir="logs"):
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
+    """Structured agent log with a non-blocking pipeline.
+
+    Log calls only enqueue a record; a background QueueListener renders the
+    console view and appends JSONL to `agent_trace_<timestamp>.jsonl`. Neither
+    the log directory nor the file exists until the first record is written.
+    """
+
+    def __init__(self, log_dir: str = config.LOG_DIR, console: bool = config.LOG_CONSOLE):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = os.path.join(log_dir, f"agent_trace_{timestamp}.log")
-        
+        self.log_file = os.path.join(log_dir, f"agent_trace_{timestamp}.jsonl")
+
+        file_handler = _LazyFileHandler(self.log_file)
+        file_handler.setFormatter(_JSONLFormatter(
+            config.LOG_MAX_PAYLOAD_CHARS,
+            os.path.join(log_dir, "blobs") if config.LOG_PAYLOAD_BLOBS else None,
+        ))
+        # Wraps sys.stdout (auto-reset of colors), so it has to happen before the handler takes it.
+        init(autoreset=True)
+        self._console_handler = logging.StreamHandler(sys.stdout)
+        self._console_handler.setFormatter(_ConsoleFormatter())
+        self._console_handler.setLevel(logging.NOTSET if console else logging.CRITICAL + 1)
+
+        self._queue = queue.Queue()
+        self._listener = QueueListener(self._queue, file_handler, self._console_handler,
+                                       respect_handler_level=True)
+        self._started = False
+        self._start_lock = threading.Lock()
+
         self.logger = logging.getLogger("FileAgent")
         self.logger.setLevel(logging.INFO)
-        
-        file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
-        file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
+        self.logger.propagate = False
+        self.logger.addHandler(QueueHandler(self._queue))
+
+    def _emit(self, level: int, event: str, summary: str, **data):
+        if not self._started:
+            with self._start_lock:
+                if not self._started:
+                    self._listener.start()
+                    atexit.register(self.close)
+                    self._started = True
+        trace = current_trace()
+        self.logger.log(level, summary, extra={
+            "event": event,
+            "data": data,
+            "run_id": trace.run_id if trace is not None else None,
+        })
+
+    def set_console(self, enabled: bool):
+        """Turn console rendering on or off; the JSONL file is unaffected."""
+        self._console_handler.setLevel(logging.NOTSET if enabled else logging.CRITICAL + 1)
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        if self._started:
+            self._queue.join()
+
+    def close(self):
+        if self._started:
+            self._listener.stop()
+            self._started = False
 
     def log_step(self, step_name: str):
         """Log transitions between LangGraph nodes"""
-        divider = "═" * 60
-        msg = f"\n{divider}\n[ENTER STEP]: {step_name}\n{divider}"
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}{msg}")
-        self.logger.info(f"--- STEP: {step_name} ---")
+        self._emit(logging.INFO, "step", f"--- STEP: {step_name} ---", step=step_name)
 
     def log_thought(self, thought: str):
         """Log the agent's reasoning process"""
-        print(f"{Fore.CYAN}💭 [THOUGHT]: {Style.RESET_ALL}{thought}")
-        self.logger.info(f"[THOUGHT] {thought}")
+        self._emit(logging.INFO, "thought", "[THOUGHT]", thought=thought)
 
     def log_tool_call(self, tool_name: str, args: dict):
         """Log tool invocations"""
-        msg = f"🛠️ [ACTION]: Using tool [{tool_name}] with args: {args}"
-        print(f"{Fore.YELLOW}{msg}")
-        self.logger.info(f"[ACTION] {tool_name} | Args: {args}")
+        self._emit(logging.INFO, "action", f"[ACTION] {tool_name}", tool=tool_name, args=args)
 
-    def log_observation(self, observation: str):
+    def log_observation(self, observation: str, tool_name: str = None):
         """Log feedback/results after tool execution"""
-        preview = (observation[:300] + "...") if len(observation) > 300 else observation
-        print(f"{Fore.GREEN}👁️ [OBSERVATION]: {Style.RESET_ALL}{preview}")
-        self.logger.info(f"[OBSERVATION] {observation}")
+        self._emit(logging.INFO, "observation", "[OBSERVATION]", tool=tool_name, observation=observation)
+
+    def log_metrics(self, name: str, metrics: dict):
+        """Log a compact line of numeric metrics"""
+        self._emit(logging.INFO, "metrics", f"[METRICS] {name}", name=name, metrics=metrics)
 
     def log_error(self, error_msg: str):
         """Log system-level errors"""
-        print(f"{Fore.RED}{Style.BRIGHT}❌ [SYSTEM ERROR]: {error_msg}")
-        self.logger.error(f"[ERROR] {error_msg}")
+        self._emit(logging.ERROR, "error", "[ERROR]", error=error_msg)
 
     def log_success(self, final_msg: str):
         """Log successful task completion"""
-        print(f"\n{Fore.GREEN}{Style.BRIGHT}✅ [SUCCESS]: {final_msg}")
-        self.logger.info(f"[SUCCESS] {final_msg}")
+        self._emit(logging.INFO, "success", "[SUCCESS]", message=final_msg)
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_logger() -> AgentLogger:
+    """The process-wide agent logger, created on first use."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = AgentLogger()
+    return _logger
+
 
-logger = AgentLogger()
\ No newline at end of file
+def __getattr__(name):
+    # `from utils.logger import logger` resolves here, so the logger (and colorama's
+    # stdout wrapper) only exist in processes that actually log.
+    if name == "logger":
+        return get_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
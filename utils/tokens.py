@@ -0,0 +1,30 @@
+from typing import Iterable
+
+# Rough characters-per-token ratio for English text and code. Only used where
+# the provider has not reported real usage yet.
+CHARS_PER_TOKEN = 4
+
+
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content)
+    return str(content or "")
+
+
+def estimate_tokens(text) -> int:
+    return len(_content_text(text)) // CHARS_PER_TOKEN + 1
+
+
+def estimate_message_tokens(messages: Iterable) -> int:
+    """Estimate the prompt size of a list of LangChain messages or role/content dicts."""
+    total = 0
+    for message in messages:
+        if isinstance(message, dict):
+            total += estimate_tokens(message.get("content", ""))
+            continue
+        total += estimate_tokens(message.content)
+        for call in getattr(message, "tool_calls", None) or []:
+            total += estimate_tokens(call["name"]) + estimate_tokens(str(call["args"]))
+    return total
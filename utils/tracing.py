@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Chrome trace lane that holds the phase spans, separate from the thread lanes.
+PHASE_LANE = 0
+
+
+class Span:
+    """A timed, attributed region of one run. Attributes can be added while it is open."""
+
+    __slots__ = ("name", "cat", "start_ns", "end_ns", "tid", "attrs")
+
+    def __init__(self, name: str, cat: str, attrs: dict, tid: int = None):
+        self.name = name
+        self.cat = cat
+        self.attrs = attrs
+        self.tid = threading.get_ident() if tid is None else tid
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    """Returned when no trace is active so instrumented code never has to check."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """All spans of one agent run.
+
+    Recording a span costs two clock reads and a list append, so tracing can stay
+    on in production. Phase spans are opened and closed by `enter_phase` and live
+    on their own lane in the Chrome export.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.spans: List[Span] = []
+        self._phase: Optional[Span] = None
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self.started_at = time.time()
+
+    def add(self, span: Span):
+        self.spans.append(span)
+
+    def enter_phase(self, phase: str, **attrs):
+        with self._lock:
+            now = time.perf_counter_ns()
+            if self._phase is not None:
+                if self._phase.name == phase:
+                    return
+                self._phase.end_ns = now
+            self._phase = Span(phase, "phase", attrs, tid=PHASE_LANE)
+            self._phase.start_ns = now
+            self.spans.append(self._phase)
+
+    def finish(self):
+        with self._lock:
+            if self._phase is not None and self._phase.end_ns is None:
+                self._phase.end_ns = time.perf_counter_ns()
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event JSON (load in chrome://tracing or ui.perfetto.dev)."""
+        pid = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"run {self.run_id}"}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": PHASE_LANE, "args": {"name": "phases"}},
+        ]
+        for span in self.spans:
+            if span.end_ns is None:
+                continue
+            events.append({
+                "name": span.name,
+                "cat": span.cat,
+                "ph": "X",
+                "ts": (span.start_ns - self._origin_ns) / 1e3,
+                "dur": (span.end_ns - span.start_ns) / 1e3,
+                "pid": pid,
+                "tid": span.tid,
+                "args": span.attrs,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> dict:
+        """Where the run spent its time: totals per category, per span name and per phase."""
+        by_cat: Dict[str, dict] = {}
+        by_name: Dict[str, dict] = {}
+        by_phase: Dict[str, dict] = {}
+        tokens = {"prompt_tokens": 0, "completion_tokens": 0}
+        end_ns = self._origin_ns
+
+        for span in self.spans:
+            if span.end_ns is None:
+                continue
+            end_ns = max(end_ns, span.end_ns)
+            ms = (span.end_ns - span.start_ns) / 1e6
+            if span.cat == "phase":
+                entry = by_phase.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+                entry["count"] += 1
+                entry["total_ms"] += ms
+                continue
+            for table, key in ((by_cat, span.cat), (by_name, span.name)):
+                entry = table.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                entry["count"] += 1
+                entry["total_ms"] += ms
+                entry["max_ms"] = max(entry["max_ms"], ms)
+            for key in tokens:
+                tokens[key] += span.attrs.get(key) or 0
+
+        def rounded(table):
+            return {k: {f: round(v, 3) if isinstance(v, float) else v for f, v in e.items()}
+                    for k, e in sorted(table.items(), key=lambda kv: -kv[1]["total_ms"])}
+
+        return {
+            "run_id": self.run_id,
+            "wall_ms": round((end_ns - self._origin_ns) / 1e6, 3),
+            "spans": len(self.spans),
+            "by_category": rounded(by_cat),
+            "by_phase": rounded(by_phase),
+            "by_name": rounded(by_name),
+            **tokens,
+        }
+
+    def export(self, directory: str) -> str:
+        """Write `<run_id>.trace.json` and `<run_id>.summary.json`; returns the trace path."""
+        self.finish()
+        os.makedirs(directory, exist_ok=True)
+        safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in self.run_id)
+        trace_path = os.path.join(directory, f"{safe_id}.trace.json")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, default=str)
+        with open(os.path.join(directory, f"{safe_id}.summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return trace_path
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]):
+    """Record spans from this context (and tasks/threads that copy it) into `trace`."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, cat: str = "agent", **attrs):
+    """Time the enclosed block as a span of the active trace (a no-op without one)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NULL_SPAN
+        return
+    s = Span(name, cat, attrs)
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        s.end_ns = time.perf_counter_ns()
+        trace.add(s)
+
+
+def enter_phase(phase: str, **attrs):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.enter_phase(phase, **attrs)